@@ -1,92 +1,99 @@
+import logging
+
 import gradio as gr
-import numpy as np
 
 from ui_components import CUSTOM_CSS, render_header
-from model_loader import ModelLoader
-from health_metrics import HealthMetrics
-from planner import WorkoutPlanner, DietPlanner
-
-# Load models once
-models = ModelLoader()
+from config import APP_CONFIG
+from food_search import get_search, suggest_foods
+from load_control import AdmissionController, Deadline, Overloaded
+from model_registry import ModelRegistry
+from plan_pipeline import IncrementalPlanner, build_user_data
+from single_flight import SingleFlight, request_key
+
+logger = logging.getLogger(__name__)
+
+# Versioned models: new files are loaded, smoke-tested and swapped in live
+registry = ModelRegistry()
+registry.start_watching(APP_CONFIG.MODEL_WATCH_INTERVAL_S)
+# Per-session stage cache: only the stages an edited input touches re-run
+planner = IncrementalPlanner()
+# Identical concurrent submissions (e.g. untouched default form) share one run
+flights = SingleFlight()
+# Bounded concurrency + queue; overflow is shed instead of queueing forever
+admission = AdmissionController(APP_CONFIG.MAX_CONCURRENT_PLANS, APP_CONFIG.MAX_QUEUED_PLANS)
+# Food-name suggestions: load (or compile) the search index before the first keystroke
+get_search()
+
+DEGRADATION_NOTES = {
+    "preferences_skipped": "Your preferences could not be analysed in time and were not applied.",
+    "calories_fallback":   "Calorie target estimated from your TDEE (calorie model unavailable).",
+    "projection_skipped":  "Weight projection skipped to keep the response fast.",
+}
 
 
 # ─────────────────────────────────────────────
 # Core Logic
 # ─────────────────────────────────────────────
+def _run_plan(session_id, user_data, deadline, models):
+    """Flight leader: only the run that actually plans takes an admission slot."""
+    with admission.admit(deadline):
+        plan, stages = planner.plan(session_id, user_data, deadline, models)
+    return plan, stages, session_id
+
+
 def compute_plan(
     age, gender, height, weight,
     activity_level, fitness_goal,
     dietary_preference, cultural_food,
-    budget, equipment, free_text
+    budget, equipment, free_text, household_size=1,
+    request: gr.Request = None,
 ):
 
-    user_data = {
-        "age": age,
-        "gender": gender,
-        "height_cm": height,
-        "weight_kg": weight,
-        "activity_level": activity_level,
-        "fitness_goal": fitness_goal,
-        "dietary_preference": dietary_preference,
-        "cultural_food_habits": cultural_food,
-        "budget_usd_per_day": budget,
-        "available_equipment": equipment,
-        "free_text_prefs": free_text
-    }
-
-    # ── Health Metrics ───────────────────────
-    metrics = HealthMetrics(user_data)
-    bmi = round(metrics.bmi(), 2)
-    bmr = round(metrics.bmr(), 1)
-    tdee = round(metrics.tdee(), 1)
-
-    # ── Fitness Cluster ──────────────────────
-    cluster_features = np.array([[age, bmi, 0, 0, 0, 0, 0]])
-    scaled = models.scale(cluster_features)
-    cluster = models.predict_cluster(scaled)
-
-    # ── Calorie Prediction ───────────────────
-    calorie_features = models.preprocess_calories({
-        "age": age,
-        "gender": gender,
-        "height_cm": height,
-        "weight_kg": weight,
-        "activity_level": activity_level,
-        "fitness_goal": fitness_goal,
-        "bmi": bmi,
-        "bmr": bmr,
-        "tdee": tdee,
-    })
-
-    predicted_calories = models.predict_calories(calorie_features)
-
-    # ── Workout Plan ─────────────────────────
-    workout_plan = WorkoutPlanner.generate(
-        fitness_level="Intermediate",
-        fitness_goal=fitness_goal,
-        available_equipment=equipment,
-        notes=[]
-    )
-
-    # ── Diet Plan ────────────────────────────
-    diet_plan = DietPlanner.generate(
-        daily_calories=predicted_calories,
-        macros={"protein_pct": 30, "carbs_pct": 40, "fat_pct": 30},
-        dietary_preference=dietary_preference,
-        cultural_food_habits=cultural_food,
-        budget_usd=budget,
-        notes=[]
+    user_data = build_user_data(
+        age, gender, height, weight,
+        activity_level, fitness_goal,
+        dietary_preference, cultural_food,
+        budget, equipment, free_text, int(household_size or 1)
     )
+    session_id = getattr(request, "session_hash", None) or "default"
+    deadline = Deadline(APP_CONFIG.REQUEST_DEADLINE_S)
+    try:
+        with registry.acquire() as lease:
+            plan, stages, leader_id = flights.do(f"{lease.number}:{request_key(user_data)}", _run_plan,
+                                                 session_id, user_data, deadline, lease.models)
+        # A follower's session takes the leader's stage cache, as if it had planned itself
+        planner.adopt(session_id, leader_id)
+    except Overloaded as e:
+        logger.warning(f"⚠️ Request shed: {e}")
+        return "## ⏳ We're busy\nToo many plans are being generated right now — please try again in a moment."
+    if stages["skipped"]:
+        logger.info(f"Re-plan: ran {stages['ran']}, skipped {stages['skipped']}")
+    bmi, bmr, tdee = plan["bmi"], plan["bmr"], plan["tdee"]
+    predicted_calories = plan["predicted_calories"]
+    workout_plan = plan["workout_plan"]
+    projection = plan["weight_projection"]
 
     # ── Output Formatting ────────────────────
     workout_days = ", ".join([d["day"] for d in workout_plan])
-
-    return f"""
+    projection_text = f"{projection[0]} kg → {projection[-1]} kg" if projection else "—"
+    exclusions = plan["diet_plan"].get("exclusions")
+    excluded = f"  \nExcluding: {', '.join(e.replace('_', ' ') for e in exclusions)}" if exclusions else ""
+    if not plan["diet_plan"].get("within_budget", True):
+        excluded += "  \n⚠️ Even the cheapest meals exceed your daily budget."
+    ideas = plan["diet_plan"].get("dish_ideas") or []
+    excluded += "".join(f"  \n🍛 Try for {i['course']}: {i['item']}"
+                        + (f" ({i['minutes']} min)" if i["minutes"] else "") for i in ideas)
+    groceries = "\n".join(f"- {g['name']}: {g['packs']} × {g['pack']}" for g in plan["grocery_list"])
+    degraded = "".join(f"> ⚠️ {DEGRADATION_NOTES.get(d, d)}\n" for d in plan["degradations"])
+
+    return f"""{degraded}
 ## 📊 Health Metrics
 **BMI:** {bmi}  
 **BMR:** {bmr} kcal  
 **TDEE:** {tdee} kcal  
 **Predicted Calories:** {round(predicted_calories)} kcal  
+**Workout Burn:** {plan["weekly_burn_kcal"]:.0f} kcal/week  
+**12-Week Projection:** {projection_text}  
 
 ---
 
@@ -97,7 +104,10 @@ Days Scheduled:
 ---
 
 ## 🥗 Diet Plan
-Personalized meal plan generated successfully.
+Personalized meal plan generated successfully.{excluded}
+
+### 🛒 Weekly Groceries
+{groceries}
 """
 
 
@@ -136,6 +146,7 @@ with gr.Blocks(css=CUSTOM_CSS, title="AI Fitness Planner") as app:
     )
 
     budget = gr.Slider(2, 50, value=10, label="Daily Budget ($)")
+    household_size = gr.Slider(1, 8, value=1, step=1, label="Household Size")
 
     equipment = gr.CheckboxGroup(
         ["Bodyweight", "Dumbbells", "Barbell", "Resistance Bands", "Machines"],
@@ -157,11 +168,17 @@ with gr.Blocks(css=CUSTOM_CSS, title="AI Fitness Planner") as app:
             age, gender, height, weight,
             activity, fitness_goal,
             dietary_preference, cultural_food,
-            budget, equipment, free_text
+            budget, equipment, free_text, household_size
         ],
         outputs=output
     )
 
+    food_query = gr.Textbox(label="🔎 Find a food", placeholder="e.g. paneer, oats, chick…")
+    food_matches = gr.JSON(label="Suggestions")
+    # Also served as the JSON endpoint /api/suggest_foods for other clients
+    food_query.change(suggest_foods, inputs=food_query, outputs=food_matches,
+                      api_name="suggest_foods")
+
 
 # ─────────────────────────────────────────────
 # Launch App
@@ -0,0 +1,310 @@
+"""batch_plans.py — Nightly plan regeneration across a process pool.
+
+Streams user records from CSV or Parquet, fans fixed-size chunks out to a
+``ProcessPoolExecutor`` (one ``ModelLoader`` per worker, loaded once in the
+initializer) and streams plans back out in input order as JSON Lines or as
+Parquet part files.  At most ``2 × workers`` chunks are in flight, so memory
+stays bounded regardless of input size.
+
+A checkpoint file is rewritten after every flushed chunk; re-running the same
+command resumes after the last completed chunk.
+
+    python batch_plans.py members.csv plans.jsonl --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from config import APP_CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+# Column defaults for optional fields (same as the app's form defaults)
+DEFAULTS = {
+    "activity_level":       "Moderately Active",
+    "fitness_goal":         "General Fitness",
+    "dietary_preference":   "Non-Vegetarian",
+    "cultural_food_habits": "Western",
+    "budget_usd_per_day":   10.0,
+    "available_equipment":  ["Bodyweight"],
+    "free_text_prefs":      "",
+    "household_size":       1,
+}
+REQUIRED = ["age", "gender", "height_cm", "weight_kg"]
+
+
+# ─── Input ────────────────────────────────────────────────────────────────────
+def iter_record_chunks(path: str, chunk_size: int, skip_rows: int = 0):
+    """Yield lists of raw record dicts; only one chunk is materialised at a time."""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise SystemExit("Parquet input needs pyarrow (pip install pyarrow)") from e
+        batches = (b.to_pylist() for b in pq.ParquetFile(path).iter_batches(batch_size=chunk_size))
+    else:
+        import pandas as pd
+        reader = pd.read_csv(path, chunksize=chunk_size, skiprows=range(1, skip_rows + 1),
+                             keep_default_na=False)
+        batches = (df.to_dict("records") for df in reader)
+        skip_rows = 0
+
+    for batch in batches:
+        if skip_rows >= len(batch):
+            skip_rows -= len(batch)
+            continue
+        yield batch[skip_rows:]
+        skip_rows = 0
+
+
+def count_rows(path: str) -> int | None:
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(path).metadata.num_rows
+        except ImportError:
+            return None
+    return None
+
+
+def normalize_record(raw: dict, id_column: str) -> tuple[str, dict]:
+    """Coerce one CSV/Parquet row into the ``user_data`` shape."""
+    missing = [c for c in REQUIRED if raw.get(c) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    rec = {k: (raw.get(k) if raw.get(k) not in (None, "") else v) for k, v in DEFAULTS.items()}
+    equipment = rec["available_equipment"]
+    if isinstance(equipment, str):
+        equipment = [e.strip() for e in equipment.split(";") if e.strip()]
+    rec.update({
+        "age":                 int(raw["age"]),
+        "gender":              str(raw["gender"]),
+        "height_cm":           float(raw["height_cm"]),
+        "weight_kg":           float(raw["weight_kg"]),
+        "budget_usd_per_day":  float(rec["budget_usd_per_day"]),
+        "household_size":      int(rec["household_size"]),
+        "available_equipment": list(equipment),
+    })
+    return str(raw.get(id_column, "")), rec
+
+
+# ─── Worker side ──────────────────────────────────────────────────────────────
+_WORKER_MODELS = None
+
+
+def _init_worker(model_dir: str):
+    global _WORKER_MODELS
+    from model_loader import ModelLoader
+    _WORKER_MODELS = ModelLoader(model_dir)
+
+
+def _run_chunk(index: int, records: list[dict], id_column: str) -> tuple[int, list[dict]]:
+    from plan_pipeline import generate_plan
+
+    out = []
+    for raw in records:
+        user_id = str(raw.get(id_column, ""))
+        try:
+            user_id, user_data = normalize_record(raw, id_column)
+            out.append({"user_id": user_id, "plan": generate_plan(_WORKER_MODELS, user_data)})
+        except Exception as e:
+            out.append({"user_id": user_id, "error": f"{type(e).__name__}: {e}"})
+    return index, out
+
+
+# ─── Output ───────────────────────────────────────────────────────────────────
+class _JsonlWriter:
+    def __init__(self, path: str, resume_bytes: int):
+        self._f = open(path, "r+b" if resume_bytes else "wb")
+        self._f.truncate(resume_bytes)
+        self._f.seek(resume_bytes)
+
+    def write(self, index: int, rows: list[dict]) -> int:
+        for row in rows:
+            self._f.write(json.dumps(row, default=float).encode() + b"\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        return self._f.tell()
+
+    def close(self):
+        self._f.close()
+
+
+class _ParquetWriter:
+    """One part file per chunk so a resumed run never rewrites finished parts."""
+
+    def __init__(self, path: str, resume_bytes: int):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)") from e
+        self._pa, self._pq = pa, pq
+        self._dir = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, index: int, rows: list[dict]) -> int:
+        plans = [r.get("plan") or {} for r in rows]
+        table = self._pa.table({
+            "user_id":            [r["user_id"] for r in rows],
+            "error":              [r.get("error") for r in rows],
+            "bmi":                [p.get("bmi") for p in plans],
+            "tdee":               [p.get("tdee") for p in plans],
+            "predicted_calories": [p.get("predicted_calories") for p in plans],
+            "plan_json":          [json.dumps(p, default=float) if p else None for p in plans],
+        })
+        self._pq.write_table(table, os.path.join(self._dir, f"part-{index:06d}.parquet"))
+        return 0
+
+    def close(self):
+        pass
+
+
+# ─── Checkpointing ────────────────────────────────────────────────────────────
+def _read_checkpoint(path: str, signature: dict) -> dict:
+    if not os.path.exists(path):
+        return {"chunks_done": 0, "rows_done": 0, "output_bytes": 0}
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("signature") != signature:
+        raise SystemExit(
+            f"Checkpoint {path} belongs to a different run; delete it or use --restart"
+        )
+    return state
+
+
+def _write_checkpoint(path: str, state: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# ─── Driver ───────────────────────────────────────────────────────────────────
+def run_batch(
+    input_path: str,
+    output_path: str,
+    workers: int | None = None,
+    chunk_size: int = 500,
+    model_dir: str = APP_CONFIG.MODEL_DIR,
+    id_column: str = "user_id",
+    checkpoint_path: str | None = None,
+    restart: bool = False,
+    report_every_s: float = 10.0,
+) -> dict:
+    """Generate plans for every record in ``input_path``; returns run statistics."""
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = checkpoint_path or f"{output_path}.ckpt"
+    signature = {"input": os.path.abspath(input_path), "output": os.path.abspath(output_path),
+                 "chunk_size": chunk_size}
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    state = _read_checkpoint(checkpoint_path, signature)
+    state["signature"] = signature
+
+    writer_cls = _ParquetWriter if output_path.endswith(".parquet") else _JsonlWriter
+    writer = writer_cls(output_path, state["output_bytes"])
+    total = count_rows(input_path)
+    if state["rows_done"]:
+        logger.info(f"Resuming after {state['rows_done']} rows ({state['chunks_done']} chunks)")
+
+    chunks = iter_record_chunks(input_path, chunk_size, skip_rows=state["rows_done"])
+    next_index = state["chunks_done"]
+    next_flush = state["chunks_done"]
+    pending, done_chunks = {}, {}
+    rows_this_run, errors = 0, 0
+    start = last_report = time.perf_counter()
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_dir,)) as pool:
+        exhausted = False
+        while True:
+            # Keep the pipeline full but bounded
+            while not exhausted and len(pending) + len(done_chunks) < 2 * workers:
+                try:
+                    records = next(chunks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                fut = pool.submit(_run_chunk, next_index, records, id_column)
+                pending[fut] = next_index
+                next_index += 1
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                index, rows = fut.result()
+                del pending[fut]
+                done_chunks[index] = rows
+
+            # Flush in input order so the checkpoint is a simple prefix
+            while next_flush in done_chunks:
+                rows = done_chunks.pop(next_flush)
+                state["output_bytes"] = writer.write(next_flush, rows)
+                state["chunks_done"] = next_flush + 1
+                state["rows_done"] += len(rows)
+                rows_this_run += len(rows)
+                errors += sum(1 for r in rows if "error" in r)
+                _write_checkpoint(checkpoint_path, state)
+                next_flush += 1
+
+            now = time.perf_counter()
+            if now - last_report >= report_every_s:
+                last_report = now
+                _report(state["rows_done"], rows_this_run, total, now - start, errors)
+
+    writer.close()
+    elapsed = time.perf_counter() - start
+    _report(state["rows_done"], rows_this_run, total, elapsed, errors)
+    return {
+        "rows":          rows_this_run,
+        "rows_total":    state["rows_done"],
+        "errors":        errors,
+        "elapsed_s":     elapsed,
+        "rows_per_s":    rows_this_run / elapsed if elapsed else 0.0,
+        "workers":       workers,
+    }
+
+
+def _report(rows_total: int, rows_run: int, total: int | None, elapsed: float, errors: int):
+    rate = rows_run / elapsed if elapsed else 0.0
+    line = f"{rows_total:,} rows · {rate:,.0f} rows/s · {errors} errors · {elapsed:,.1f}s"
+    if total:
+        remaining = max(total - rows_total, 0)
+        eta = remaining / rate if rate else float("inf")
+        line = f"{rows_total / total:6.1%} · " + line + f" · ETA {eta:,.0f}s"
+    logger.info(line)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or .parquet file of user records")
+    parser.add_argument("output", help=".jsonl file or .parquet directory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--model-dir", default=APP_CONFIG.MODEL_DIR)
+    parser.add_argument("--id-column", default="user_id")
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--report-every", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    run_batch(
+        args.input, args.output,
+        workers=args.workers, chunk_size=args.chunk_size, model_dir=args.model_dir,
+        id_column=args.id_column, checkpoint_path=args.checkpoint,
+        restart=args.restart, report_every_s=args.report_every,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,612 @@
+"""benchmarks.py — Micro-benchmarks for the planner's hot paths.
+
+Run one with ``python benchmarks.py <name> [options]``; each prints a short
+table and returns its numbers so they can be logged from CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from config import APP_CONFIG
+
+
+def _timeit(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# ─── Model loading ────────────────────────────────────────────────────────────
+def bench_model_load(model_dir: str = ".", artifact_dir: str | None = None, repeat: int = 5) -> dict:
+    """Legacy pickle load vs. artifact load (checksums on and off)."""
+    from model_loader import ModelLoader, _safe_load
+    from model_artifacts import load_model, read_manifest
+
+    artifact_dir = artifact_dir or os.path.join(model_dir, APP_CONFIG.ARTIFACT_DIR)
+    numeric = ["scaler", "kmeans", "calorie_preprocessor", "dtr"]
+
+    def legacy():
+        for key in numeric:
+            _safe_load(os.path.join(model_dir, ModelLoader.MODEL_FILES[key]))
+
+    def artifacts(verify: bool):
+        manifest = read_manifest(artifact_dir)
+        for key in numeric:
+            load_model(artifact_dir, manifest, key, verify=verify)
+
+    artifacts(True)  # fail fast on a broken directory
+    results = {
+        "pickle":              _timeit(legacy, repeat),
+        "artifact":            _timeit(lambda: artifacts(True), repeat),
+        "artifact (no check)": _timeit(lambda: artifacts(False), repeat),
+    }
+    base = statistics.median(results["pickle"])
+    print(f"{'loader':<22}{'median ms':>12}{'speed-up':>10}")
+    for name, samples in results.items():
+        med = statistics.median(samples)
+        print(f"{name:<22}{med * 1000:>12.2f}{base / med:>9.1f}×")
+    return {k: statistics.median(v) for k, v in results.items()}
+
+
+# ─── Batch plan generation ────────────────────────────────────────────────────
+def _synthetic_users_csv(path: str, n: int, seed: int = 0):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "user_id":              np.arange(n),
+        "age":                  rng.integers(16, 80, n),
+        "gender":               rng.choice(["Male", "Female"], n),
+        "height_cm":            rng.normal(170, 10, n).round(1),
+        "weight_kg":            rng.normal(72, 14, n).clip(40, 180).round(1),
+        "activity_level":       rng.choice(["Sedentary", "Lightly Active", "Moderately Active",
+                                            "Very Active", "Extremely Active"], n),
+        "fitness_goal":         rng.choice(["Weight Loss", "Muscle Gain", "Endurance",
+                                            "General Fitness", "Maintenance"], n),
+        "dietary_preference":   rng.choice(["Non-Vegetarian", "Vegetarian", "Vegan"], n),
+        "cultural_food_habits": rng.choice(["South Asian", "Western"], n),
+        "budget_usd_per_day":   rng.integers(2, 50, n),
+        "available_equipment":  rng.choice(["Bodyweight", "Dumbbells;Bodyweight", "Barbell"], n),
+    }).to_csv(path, index=False)
+
+
+def bench_batch_scaling(n_users: int = 20_000, worker_counts: list[int] | None = None,
+                        chunk_size: int = 500, model_dir: str = ".") -> dict:
+    """Throughput of batch_plans.run_batch per worker count, and scaling efficiency."""
+    from batch_plans import run_batch
+
+    cores = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "users.csv")
+        _synthetic_users_csv(src, n_users)
+        for w in worker_counts:
+            out = os.path.join(tmp, f"plans-{w}.jsonl")
+            stats = run_batch(src, out, workers=w, chunk_size=chunk_size,
+                              model_dir=model_dir, restart=True, report_every_s=1e9)
+            results[w] = stats["rows_per_s"]
+
+    base = results[worker_counts[0]] / worker_counts[0]
+    print(f"{'workers':>8}{'rows/s':>12}{'speed-up':>10}{'efficiency':>12}")
+    for w, rate in results.items():
+        print(f"{w:>8}{rate:>12,.0f}{rate / results[worker_counts[0]]:>9.2f}×{rate / (base * w):>11.0%}")
+    return results
+
+
+# ─── Calorie backends ─────────────────────────────────────────────────────────
+def bench_calorie_backends(test_csv: str | None = None, model_dir: str = ".",
+                           repeat: int = 5) -> dict:
+    """Accuracy and predictions/s of each backend through ModelLoader's serving path."""
+    import numpy as np
+    from calorie_models import BACKENDS
+    from model_loader import ModelLoader
+    from train_calorie_model import TARGET, TEST_CSV, load_dataset
+
+    df = load_dataset(os.path.join(model_dir, test_csv or TEST_CSV))
+    y = df[TARGET].to_numpy(np.float64)
+    results = {}
+    print(f"{'backend':<8}{'source':>10}{'MAE':>9}{'preds/s':>14}{'µs/row':>9}")
+    for backend in BACKENDS:
+        models = ModelLoader(model_dir, calorie_backend=backend)
+        if models.sources.get("dtr") in ("stub", "simulated"):
+            continue
+        X = models._models["calorie_preprocessor"].transform(df)
+        batch = statistics.median(_timeit(lambda: models.predict_calories_batch(X), repeat))
+        single = statistics.median(_timeit(lambda: models.predict_calories(X[:1]), 200))
+        mae = float(np.abs(models.predict_calories_batch(X) - y).mean())
+        results[backend] = {"mae": mae, "preds_per_s": len(X) / batch, "latency_us": single * 1e6}
+        print(f"{backend:<8}{models.sources['dtr']:>10}{mae:>9.1f}"
+              f"{len(X) / batch:>14,.0f}{single * 1e6:>9.1f}")
+    return results
+
+
+# ─── Plan table ───────────────────────────────────────────────────────────────
+def bench_plan_table(table_dir: str | None = None, n: int = 2000) -> dict:
+    """Live planner generation vs. plan-table lookup, µs per plan."""
+    from plan_table import PlanTable
+    from planner import DietPlanner, WorkoutPlanner
+
+    table = PlanTable(table_dir or APP_CONFIG.PLAN_TABLE_DIR)
+    w_args = ("Advanced", "Muscle Gain", ["Barbell", "Dumbbells"], [])
+    d_args = (2150.0, {}, "Vegan", "Western", 10.0, [])
+    cases = {
+        "workout live":  lambda: WorkoutPlanner.generate(*w_args),
+        "workout table": lambda: table.workout(*w_args),
+        "diet live":     lambda: DietPlanner.generate(*d_args),
+        "diet table":    lambda: table.diet(*d_args),
+    }
+    results = {}
+    print(f"{'case':<16}{'µs/plan':>10}")
+    for name, fn in cases.items():
+        results[name] = statistics.median(_timeit(fn, n)) * 1e6
+        print(f"{name:<16}{results[name]:>10.1f}")
+    return results
+
+
+# ─── Calorie burn ─────────────────────────────────────────────────────────────
+def bench_calorie_burn(n_users: int = 1_000_000, repeat: int = 5) -> dict:
+    """Vectorised MET burn over a population vs. scoring plans one by one."""
+    import numpy as np
+    from planner import BURN_ENGINE, EXERCISE_DB, WEEKLY_STRUCTURE, WorkoutPlanner
+
+    plans = [WorkoutPlanner.generate(level, goal, [tier], [])
+             for level in EXERCISE_DB for goal in WEEKLY_STRUCTURE
+             for tier in ("Barbell", "Dumbbells", "Bodyweight")]
+    distinct = BURN_ENGINE.stack_plans(plans)
+    rng = np.random.default_rng(0)
+    week_ids = distinct[rng.integers(0, len(plans), n_users)]
+    weight = rng.uniform(50, 130, n_users)
+
+    vec_s = statistics.median(_timeit(lambda: BURN_ENGINE.weekly_burn(week_ids, weight), repeat))
+    sample = min(n_users, 20_000)
+    loop_s = statistics.median(_timeit(
+        lambda: [BURN_ENGINE.plan_burn(plans[0], w) for w in weight[:sample]], 1)) * n_users / sample
+
+    results = {"users": n_users, "vectorised_s": vec_s, "per_plan_s": loop_s,
+               "users_per_s": n_users / vec_s}
+    print(f"{n_users:,} users: vectorised {vec_s:.3f}s ({results['users_per_s']:,.0f}/s), "
+          f"per-plan loop ≈ {loop_s:.1f}s (×{loop_s / vec_s:.0f})")
+    return results
+
+
+# ─── Weight projection ────────────────────────────────────────────────────────
+def bench_weight_projection(n_users: int = 100_000, weeks: int = 52, draws: int = 100) -> dict:
+    """Deterministic and Monte Carlo (``draws`` > 0) energy-balance projection."""
+    import numpy as np
+    from health_metrics import bmr_array
+    from weight_projection import EnergyBalanceModel, monte_carlo, simulate
+
+    rng = np.random.default_rng(0)
+    gender = rng.choice(["Male", "Female"], n_users)
+    height = rng.uniform(150, 195, n_users)
+    weight = rng.uniform(50, 130, n_users)
+    age = rng.integers(18, 70, n_users)
+    tdee = bmr_array(gender, weight, height, age) * rng.choice([1.2, 1.375, 1.55, 1.725], n_users)
+    model = EnergyBalanceModel(gender, height, weight, age, tdee,
+                               tdee + rng.uniform(-700, 400, n_users),
+                               weight * rng.uniform(20, 45, n_users))
+
+    start = time.perf_counter()
+    traj = simulate(model, weeks)
+    results = {"deterministic_s": time.perf_counter() - start}
+    print(f"deterministic: {n_users:,} users × {weeks} weeks in {results['deterministic_s']:.3f}s "
+          f"(median Δ {np.median(traj[-1] - traj[0]):+.1f} kg)")
+
+    if draws:
+        start = time.perf_counter()
+        pct = monte_carlo(model, weeks, draws)
+        results["monte_carlo_s"] = time.perf_counter() - start
+        print(f"monte carlo:   {n_users:,} users × {draws:,} draws × {weeks} weeks in "
+              f"{results['monte_carlo_s']:.1f}s (median p10–p90 spread "
+              f"{np.median(pct[-1, -1] - pct[-1, 0]):.1f} kg)")
+    return results
+
+
+# ─── Budget-constrained meals ─────────────────────────────────────────────────
+def bench_meal_budget(n: int = 200) -> dict:
+    """Diet generation without a budget vs. with one tight enough to re-price every day."""
+    from planner import DIET_BANKS, DietPlanner
+
+    keys = [(diet, culture) for diet in DIET_BANKS for culture in ("South Asian", "Western")]
+    cases = {}
+    for budget in (0.0, 6.0):
+        def fn():
+            return [DietPlanner.generate(2000.0, {}, d, c, budget, []) for d, c in keys]
+        cases[f"budget {budget:g}" if budget else "no budget"] = (
+            statistics.median(_timeit(fn, max(n // len(keys), 1))) / len(keys) * 1e6)
+    print(f"{'case':<14}{'µs/plan':>10}")
+    for name, us in cases.items():
+        print(f"{name:<14}{us:>10.1f}")
+    return cases
+
+
+def bench_plan_nutrients(n_plans: int = 10_000, repeat: int = 5) -> dict:
+    """Weekly-plan nutrient totals: per-meal recipe loop vs. one count-matrix multiply."""
+    import numpy as np
+    from food_store import get_store
+    from planner import RECIPE_BOOK
+    from recipes import MEAL_RECIPES, NUTRIENTS
+
+    book, store = RECIPE_BOOK, get_store()
+    rng = np.random.default_rng(0)
+    ids = rng.integers(0, len(book.meals), size=(n_plans, 7, 5))
+    named = [[[book.meals[m] for m in day] for day in plan] for plan in ids.tolist()]
+
+    def loop():
+        out = []
+        for plan in named:
+            total = [0.0] * len(NUTRIENTS)
+            for day in plan:
+                for meal in day:
+                    for key, amount, unit in MEAL_RECIPES[meal]:
+                        j = book.ingredient_index[key]
+                        grams = amount * book.unit_grams(j, unit, store)
+                        for k in range(len(NUTRIENTS)):
+                            total[k] += grams * book.per_gram[j, k]
+            out.append(total)
+        return out
+
+    def matrix():
+        return book.nutrients(book.counts(ids))
+
+    assert np.allclose(loop()[:50], matrix()[:50])
+    cases = {"python loop": statistics.median(_timeit(loop, 1)),
+             "matrix":      statistics.median(_timeit(matrix, repeat))}
+    base = cases["python loop"]
+    print(f"{'path':<14}{'ms / ' + format(n_plans, ','):>14}{'speed-up':>10}")
+    for name, sec in cases.items():
+        print(f"{name:<14}{sec * 1000:>14.2f}{base / sec:>9.0f}×")
+    return cases
+
+
+def bench_plan_energy(n_plans: int = 10_000, repeat: int = 20) -> dict:
+    """Weekly kcal totals: summing per-meal dicts vs. one dot product over counts."""
+    import numpy as np
+    from planner import RECIPE_BOOK
+
+    book = RECIPE_BOOK
+    rng = np.random.default_rng(0)
+    ids = rng.integers(0, len(book.meals), size=(n_plans, 7, 5))
+    kcal = dict(zip(book.meals, book.meal_energy.tolist()))
+    named = [[book.meals[m] for m in plan.ravel()] for plan in ids]
+    counts = book.counts(ids)
+
+    cases = {
+        "python sum":  statistics.median(_timeit(lambda: [sum(kcal[m] for m in plan) for plan in named], 3)),
+        "counts + dot": statistics.median(_timeit(lambda: book.energy(book.counts(ids)), repeat)),
+        "dot only":    statistics.median(_timeit(lambda: book.energy(counts), repeat)),
+    }
+    base = cases["python sum"]
+    print(f"{'path':<14}{'ms / ' + format(n_plans, ','):>14}{'speed-up':>10}")
+    for name, sec in cases.items():
+        print(f"{name:<14}{sec * 1000:>14.3f}{base / sec:>9.0f}×")
+    return cases
+
+
+def bench_grocery(n_households: int = 10_000, members: int = 3, repeat: int = 5) -> dict:
+    """Grocery totals: per-meal recipe dict accumulation vs. grouped bincount + multiply."""
+    import numpy as np
+    from grocery import GROCERY_TABLE, grocery_list
+    from planner import DietPlanner, RECIPE_BOOK
+    from recipes import MEAL_RECIPES
+
+    book, table = RECIPE_BOOK, GROCERY_TABLE
+    rng = np.random.default_rng(0)
+    ids = rng.integers(0, len(book.meals), size=(n_households * members, 7, 5))
+    household = np.repeat(np.arange(n_households), members)
+    named = [[book.meals[m] for m in plan.ravel()] for plan in ids]
+
+    def loop():
+        totals = [dict() for _ in range(n_households)]
+        for h, plan in zip(household.tolist(), named):
+            for meal in plan:
+                for key, amount, unit in MEAL_RECIPES[meal]:
+                    j = book.ingredient_index[key]
+                    totals[h][key] = totals[h].get(key, 0.0) + amount * book.unit_grams(j, unit)
+        return totals
+
+    def matrix():
+        return table.purchase(table.household_grams(ids, household))
+
+    week = DietPlanner.generate(2000.0, {}, "Vegetarian", "South Asian", 0.0, [])["weekly_plan"]
+    cases = {"python loop": statistics.median(_timeit(loop, 1)),
+             "matrix":      statistics.median(_timeit(matrix, repeat))}
+    base = cases["python loop"]
+    print(f"{'path':<14}{'ms / ' + format(n_households, ',') + ' homes':>20}{'speed-up':>10}")
+    for name, sec in cases.items():
+        print(f"{name:<14}{sec * 1000:>20.2f}{base / sec:>9.0f}×")
+    cases["single list"] = statistics.median(_timeit(lambda: grocery_list(week, 4), 200))
+    print(f"one plan → shopping list: {cases['single list'] * 1e6:.0f} µs")
+    return cases
+
+
+def bench_food_search(n: int = 100_000, queries: int = 500) -> dict:
+    """Suggestion latency over ``n`` synthetic FDC-style descriptions vs. a linear scan."""
+    import numpy as np
+    from food_search import FoodSearch, compile_index, fold
+
+    rng = np.random.default_rng(0)
+    words = ["chicken", "breast", "roasted", "raw", "rice", "brown", "paneer", "tikka", "cheese",
+             "cheddar", "milk", "whole", "oats", "rolled", "lentils", "boiled", "salmon", "atlantic",
+             "yogurt", "greek", "plain", "spinach", "frozen", "bread", "wheat", "beans", "black",
+             "canned", "apple", "juice", "almonds", "dry", "egg", "fried", "tofu", "firm"]
+    texts = [", ".join(rng.choice(words, size=rng.integers(2, 6), replace=False)).capitalize()
+             + f" {i}" for i in range(n)]
+    start = time.perf_counter()
+    search = FoodSearch(*compile_index([(t, "fdc", i) for i, t in enumerate(texts)]))
+    build_s = time.perf_counter() - start
+
+    typed = [w[:rng.integers(3, len(w) + 1)] for w in rng.choice(words, size=queries)]
+    typed = [q[:-1] + "x" if i % 4 == 0 else q for i, q in enumerate(typed)]   # some typos
+    latencies = np.array([_timeit(lambda q=q: search.search(q, 10), 1)[0] for q in typed])
+    folded = [fold(t) for t in texts]
+    scan = statistics.median(_timeit(lambda: [t for t in folded if typed[0] in t][:10], 5))
+
+    cases = {"build_s": build_s, "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+             "p99_ms": float(np.percentile(latencies, 99)) * 1000, "scan_ms": scan * 1000}
+    print(f"index of {n:,} foods built in {build_s:.1f} s")
+    print(f"{'query':<18}{'p50 ms':>10}{'p99 ms':>10}")
+    print(f"{'trigram + trie':<18}{cases['p50_ms']:>10.3f}{cases['p99_ms']:>10.3f}")
+    print(f"{'substring scan':<18}{cases['scan_ms']:>10.3f}{'':>10}")
+    return cases
+
+
+def bench_meal_bank(n: int = 20_000, draws: int = 10_000) -> dict:
+    """Dish draws per (cuisine, diet, course): scanning a record list vs. the CSR bank."""
+    import random
+    import numpy as np
+    from meal_bank import COURSES, CUISINES, DIETS, MealBank
+
+    rng = np.random.default_rng(0)
+    dishes = [{"item": f"Dish {i}", "cuisine": CUISINES[rng.integers(len(CUISINES))],
+               "diet": DIETS[rng.integers(len(DIETS))], "course": COURSES[rng.integers(len(COURSES))],
+               "minutes": float(rng.integers(5, 120)), "region": None, "mask": int(rng.integers(0, 4))}
+              for i in range(n)]
+    start = time.perf_counter()
+    bank = MealBank(dishes)
+    build_s = time.perf_counter() - start
+    keys = [(c, d, k) for c, d, k in bank.keys]
+    picks = [keys[i] for i in rng.integers(len(keys), size=draws)]
+    pick_rng = random.Random(0)
+
+    def scan():
+        for c, d, k in picks[:draws // 100]:
+            match = [x for x in dishes if x["cuisine"] == c and x["diet"] == d and x["course"] == k]
+            pick_rng.choice(match)
+
+    def draw():
+        for c, d, k in picks:
+            bank.draw(c, "Non-Vegetarian", k, pick_rng, forbidden=1, max_minutes=60)
+
+    def draw_plain():
+        for c, d, k in picks:
+            bank.draw(c, d, k, pick_rng)
+
+    cases = {"list scan":     statistics.median(_timeit(scan, 3)) / (draws // 100) * 1e6,
+             "bank filtered": statistics.median(_timeit(draw, 5)) / draws * 1e6,
+             "bank plain":    statistics.median(_timeit(draw_plain, 5)) / draws * 1e6}
+    print(f"bank of {n:,} dishes built in {build_s * 1000:.0f} ms")
+    print(f"{'path':<16}{'µs / draw':>12}")
+    for name, us in cases.items():
+        print(f"{name:<16}{us:>12.2f}")
+    return cases
+
+
+def bench_exercise_search(n: int = 3_000, dim: int = 384, queries: int = 500) -> dict:
+    """Filtered top-k over an exercise embedding matrix: metadata mask + argpartition vs. a full sort."""
+    import numpy as np
+    from exercise_index import COLUMNS, INDEX_VERSION, ExerciseIndex
+
+    rng = np.random.default_rng(0)
+    emb = rng.standard_normal((n, dim)).astype(np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    vocab = {"level": ["Beginner", "Expert", "Intermediate"], "equipment": ["Body Only", "Dumbbell", "Machine"],
+             "body_part": ["Chest", "Glutes", "Quadriceps"], "type": ["Strength"]}
+    arrays = {"embeddings": emb, "planner_embeddings": emb[:50], "met": np.full(n, 5.0, np.float32),
+              **{c: rng.integers(len(vocab[c]), size=n).astype(np.int8) for c in COLUMNS}}
+    index = ExerciseIndex(arrays, {"version": INDEX_VERSION, "encoder": "synthetic", "dim": dim, "vocab": vocab,
+                                   "titles": [f"Exercise {i}" for i in range(n)], "planner_names": []})
+    qs = rng.standard_normal((queries, dim)).astype(np.float32)
+
+    lat = []
+    for q in qs:
+        start = time.perf_counter()
+        index.search(q, 10, levels=["Beginner", "Intermediate"], equipment=["Dumbbell"], body_parts=["Glutes"])
+        lat.append(time.perf_counter() - start)
+
+    def full_sort():
+        for q in qs[:50]:
+            np.argsort(-(emb @ q))[:10]
+
+    cases = {"filtered top-k p50": float(np.percentile(lat, 50)) * 1e3,
+             "filtered top-k p99": float(np.percentile(lat, 99)) * 1e3,
+             "unfiltered full sort": statistics.median(_timeit(full_sort, 3)) / 50 * 1e3}
+    print(f"{n:,} exercises × {dim}-d embeddings")
+    print(f"{'path':<22}{'ms / query':>12}")
+    for name, ms in cases.items():
+        print(f"{name:<22}{ms:>12.3f}")
+    return cases
+
+
+def bench_workout_scheduler(repeat: int = 5) -> dict:
+    """Week solves for every (level, goal, equipment subset): cold bitset solve, memoised hit, focus fit."""
+    import numpy as np
+    from exercise_scheduler import (
+        EQUIPMENT, FOCUS_MUSCLES, ExerciseScheduler, equipment_names, muscle_bits, _FOCUS_BITS,
+    )
+    from planner import EXERCISE_DB, WEEKLY_STRUCTURE
+
+    keys = [(lvl, goal, equipment_names(m), WEEKLY_STRUCTURE[goal])
+            for lvl in EXERCISE_DB for goal in WEEKLY_STRUCTURE for m in range(1 << len(EQUIPMENT))]
+    cold = []
+    for _ in range(repeat):
+        scheduler = ExerciseScheduler(EXERCISE_DB)
+        for key in keys:
+            start = time.perf_counter()
+            scheduler.week(*key)
+            cold.append(time.perf_counter() - start)
+    warm = statistics.median(_timeit(lambda: [scheduler.week(*key) for key in keys], repeat)) / len(keys)
+
+    on_focus = total = 0
+    for key in keys:
+        for focus, day in zip(key[3], scheduler.week(*key)):
+            if focus in FOCUS_MUSCLES:
+                on_focus += sum(bool(muscle_bits(ex.muscle) & _FOCUS_BITS[focus]) for ex in day)
+                total += len(day)
+
+    cases = {"cold p50 µs": float(np.percentile(cold, 50)) * 1e6,
+             "cold p99 µs": float(np.percentile(cold, 99)) * 1e6,
+             "memoised µs": warm * 1e6,
+             "on-focus %":  100 * on_focus / total}
+    print(f"{len(keys)} (level, goal, equipment) weeks")
+    for name, value in cases.items():
+        print(f"{name:<14}{value:>10.1f}")
+    return cases
+
+
+def bench_plan_records(n: int = 2_000) -> dict:
+    """
+    Holding ``n`` distinct plans: nested dicts vs. frozen slotted records
+    (bytes per plan, build and to_dict µs).  Each size is traced from cold
+    caches (interners, scheduler weeks, session minutes) and adds the leaf
+    records pinned at import, so shared state is charged to the plans.
+    """
+    import gc
+    import json
+    import sys
+    import tracemalloc
+    import plan_records
+    import planner
+    from planner import EXERCISE_DB, EXERCISE_SCHEDULER, WEEKLY_STRUCTURE, DietPlanner, WorkoutPlanner
+
+    equipment = [["Bodyweight"], ["Dumbbells", "Bodyweight"], ["Barbell", "Dumbbells"], ["Resistance Bands"]]
+    workouts = [(lvl, goal, eq) for lvl in EXERCISE_DB for goal in WEEKLY_STRUCTURE for eq in equipment]
+    diets = [(p, c) for p in ["Vegetarian", "Vegan", "Non-Vegetarian", "Keto"]
+             for c in ["South Asian", "Western", "Middle Eastern", "East Asian"]]
+    # Distinct plans: a per-plan note / calorie target on top of the cycled keys
+    workout_args = [(*workouts[i % len(workouts)], [f"Note {i}"]) for i in range(n)]
+    diet_args = [(1500.0 + 0.5 * i, {"protein_pct": 30}, *diets[i % len(diets)], 0.0, [])
+                 for i in range(n)]
+
+    # Leaf records the planner holds from import; the caches below refill on demand
+    pinned = {"workout": {id(ex): ex for pool in EXERCISE_SCHEDULER._pools.values() for ex in pool.exercises},
+              "diet":    {id(food): food for food in planner._FOOD_RECORDS}}
+
+    def cold():
+        plan_records._EXERCISES.clear()
+        plan_records._FOODS.clear()
+        EXERCISE_SCHEDULER._weeks.clear()
+        planner._SESSION_MINUTES.clear()
+        gc.collect()
+
+    def held_bytes(kind, fn, args) -> float:
+        cold()
+        tracemalloc.start()
+        plans = [fn(*a) for a in args]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del plans
+        return (size + sum(map(sys.getsizeof, pinned[kind].values()))) / len(args)
+
+    def per_plan_us(fn, args) -> float:
+        def run():
+            cold()
+            [fn(*a) for a in args]
+        return statistics.median(_timeit(run, 5)) / len(args) * 1e6
+
+    cases = {}
+    for kind, planner_cls, args in (("workout", WorkoutPlanner, workout_args), ("diet", DietPlanner, diet_args)):
+        cases[kind] = {
+            "dict bytes":    held_bytes(kind, planner_cls.generate, args),
+            "record bytes":  held_bytes(kind, planner_cls.plan, args),
+            "record µs":     per_plan_us(planner_cls.plan, args),
+        }
+        records = [planner_cls.plan(*a) for a in args]
+        cases[kind]["to_dict µs"] = statistics.median(
+            _timeit(lambda: [r.to_dict() for r in records], 5)) / len(records) * 1e6
+        cases[kind]["json µs"] = statistics.median(
+            _timeit(lambda: [json.dumps(r.to_dict()) for r in records], 5)) / len(records) * 1e6
+    print(f"{n:,} distinct plans per kind, from cold caches")
+    print(f"{'plan':<9}" + "".join(f"{k:>14}" for k in cases["workout"]))
+    for kind, row in cases.items():
+        print(f"{kind:<9}" + "".join(f"{v:>14.1f}" for v in row.values()))
+    return cases
+
+
+BENCHMARKS = {
+    "model_load":       bench_model_load,
+    "batch_scaling":    bench_batch_scaling,
+    "calorie_backends": bench_calorie_backends,
+    "plan_table":       bench_plan_table,
+    "calorie_burn":     bench_calorie_burn,
+    "weight_projection": bench_weight_projection,
+    "meal_budget":      bench_meal_budget,
+    "plan_nutrients":   bench_plan_nutrients,
+    "plan_energy":      bench_plan_energy,
+    "grocery":          bench_grocery,
+    "food_search":      bench_food_search,
+    "meal_bank":        bench_meal_bank,
+    "exercise_search":  bench_exercise_search,
+    "workout_scheduler": bench_workout_scheduler,
+    "plan_records":     bench_plan_records,
+}
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--model-dir", default=".")
+    parser.add_argument("--repeat", type=int, default=5)
+    # Unset sizes keep each benchmark's own default
+    parser.add_argument("--users", type=int, default=None)
+    parser.add_argument("--workers", type=int, nargs="*", default=None)
+    parser.add_argument("--weeks", type=int, default=None)
+    parser.add_argument("--draws", type=int, default=None, help="Monte Carlo draws per user (0 = off)")
+    args = parser.parse_args(argv)
+    users = {"n_users": args.users} if args.users is not None else {}
+    horizon = {k: v for k, v in (("weeks", args.weeks), ("draws", args.draws)) if v is not None}
+
+    if args.name == "model_load":
+        bench_model_load(args.model_dir, repeat=args.repeat)
+    elif args.name == "batch_scaling":
+        bench_batch_scaling(worker_counts=args.workers, model_dir=args.model_dir, **users)
+    elif args.name == "calorie_backends":
+        bench_calorie_backends(model_dir=args.model_dir, repeat=args.repeat)
+    elif args.name == "plan_table":
+        bench_plan_table()
+    elif args.name == "calorie_burn":
+        bench_calorie_burn(repeat=args.repeat, **users)
+    elif args.name == "weight_projection":
+        bench_weight_projection(**users, **horizon)
+    elif args.name == "meal_budget":
+        bench_meal_budget()
+    elif args.name == "plan_nutrients":
+        bench_plan_nutrients(repeat=args.repeat)
+    elif args.name == "plan_energy":
+        bench_plan_energy()
+    elif args.name == "grocery":
+        bench_grocery(repeat=args.repeat)
+    elif args.name == "food_search":
+        bench_food_search()
+    elif args.name == "meal_bank":
+        bench_meal_bank()
+    elif args.name == "exercise_search":
+        bench_exercise_search()
+    elif args.name == "workout_scheduler":
+        bench_workout_scheduler()
+    elif args.name == "plan_records":
+        bench_plan_records()
+
+
+if __name__ == "__main__":
+    main()
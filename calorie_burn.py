@@ -0,0 +1,142 @@
+"""calorie_burn.py — Per-exercise MET calorie burn, vectorised over plans and users.
+
+Every exercise gets a MET value (Compendium of Physical Activities bands):
+planner exercises by name pattern, ``megaGymDataset.csv`` exercises by their
+``Type`` column.  Burn for one exercise is
+
+    kcal = weight_kg × (MET × work_h + REST_MET × rest_h)
+
+with work / rest time taken from ``ExerciseCatalog`` (time under tension,
+inter-set rest and transitions), plus ``WARMUP_MET`` for the warm-up of every
+session that has exercises.  Since everything except body weight depends on
+the exercise only, it is precomputed per id as kcal/kg and a whole population
+of ``(n_users, 7, n)`` id arrays is scored with one gather and one multiply.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import numpy as np
+
+from exercise_catalog import TIMING, ExerciseCatalog
+
+
+logger = logging.getLogger(__name__)
+
+MEGAGYM_CSV = "datasets/megaGymDataset.csv"
+
+REST_MET    = 1.5   # standing between sets
+WARMUP_MET  = 3.5   # light calisthenics / mobility
+DEFAULT_MET = 5.0   # general resistance training
+
+# First match wins — most specific patterns first
+MET_RULES = [
+    (r"double unders|jump rope",                                12.3),  # rope jumping, fast
+    (r"burpee|tabata|jumping jacks|mountain climbers|box jumps"
+     r"|jump squats|plyometric|bear crawl",                     8.0),   # vigorous calisthenics
+    (r"muscle-up|handstand|hspu|planche|front lever|dragon flag"
+     r"|pistol|weighted pull-up",                               6.0),   # advanced calisthenics
+    (r"plank|l-sit|hold",                                       3.8),   # isometric holds
+    (r"curl|raise|kickback|shrug|skull crusher|extension|fly",  3.5),   # isolation, light-moderate
+    (r"push-up|pull-up|dips|inverted row|v-up|glute bridge"
+     r"|bodyweight squat|split squat",                          3.8),   # moderate calisthenics
+    (r"\(heavy\)|competition|deadlift|squat|clean|snatch"
+     r"|bench|press|row|lunge|thrust",                          6.0),   # vigorous free weights
+]
+_MET_RULES = [(re.compile(p, re.IGNORECASE), met) for p, met in MET_RULES]
+
+# megaGymDataset.csv ``Type`` → MET
+GYM_TYPE_METS = {
+    "strength":              5.0,
+    "powerlifting":          6.0,
+    "olympic weightlifting": 6.0,
+    "strongman":             6.0,
+    "plyometrics":           8.0,
+    "cardio":                7.0,
+    "stretching":            2.3,
+}
+GYM_DEFAULT_SETS = "3×10"    # the dataset carries no prescription
+
+
+def exercise_met(name: str) -> float:
+    for pattern, met in _MET_RULES:
+        if pattern.search(name):
+            return met
+    return DEFAULT_MET
+
+
+# ─── megaGym dataset ──────────────────────────────────────────────────────────
+def load_gym_exercises(path: str = MEGAGYM_CSV) -> list[dict]:
+    """
+    ``{"name", "muscle", "sets", "met"}`` per distinct megaGym title, or ``[]``
+    when the CSV is missing / not pulled from LFS.
+    """
+    import pandas as pd
+
+    try:
+        df = pd.read_csv(path, usecols=["Title", "Type", "BodyPart"], dtype="string")
+    except (FileNotFoundError, ValueError) as exc:
+        logger.warning(f"⚠️ megaGym exercises unavailable ({path}): {exc}")
+        return []
+
+    df = df.dropna(subset=["Title"]).drop_duplicates(subset=["Title"])
+    kind = df["Type"].fillna("").str.strip().str.lower()
+    met = kind.map(GYM_TYPE_METS).astype("float64").fillna(DEFAULT_MET)
+    return [
+        {"name": title.strip(), "muscle": part if isinstance(part, str) else "",
+         "sets": GYM_DEFAULT_SETS, "met": float(m)}
+        for title, part, m in zip(df["Title"], df["BodyPart"], met)
+    ]
+
+
+# ─── Engine ───────────────────────────────────────────────────────────────────
+class BurnEngine:
+    """
+    MET and kcal/kg per catalog id.  Planner exercises keep their
+    ``ExerciseCatalog`` ids; megaGym exercises (``gym_csv``, or records
+    already loaded as ``gym``) are appended.
+    """
+
+    def __init__(self, exercise_db: dict, gym_csv: str | None = None, gym: list[dict] | None = None):
+        if gym is None:
+            gym = load_gym_exercises(gym_csv) if gym_csv else []
+        self.catalog = ExerciseCatalog(exercise_db, extra=gym)
+
+        gym_met = {(ex["name"], ex["sets"]): ex["met"] for ex in gym}
+        self.met = np.array([
+            exercise_met(r["name"]) if i < self.catalog.n_planner
+            else gym_met.get((r["name"], GYM_DEFAULT_SETS), DEFAULT_MET)
+            for i, r in enumerate(self.catalog.records)
+        ])
+        self.kcal_per_kg = (self.met * self.catalog.tut_s + REST_MET * self.catalog.rest_s) / 3600
+        self.warmup_kcal_per_kg = WARMUP_MET * TIMING["warmup_min"] / 60
+
+    def met_of(self, name: str) -> float:
+        """MET of a catalog exercise by name (first prescription found)."""
+        for (ex_name, _), idx in self.catalog.index.items():
+            if ex_name == name:
+                return float(self.met[idx])
+        return exercise_met(name)
+
+    # ── Vectorised over (…, n) id arrays ──────────────────────────────────────
+
+    def session_kcal_per_kg(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids)
+        work = self.catalog._gather(self.kcal_per_kg, ids).sum(axis=-1)
+        return np.where((ids >= 0).any(axis=-1), work + self.warmup_kcal_per_kg, 0.0)
+
+    def daily_burn(self, week_ids: np.ndarray, weight_kg) -> np.ndarray:
+        """(…, 7) kcal per day for (…, 7, n) ids and (…) body weights."""
+        return self.session_kcal_per_kg(week_ids) * np.asarray(weight_kg, dtype=np.float64)[..., None]
+
+    def weekly_burn(self, week_ids: np.ndarray, weight_kg) -> np.ndarray:
+        """(…) weekly kcal for (…, 7, n) ids — one plan or a whole population."""
+        return self.session_kcal_per_kg(week_ids).sum(axis=-1) * np.asarray(weight_kg, dtype=np.float64)
+
+    def stack_plans(self, plans: list[list[dict]], width: int = 6) -> np.ndarray:
+        """(n_plans, 7, width) ids from ``WorkoutPlanner.generate`` weeks."""
+        return np.stack([self.catalog.plan_ids(plan, width) for plan in plans])
+
+    def plan_burn(self, plan: list[dict], weight_kg: float) -> float:
+        return float(self.weekly_burn(self.catalog.plan_ids(plan), weight_kg))
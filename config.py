@@ -8,6 +8,19 @@ class _AppConfig:
     APP_NAME: str = "AI Fitness Planner"
     VERSION: str = "1.0.0"
     MODEL_DIR: str = "."
+    ARTIFACT_DIR: str = "models/artifacts"
+    CALORIE_BACKEND: str = "dtr"  # dtr | hgb | ridge — see calorie_models.py
+    PLAN_TABLE_DIR: str = "models/plan_table"
+    FOOD_STORE_DIR: str = "models/food_store"  # compiled FoodData Central nutrients / prices
+    FOOD_SEARCH_DIR: str = "models/food_search"  # trigram + prefix index for food suggestions
+    EXERCISE_INDEX_DIR: str = "models/exercise_index"  # embedded megaGym exercises for swaps
+    EXERCISE_SWAP_SIMILARITY: float = 0.35  # exercise ↔ injury-text cosine that triggers a swap
+    PREFERENCE_AUDIT_RATE: float = 0.02  # share of keyword hits re-checked by the encoder (0 = no agreement stat)
+    REQUEST_DEADLINE_S: float = 2.0     # per-request budget for compute_plan
+    MAX_CONCURRENT_PLANS: int = 4       # admission control: plans computed at once
+    MAX_QUEUED_PLANS: int = 16          # … and waiting; beyond this requests are shed
+    MODEL_WATCH_INTERVAL_S: float = 30.0  # poll model files for hot reload (0 = off)
+    SIMULATION_PROFILE: str = ""        # latency_profile.json → stubs mimic real latency / memory
 
 
 @dataclass
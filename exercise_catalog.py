@@ -0,0 +1,144 @@
+"""exercise_catalog.py — EXERCISE_DB compiled into numeric set/rep/duration arrays.
+
+The planner stores prescriptions as display strings (``"3×30s"``,
+``"4×8/leg"``, ``"4×max"``).  At import they are parsed once into parallel
+arrays indexed by exercise id, so volume, time-under-tension and session
+length are plain NumPy gathers over ``(…, n_exercises)`` index arrays — one
+week, or a whole population of weeks, in one call.  ``-1`` marks padding.
+"""
+
+from __future__ import annotations
+
+import re
+import numpy as np
+
+
+# ─── Timing assumptions ───────────────────────────────────────────────────────
+TIMING = {
+    "seconds_per_rep":     3.0,   # 1-0-2 tempo
+    "amrap_reps":          8,     # planning estimate for "max" sets
+    "meters_per_second":   1.0,   # crawls / carries
+    "rest_heavy_s":        150,   # ≤ 5 reps
+    "rest_hypertrophy_s":  90,    # 6–12 reps
+    "rest_endurance_s":    60,    # > 12 reps
+    "rest_timed_s":        30,    # timed / distance sets
+    "transition_s":        60,    # setup between exercises
+    "warmup_min":          10,
+}
+
+_SETS_RE = re.compile(r"^(\d+)×(\d+|max)(s|min|m)?(/leg)?$")
+
+
+def parse_sets(text: str) -> dict:
+    """``"4×8/leg"`` → ``{"sets": 4, "reps": 8, "seconds": 0.0, "per_side": True, …}``."""
+    m = _SETS_RE.match(text.strip())
+    if not m:
+        raise ValueError(f"Unrecognised set prescription {text!r}")
+    sets, amount, unit, per_leg = m.groups()
+    amrap = amount == "max"
+    value = TIMING["amrap_reps"] if amrap else int(amount)
+    reps, seconds = 0, 0.0
+    if unit == "s":
+        seconds = float(value)
+    elif unit == "min":
+        seconds = value * 60.0
+    elif unit == "m":
+        seconds = value / TIMING["meters_per_second"]
+    else:
+        reps = value
+    return {"sets": int(sets), "reps": reps, "seconds": seconds,
+            "per_side": per_leg is not None, "amrap": amrap}
+
+
+class ExerciseCatalog:
+    """
+    Every distinct (name, sets) prescription in EXERCISE_DB, as arrays.
+    ``extra`` appends more ``{"name", "muscle", "sets"}`` records after the
+    planner's own, so ids of EXERCISE_DB entries never move.
+    """
+
+    def __init__(self, exercise_db: dict, extra: list[dict] = ()):
+        records, self.index = [], {}
+        planner_exercises = [ex for level_db in exercise_db.values()
+                             for goal_db in level_db.values()
+                             for exercises in goal_db.values()
+                             for ex in exercises]
+        for i, ex in enumerate([*planner_exercises, *extra]):
+            if i == len(planner_exercises):
+                self.n_planner = len(records)
+            key = (ex["name"], ex["sets"])
+            if key not in self.index:
+                self.index[key] = len(records)
+                records.append({"name": ex["name"], "muscle": ex["muscle"],
+                                **parse_sets(ex["sets"])})
+        self.records = records
+        if not extra:
+            self.n_planner = len(records)
+
+        def col(key, dtype):
+            return np.array([r[key] for r in records], dtype=dtype)
+
+        self.sets     = col("sets", np.float64)
+        self.reps     = col("reps", np.float64)
+        self.seconds  = col("seconds", np.float64)
+        self.per_side = col("per_side", bool)
+        self.amrap    = col("amrap", bool)
+
+        sides = np.where(self.per_side, 2.0, 1.0)
+        timed = self.reps == 0
+        rest  = np.select(
+            [timed, self.reps <= 5, self.reps <= 12],
+            [TIMING["rest_timed_s"], TIMING["rest_heavy_s"], TIMING["rest_hypertrophy_s"]],
+            TIMING["rest_endurance_s"],
+        )
+        set_work_s       = np.where(timed, self.seconds, self.reps * TIMING["seconds_per_rep"]) * sides
+        self.total_reps  = self.sets * self.reps * sides
+        self.tut_s       = self.sets * set_work_s
+        self.rest_s      = (self.sets - 1) * rest + TIMING["transition_s"]
+        self.exercise_s  = self.tut_s + self.rest_s
+
+    # ── Lookups ───────────────────────────────────────────────────────────────
+
+    def ids(self, exercises: list[dict]) -> list[int]:
+        return [self.index[(ex["name"], ex["sets"])] for ex in exercises]
+
+    def plan_ids(self, plan: list[dict], width: int = 6) -> np.ndarray:
+        """(n_days, width) id matrix for a ``WorkoutPlanner.generate`` week, -1 padded."""
+        out = np.full((len(plan), width), -1, dtype=np.int32)
+        for d, day in enumerate(plan):
+            ids = self.ids(day["exercises"])[:width]
+            out[d, :len(ids)] = ids
+        return out
+
+    # ── Vectorised metrics over (…, n) id arrays ──────────────────────────────
+
+    def _gather(self, values: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids)
+        return np.where(ids >= 0, values[np.maximum(ids, 0)], 0.0)
+
+    def session_minutes(self, ids: np.ndarray) -> np.ndarray:
+        """Warm-up + work + rest + transitions; 0 for sessions with no exercises."""
+        ids = np.asarray(ids)
+        work = self._gather(self.exercise_s, ids).sum(axis=-1) / 60
+        return np.where((ids >= 0).any(axis=-1), work + TIMING["warmup_min"], 0.0)
+
+    def volume_reps(self, ids: np.ndarray) -> np.ndarray:
+        return self._gather(self.total_reps, ids).sum(axis=-1)
+
+    def tut_minutes(self, ids: np.ndarray) -> np.ndarray:
+        return self._gather(self.tut_s, ids).sum(axis=-1) / 60
+
+    def weekly_load(self, week_ids: np.ndarray) -> dict:
+        """Weekly totals for one (7, n) week or a (n_plans, 7, n) population."""
+        return {
+            "volume_reps":  self.volume_reps(week_ids).sum(axis=-1),
+            "tut_min":      self.tut_minutes(week_ids).sum(axis=-1),
+            "duration_min": self.session_minutes(week_ids).sum(axis=-1),
+        }
+
+    def estimate_session_minutes(self, exercises: list[dict]) -> int:
+        """Session length for one day's exercises, rounded to 5 minutes."""
+        if not exercises:
+            return 0
+        minutes = float(self.session_minutes(np.array(self.ids(exercises))))
+        return int(5 * round(minutes / 5))
@@ -0,0 +1,312 @@
+"""exercise_index.py — megaGym exercises embedded offline for filtered semantic search.
+
+``megaGymDataset.csv`` (a few thousand exercises with description, body part,
+equipment, type and level) is embedded once with ``ModelLoader``'s sentence
+transformer into an L2-normalised ``float32`` matrix, saved next to ``int8``
+metadata codes and memory-mapped at load.  A search masks rows by level /
+equipment / body part over the codes, scores the survivors with one
+matrix-vector product and takes the top ``k`` by ``argpartition``.
+
+The planner's own exercises are embedded at build time too, so
+``WorkoutPlanner.swap_exercises`` can judge a week against a user's injury
+text ("knee pain, no jumping") with one encoder call and swap risky
+exercises for the nearest safe megaGym ones.  The manifest records the
+encoder's checksum, and an index built by another encoder version (e.g.
+before a model hot swap) is not searched.
+
+    python exercise_index.py build                      # writes models/exercise_index
+    python exercise_index.py query "knee friendly leg exercise" --equipment Dumbbells
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import numpy as np
+
+from calorie_burn import DEFAULT_MET, GYM_DEFAULT_SETS, GYM_TYPE_METS, MEGAGYM_CSV
+from config import APP_CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+MANIFEST_FILE = "exercise_index.json"
+
+# Metadata column → megaGymDataset.csv column, stored as int8 codes into a vocabulary
+COLUMNS = {"level": "Level", "equipment": "Equipment", "body_part": "BodyPart", "type": "Type"}
+
+# Planner fitness level → megaGym levels it may be given
+PLANNER_LEVELS = {
+    "Beginner":     ["Beginner"],
+    "Intermediate": ["Beginner", "Intermediate"],
+    "Advanced":     ["Beginner", "Intermediate", "Expert"],
+    "Elite":        ["Beginner", "Intermediate", "Expert"],
+}
+
+# App equipment choice → megaGym ``Equipment`` values
+EQUIPMENT_NAMES = {
+    "Bodyweight":       ["Body Only"],
+    "Dumbbells":        ["Dumbbell"],
+    "Barbell":          ["Barbell", "E-Z Curl Bar"],
+    "Resistance Bands": ["Bands"],
+    "Machines":         ["Machine", "Cable"],
+}
+
+# Planner muscle label part (lower case) → megaGym ``BodyPart`` values; unlisted parts don't filter
+MUSCLE_BODY_PARTS = {
+    "quads":           ["Quadriceps"],
+    "glutes":          ["Glutes"],
+    "hamstrings":      ["Hamstrings"],
+    "posterior chain": ["Hamstrings", "Glutes", "Lower Back"],
+    "calves":          ["Calves"],
+    "legs":            ["Quadriceps", "Hamstrings", "Glutes", "Calves"],
+    "chest":           ["Chest"],
+    "triceps":         ["Triceps"],
+    "biceps":          ["Biceps"],
+    "shoulders":       ["Shoulders"],
+    "back":            ["Lats", "Middle Back", "Lower Back"],
+    "lats":            ["Lats"],
+    "traps":           ["Traps"],
+    "core":            ["Abdominals"],
+    "abs":             ["Abdominals"],
+    "forearms":        ["Forearms"],
+}
+
+# Free text worth checking the week against (the encoder is not called otherwise)
+INJURY_PATTERN = re.compile(
+    r"pain|injur|hurt|sore|sprain|strain|surgery|arthritis|tendin|torn|\bbad (?:knee|back|shoulder|wrist)"
+    r"|avoid|can'?t|cannot|no (?:jump|running|squat|lunge|overhead)",
+    re.IGNORECASE,
+)
+
+
+def mentions_injury(text: str) -> bool:
+    return bool(text) and INJURY_PATTERN.search(text) is not None
+
+
+def body_parts_of(muscle: str) -> list[str]:
+    """``"Quads / Glutes"`` → ``["Quadriceps", "Glutes"]``; empty for "Full Body", "Cardio" …"""
+    parts = []
+    for token in muscle.split("/"):
+        parts += MUSCLE_BODY_PARTS.get(token.strip().casefold(), [])
+    return list(dict.fromkeys(parts))
+
+
+# ─── Build ────────────────────────────────────────────────────────────────────
+def load_gym_table(path: str = MEGAGYM_CSV):
+    """Distinct megaGym exercises with description and metadata, or None when the CSV is unavailable."""
+    import pandas as pd
+
+    try:
+        df = pd.read_csv(path, usecols=["Title", "Desc", *COLUMNS.values()], dtype="string")
+    except (FileNotFoundError, ValueError) as exc:
+        logger.warning(f"⚠️ megaGym exercises unavailable ({path}): {exc}")
+        return None
+    df = df.dropna(subset=["Title"])
+    df["Title"] = df["Title"].str.strip()
+    return df.drop_duplicates(subset=["Title"]).reset_index(drop=True)
+
+
+def _describe(title: str, desc, body_part, equipment) -> str:
+    text = f"{title}. {desc}" if isinstance(desc, str) else f"{title}."
+    if isinstance(body_part, str):
+        text += f" Targets {body_part.lower()}"
+        text += f" with {equipment.lower()}." if isinstance(equipment, str) else "."
+    return text
+
+
+def build(out_dir: str, csv_path: str = MEGAGYM_CSV, models=None) -> dict | None:
+    """Embed megaGym (and the planner's exercises) with ``models``' encoder; None without the CSV."""
+    from model_loader import ModelLoader
+    from planner import EXERCISE_CATALOG
+
+    df = load_gym_table(csv_path)
+    if df is None:
+        return None
+    models = models or ModelLoader(APP_CONFIG.MODEL_DIR)
+    encoder = models.sources.get("sentence_transformer", "stub")
+    if encoder == "stub":
+        logger.warning("⚠️ Sentence transformer is a stub — embeddings are placeholders and swaps stay off")
+
+    texts = [_describe(*row) for row in zip(df["Title"], df["Desc"], df["BodyPart"], df["Equipment"])]
+    planner = {r["name"]: r["muscle"] for r in EXERCISE_CATALOG.records[:EXERCISE_CATALOG.n_planner]}
+    planner_texts = [f"{name}. Targets {muscle.lower()}." for name, muscle in planner.items()]
+
+    arrays = {
+        "embeddings":         models.encode(texts),
+        "planner_embeddings": models.encode(planner_texts),
+        "met": df["Type"].fillna("").str.strip().str.lower().map(GYM_TYPE_METS)
+                 .astype("float64").fillna(DEFAULT_MET).to_numpy(np.float32),
+    }
+    vocab = {}
+    for name, column in COLUMNS.items():
+        values = df[column].fillna("").str.strip()
+        vocab[name] = sorted(v for v in values.unique() if v)
+        code = {v: i for i, v in enumerate(vocab[name])}
+        arrays[name] = np.array([code.get(v, -1) for v in values], dtype=np.int8)
+
+    manifest = {
+        "version":       INDEX_VERSION,
+        "encoder":       encoder,
+        # The encoder version the embeddings came from; queries must use the same one
+        "encoder_checksum": models.checksums.get("sentence_transformer"),
+        "dim":           int(arrays["embeddings"].shape[1]),
+        "vocab":         vocab,
+        "titles":        df["Title"].tolist(),
+        "planner_names": list(planner),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr, allow_pickle=False)
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    size = sum(a.nbytes for a in arrays.values())
+    logger.info(f"✅ Exercise index: {len(texts):,} megaGym + {len(planner)} planner exercises, "
+                f"{size:,} bytes of arrays → {out_dir}")
+    return manifest
+
+
+# ─── Search ───────────────────────────────────────────────────────────────────
+class ExerciseIndex:
+    """Embeddings and metadata codes of ``build``; rows follow ``titles``."""
+
+    def __init__(self, arrays: dict, manifest: dict):
+        if manifest.get("version") != INDEX_VERSION:
+            raise ValueError(f"exercise index version {manifest.get('version')} != {INDEX_VERSION}")
+        self.embeddings = arrays["embeddings"]
+        self.planner_embeddings = arrays["planner_embeddings"]
+        self.met = arrays["met"]
+        self.codes = {name: arrays[name] for name in COLUMNS}
+        self.encoder, self.dim = manifest["encoder"], manifest["dim"]
+        self.encoder_checksum = manifest["encoder_checksum"]
+        self.vocab = manifest["vocab"]
+        self.titles = manifest["titles"]
+        self._code = {name: {v: i for i, v in enumerate(values)} for name, values in self.vocab.items()}
+        self._planner_row = {name: i for i, name in enumerate(manifest["planner_names"])}
+
+    @classmethod
+    def load(cls, index_dir: str) -> "ExerciseIndex":
+        with open(os.path.join(index_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        names = ["embeddings", "planner_embeddings", "met", *COLUMNS]
+        arrays = {n: np.load(os.path.join(index_dir, f"{n}.npy"), mmap_mode="r", allow_pickle=False)
+                  for n in names}
+        return cls(arrays, manifest)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def usable_with(self, models) -> bool:
+        """
+        Real embeddings on both sides (a stub encoder's vectors mean nothing)
+        from the same encoder version — after a hot swap to another model the
+        index's vectors and the query's live in different spaces.
+        """
+        return (self.encoder != "stub"
+                and getattr(models, "sources", {}).get("sentence_transformer") != "stub"
+                and getattr(models, "checksums", {}).get("sentence_transformer") == self.encoder_checksum)
+
+    def mask(self, levels: list[str] | None = None, equipment: list[str] | None = None,
+             body_parts: list[str] | None = None) -> np.ndarray:
+        """Rows allowed by every given filter (megaGym values; None = any)."""
+        keep = np.ones(len(self), dtype=bool)
+        for name, values in (("level", levels), ("equipment", equipment), ("body_part", body_parts)):
+            if values is not None:
+                codes = [self._code[name][v] for v in values if v in self._code[name]]
+                keep &= np.isin(self.codes[name], codes)
+        return keep
+
+    def top_k(self, query: np.ndarray, k: int = 10, keep: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, cosine scores) of the ``k`` best rows inside ``keep``, best first."""
+        rows = np.flatnonzero(keep) if keep is not None else np.arange(len(self))
+        if not len(rows):
+            return rows, np.empty(0, np.float32)
+        scores = np.asarray(self.embeddings[rows] if keep is not None else self.embeddings) @ query
+        if len(rows) > k:
+            part = np.argpartition(-scores, k)[:k]
+            rows, scores = rows[part], scores[part]
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
+
+    def search(self, query: np.ndarray, k: int = 10, levels: list[str] | None = None,
+               equipment: list[str] | None = None, body_parts: list[str] | None = None) -> list[dict]:
+        """Top ``k`` exercises for an encoded ``query`` after the metadata filters."""
+        no_filter = levels is None and equipment is None and body_parts is None
+        rows, scores = self.top_k(np.asarray(query, dtype=np.float32), k,
+                                  None if no_filter else self.mask(levels, equipment, body_parts))
+        return [dict(self.exercise(r), score=round(float(s), 4)) for r, s in zip(rows.tolist(), scores.tolist())]
+
+    def exercise(self, row: int) -> dict:
+        """Planner-shaped record (``name`` / ``sets`` / ``muscle``) of one megaGym row."""
+        part = self.codes["body_part"][row]
+        return {"name": self.titles[row], "sets": GYM_DEFAULT_SETS,
+                "muscle": self.vocab["body_part"][part] if part >= 0 else ""}
+
+    def gym_exercises(self) -> list[dict]:
+        """Every row as ``calorie_burn.load_gym_exercises`` records, for the catalog and burn engine."""
+        return [dict(self.exercise(r), met=float(m)) for r, m in enumerate(self.met.tolist())]
+
+    def planner_vectors(self, names: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """(embeddings, found mask) of planner exercises by name; unknown names get zeros."""
+        rows = np.array([self._planner_row.get(n, -1) for n in names], dtype=np.int64)
+        found = rows >= 0
+        vecs = np.zeros((len(names), self.dim), dtype=np.float32)
+        vecs[found] = self.planner_embeddings[rows[found]]
+        return vecs, found
+
+
+_INDEX: ExerciseIndex | None = None
+_INDEX_LOADED = False
+
+
+def get_exercise_index(index_dir: str | None = None) -> ExerciseIndex | None:
+    """The process-wide index, or None when it has not been built."""
+    global _INDEX, _INDEX_LOADED
+    if _INDEX_LOADED and index_dir is None:
+        return _INDEX
+    index_dir = index_dir or APP_CONFIG.EXERCISE_INDEX_DIR
+    index = None
+    if os.path.exists(os.path.join(index_dir, MANIFEST_FILE)):
+        try:
+            index = ExerciseIndex.load(index_dir)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ Cannot load exercise index {index_dir}: {e}")
+    _INDEX, _INDEX_LOADED = index, True
+    return index
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cmd", choices=["build", "query"])
+    parser.add_argument("text", nargs="?", default="")
+    parser.add_argument("--dir", default=APP_CONFIG.EXERCISE_INDEX_DIR)
+    parser.add_argument("--csv", default=MEGAGYM_CSV)
+    parser.add_argument("--level", choices=sorted(PLANNER_LEVELS))
+    parser.add_argument("--equipment", nargs="*", choices=sorted(EQUIPMENT_NAMES))
+    parser.add_argument("--muscle", help='planner muscle label, e.g. "Quads / Glutes"')
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "build":
+        if build(args.dir, args.csv) is None:
+            raise SystemExit(1)
+        return
+
+    from model_loader import ModelLoader
+
+    index = ExerciseIndex.load(args.dir)
+    query = ModelLoader(APP_CONFIG.MODEL_DIR).encode([args.text])[0]
+    equipment = [v for e in args.equipment for v in EQUIPMENT_NAMES[e]] if args.equipment else None
+    hits = index.search(query, args.k, PLANNER_LEVELS.get(args.level), equipment,
+                        body_parts_of(args.muscle) if args.muscle else None)
+    for hit in hits:
+        print(f"{hit['score']:>7.3f}  {hit['muscle']:<12} {hit['name']}")
+
+
+if __name__ == "__main__":
+    main()
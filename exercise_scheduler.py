@@ -0,0 +1,241 @@
+"""exercise_scheduler.py — Weekly exercise selection over muscle / equipment bitsets.
+
+Each EXERCISE_DB entry is compiled once into two small ints: the muscles its
+label names (``"Quads / Glutes"`` → quads | glutes) and the equipment tier it
+belongs to.  A week is then solved greedily, day by day, with bit operations
+only: candidates are the (level, goal) exercises of *every* owned tier, and
+each pick maximises
+
+    on-focus bonus + new focus muscles today + muscles not yet hit this week
+    − muscles still recovering from yesterday − repeats
+
+so a Push day gets presses, a Legs day gets squats and hinges, and the week
+spreads over every muscle the pool can reach.  A day is filled with on-focus
+work only; when fewer than ``MIN_EXERCISES`` fit, it is padded with on-focus
+bodyweight moves whose muscles are not recovering, and otherwise left short
+— never with off-focus or recovering exercises.  Only a focus the owned
+equipment cannot train at all falls back to non-recovering work.  Weeks are pure functions of
+(level, goal, owned equipment), solved in well under a millisecond and
+memoised; ``plan_table`` enumerates every equipment subset offline.
+"""
+
+from __future__ import annotations
+
+import random
+import zlib
+
+from plan_records import Exercise
+
+
+# Bit order of the muscle sets; "conditioning" stands for cardio / power work
+MUSCLES = ["chest", "shoulders", "triceps", "back", "biceps", "traps",
+           "quads", "glutes", "hamstrings", "calves", "core", "conditioning"]
+_BIT = {m: 1 << i for i, m in enumerate(MUSCLES)}
+
+# Muscle label part (lower case) → muscles; every part used in EXERCISE_DB must be listed
+MUSCLE_TOKENS = {
+    "chest":           ["chest"],
+    "upper chest":     ["chest"],
+    "shoulders":       ["shoulders"],
+    "side delts":      ["shoulders"],
+    "triceps":         ["triceps"],
+    "back":            ["back"],
+    "biceps":          ["biceps"],
+    "brachialis":      ["biceps"],
+    "traps":           ["traps"],
+    "quads":           ["quads"],
+    "glutes":          ["glutes"],
+    "hamstrings":      ["hamstrings"],
+    "posterior chain": ["hamstrings", "glutes", "back"],
+    "full posterior":  ["hamstrings", "glutes", "back", "traps"],
+    "calves":          ["calves"],
+    "legs":            ["quads", "glutes", "hamstrings", "calves"],
+    "core":            ["core"],
+    "balance":         ["core"],
+    "cardio":          ["conditioning"],
+    "power":           ["conditioning"],
+    "full upper body": ["chest", "shoulders", "triceps", "back", "biceps"],
+    "full body":       MUSCLES,
+}
+
+_UPPER = ["chest", "shoulders", "triceps", "back", "biceps", "traps"]
+_LOWER = ["quads", "glutes", "hamstrings", "calves"]
+_STRENGTH = [m for m in MUSCLES if m != "conditioning"]
+
+# Day focus (WEEKLY_STRUCTURE) → muscles it should train; unlisted foci take anything
+FOCUS_MUSCLES = {
+    "Push":           ["chest", "shoulders", "triceps"],
+    "Pull":           ["back", "biceps", "traps"],
+    "Legs":           _LOWER,
+    "Lower":          _LOWER + ["core"],
+    "Lower Body":     _LOWER + ["core"],
+    "Upper":          _UPPER,
+    "Upper Body":     _UPPER,
+    "Full Body":      _STRENGTH,
+    "Full Body HIIT": MUSCLES,
+    "Strength":       _STRENGTH,
+    "Cardio":         ["conditioning"],
+    "Long Cardio":    ["conditioning"],
+}
+
+# Equipment tiers (bit order of the equipment masks)
+EQUIPMENT = ["Barbell", "Dumbbells", "Resistance Bands", "Bodyweight", "Machines"]
+
+SCORE_WEIGHTS = {
+    "on_focus":      16,   # trains at least one of the day's focus muscles
+    "focus_muscle":  8,    # per focus muscle not yet trained today
+    "week_muscle":   2,    # per muscle not yet trained this week
+    "recovering":    3,    # per muscle trained yesterday (48 h spacing)
+    "repeat":        4,    # same exercise as yesterday
+    "seen":          1,    # exercise already used earlier this week
+}
+MIN_EXERCISES, MAX_EXERCISES = 4, 6
+
+_POPCOUNT = [bin(i).count("1") for i in range(1 << len(MUSCLES))]
+_ALL = (1 << len(MUSCLES)) - 1
+
+
+def muscle_bits(label: str) -> int:
+    """``"Quads / Glutes"`` → quads | glutes bits."""
+    bits = 0
+    for token in label.split("/"):
+        muscles = MUSCLE_TOKENS.get(token.strip().casefold())
+        if muscles is None:
+            raise ValueError(f"Unrecognised muscle {token.strip()!r} in {label!r}")
+        for m in muscles:
+            bits |= _BIT[m]
+    return bits
+
+
+def equipment_mask(equipment: list[str]) -> int:
+    """Owned equipment → bitmask over ``EQUIPMENT`` (unknown names are ignored)."""
+    owned = set(equipment or ())
+    return sum(1 << i for i, e in enumerate(EQUIPMENT) if e in owned)
+
+
+def equipment_names(mask: int) -> list[str]:
+    return [e for i, e in enumerate(EQUIPMENT) if mask >> i & 1]
+
+
+_FOCUS_BITS = {focus: sum(_BIT[m] for m in muscles) for focus, muscles in FOCUS_MUSCLES.items()}
+
+
+class _Pool:
+    """One (level, goal) slice of EXERCISE_DB: exercises with muscle and tier bits."""
+
+    def __init__(self, goal_db: dict):
+        self.exercises, self.bits, self.tier = [], [], []
+        self.bodyweight: list[int] = []
+        names = set()
+        for tier, exercises in goal_db.items():
+            for ex in exercises:
+                if ex["name"] in names:
+                    continue
+                names.add(ex["name"])
+                self.exercises.append(Exercise.from_dict(ex))
+                self.bits.append(muscle_bits(ex["muscle"]))
+                self.tier.append(1 << EQUIPMENT.index(tier))
+                if tier == "Bodyweight":
+                    self.bodyweight.append(len(self.exercises) - 1)
+        # Nothing owned fits: bodyweight work if the pool has any, else its first tier
+        fallback = "Bodyweight" if "Bodyweight" in goal_db else next(iter(goal_db), None)
+        self.fallback = 1 << EQUIPMENT.index(fallback) if fallback else 0
+
+    def candidates(self, owned: int) -> list[int]:
+        """Exercises of every owned tier (the fallback tier when none is owned)."""
+        found = [i for i, t in enumerate(self.tier) if t & owned]
+        return found or [i for i, t in enumerate(self.tier) if t & self.fallback]
+
+
+class ExerciseScheduler:
+    """Picks each day's exercises for a 7-day focus structure; weeks are memoised."""
+
+    def __init__(self, exercise_db: dict):
+        self.exercise_db = exercise_db
+        self._pools: dict[tuple[str, str], _Pool] = {}
+        self._weeks: dict[tuple, tuple[tuple[Exercise, ...], ...]] = {}
+        # Compile every pool now so label errors surface at import
+        for level, level_db in exercise_db.items():
+            for goal in level_db:
+                self._pool(level, goal)
+
+    def _pool(self, level: str, goal: str) -> _Pool:
+        level_db = self.exercise_db.get(level, self.exercise_db["Intermediate"])
+        goal = goal if goal in level_db else next(iter(level_db))
+        key = (level if level in self.exercise_db else "Intermediate", goal)
+        if key not in self._pools:
+            self._pools[key] = _Pool(level_db[goal])
+        return self._pools[key]
+
+    def week(self, fitness_level: str, fitness_goal: str, equipment: list[str],
+             structure: list[str]) -> tuple[tuple[Exercise, ...], ...]:
+        """Exercises per day of ``structure`` (empty for rest days)."""
+        key = (fitness_level, fitness_goal, equipment_mask(equipment), tuple(structure))
+        week = self._weeks.get(key)
+        if week is None:
+            pool = self._pool(fitness_level, fitness_goal)
+            days = self._solve(pool, key[2], structure, zlib.crc32(fitness_level.encode()))
+            week = self._weeks[key] = tuple(tuple(pool.exercises[i] for i in day) for day in days)
+        return week
+
+    @staticmethod
+    def _solve(pool: _Pool, owned: int, structure: list[str], seed: int) -> tuple[tuple[int, ...], ...]:
+        w = SCORE_WEIGHTS
+        bits = pool.bits
+        candidates = pool.candidates(owned)
+        rng = random.Random(seed)
+
+        days, week, recent, yesterday, seen = [], 0, 0, set(), set()
+        for focus in structure:
+            if "Rest" in focus:
+                days.append(())
+                recent, yesterday = 0, set()
+                continue
+            target = _FOCUS_BITS.get(focus, _ALL)
+            order = candidates.copy()
+            rng.shuffle(order)  # tie-break: variety between levels
+            base = {}
+            for i in order:
+                b = bits[i]
+                base[i] = ((w["on_focus"] if b & target else 0)
+                           + w["week_muscle"] * _POPCOUNT[b & ~week]
+                           - w["recovering"] * _POPCOUNT[b & recent]
+                           - (w["repeat"] if i in yesterday else w["seen"] if i in seen else 0))
+            focused = [i for i in order if bits[i] & target]
+            # Padding: bodyweight moves on the focus that are not recovering
+            pad = [i for i in pool.bodyweight if bits[i] & target and not bits[i] & recent
+                   and i not in base]
+            if not focused and not pad:
+                # Nothing owned trains this focus: anything that is not recovering
+                pad = [i for i in order if not bits[i] & recent]
+            for i in pad:
+                base.setdefault(i, w["week_muscle"] * _POPCOUNT[bits[i] & ~week]
+                                - (w["seen"] if i in seen else 0))
+
+            picked, today = [], 0
+            for group, n in ((focused, MAX_EXERCISES), (pad, MIN_EXERCISES)):
+                while group and len(picked) < n:
+                    open_bits = target & ~today
+                    best = max(group, key=lambda i: base[i] + w["focus_muscle"] * _POPCOUNT[bits[i] & open_bits])
+                    group.remove(best)
+                    picked.append(best)
+                    today |= bits[best]
+            days.append(tuple(picked))
+            week |= today
+            recent, yesterday = today, set(picked)
+            seen.update(picked)
+        return tuple(days)
+
+    def coverage(self, fitness_level: str, fitness_goal: str, equipment: list[str],
+                 structure: list[str]) -> dict:
+        """Muscles the week trains and those the owned equipment could reach but it misses."""
+        pool = self._pool(fitness_level, fitness_goal)
+        reach = 0
+        for i in pool.candidates(equipment_mask(equipment)):
+            reach |= pool.bits[i]
+        trained = 0
+        for day in self.week(fitness_level, fitness_goal, equipment, structure):
+            for ex in day:
+                trained |= muscle_bits(ex.muscle)
+        return {"trained": [m for m in MUSCLES if trained & _BIT[m]],
+                "missed":  [m for m in MUSCLES if reach & ~trained & _BIT[m]]}
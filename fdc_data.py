@@ -0,0 +1,113 @@
+"""fdc_data.py — Readers for the USDA FoodData Central CSV export in ``datasets/``.
+
+The export is a set of normalised tables keyed by ``fdc_id``.  Readers take
+only the columns they need and return ``None`` (with a warning) when a table
+is missing or still a Git LFS pointer, so every consumer can fall back to the
+planner's built-in data.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+FDC_DIR = "datasets"
+LFS_POINTER = b"version https://git-lfs"
+
+# nutrient.csv ids of the per-100 g proximates
+NUTRIENT_IDS = {"nitrogen": 1002, "protein": 1003, "fat": 1004, "carbs": 1005, "energy": 1008}
+
+
+def read_table(name: str, usecols=None, fdc_dir: str = FDC_DIR,
+               dtype: dict | None = None) -> pd.DataFrame | None:
+    """``<fdc_dir>/<name>.csv`` restricted to ``usecols`` (list or callable), or ``None`` if unavailable."""
+    path = os.path.join(fdc_dir, f"{name}.csv")
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(LFS_POINTER)) == LFS_POINTER:
+                raise ValueError("Git LFS pointer, not the data — run `git lfs pull`")
+        return pd.read_csv(path, usecols=usecols, dtype=dtype, low_memory=False)
+    except (FileNotFoundError, ValueError) as exc:
+        logger.warning(f"⚠️ FoodData Central table unavailable ({path}): {exc}")
+        return None
+
+
+def load_foods(fdc_dir: str = FDC_DIR) -> pd.DataFrame | None:
+    """
+    One row per food: ``fdc_id``, ``description``, ``category`` (lower case),
+    ``attributes`` (free-text attribute values joined by ``"; "``) and per-100 g
+    ``protein`` / ``carbs`` / ``fat`` / ``nitrogen`` where ``food_nutrient.csv`` has them.
+    """
+    foods = read_table("food", ["fdc_id", "description", "food_category_id"], fdc_dir)
+    if foods is None:
+        return None
+    foods = foods.dropna(subset=["description"])
+
+    categories = read_table("food_category", ["id", "description"], fdc_dir)
+    if categories is not None:
+        names = dict(zip(categories["id"], categories["description"].str.strip().str.lower()))
+        foods["category"] = foods["food_category_id"].map(names).fillna("")
+    else:
+        foods["category"] = ""
+
+    attrs = read_table("food_attribute", ["fdc_id", "name", "value"], fdc_dir, dtype={"value": "string"})
+    if attrs is not None:
+        text = (attrs["name"].fillna("").astype(str) + " " + attrs["value"].fillna("")).str.strip()
+        joined = text.groupby(attrs["fdc_id"]).agg("; ".join)
+        foods["attributes"] = foods["fdc_id"].map(joined).fillna("")
+    else:
+        foods["attributes"] = ""
+
+    nutrients = read_table("food_nutrient", ["fdc_id", "nutrient_id", "amount"], fdc_dir)
+    for key in ("protein", "carbs", "fat", "nitrogen"):
+        foods[key] = float("nan")
+    if nutrients is not None:
+        ids = {v: k for k, v in NUTRIENT_IDS.items() if k != "energy"}
+        macros = (nutrients[nutrients["nutrient_id"].isin(ids)]
+                  .pivot_table(index="fdc_id", columns="nutrient_id", values="amount", aggfunc="mean")
+                  .rename(columns=ids))
+        for key in ids.values():
+            if key in macros:
+                foods[key] = foods["fdc_id"].map(macros[key])
+
+    return foods[["fdc_id", "description", "category", "attributes", "protein", "carbs", "fat", "nitrogen"]] \
+        .reset_index(drop=True)
+
+
+def load_conversion_factors(fdc_dir: str = FDC_DIR) -> pd.DataFrame | None:
+    """
+    Per-food conversion factors indexed by ``fdc_id``: Atwater kcal/g for
+    ``protein`` / ``fat`` / ``carbs`` (``food_calorie_conversion_factor.csv``)
+    and the nitrogen-to-protein ``nitrogen`` factor
+    (``food_protein_conversion_factor.csv``); NaN where a food has none.
+    """
+    links = read_table("food_nutrient_conversion_factor", ["id", "fdc_id"], fdc_dir)
+    if links is None:
+        return None
+    factors = links.rename(columns={"id": "factor_id"})
+
+    calorie = read_table("food_calorie_conversion_factor",
+                         ["food_nutrient_conversion_factor_id", "protein_value", "fat_value",
+                          "carbohydrate_value"], fdc_dir)
+    if calorie is not None:
+        calorie = calorie.rename(columns={"food_nutrient_conversion_factor_id": "factor_id",
+                                          "protein_value": "protein", "fat_value": "fat",
+                                          "carbohydrate_value": "carbs"})
+        factors = factors.merge(calorie, on="factor_id", how="left")
+    protein = read_table("food_protein_conversion_factor",
+                         ["food_nutrient_conversion_factor_id", "value"], fdc_dir)
+    if protein is not None:
+        protein = protein.rename(columns={"food_nutrient_conversion_factor_id": "factor_id",
+                                          "value": "nitrogen"})
+        factors = factors.merge(protein, on="factor_id", how="left")
+
+    for key in ("protein", "fat", "carbs", "nitrogen"):
+        if key not in factors:
+            factors[key] = float("nan")
+    # A food can have several factor rows (one per kind); keep the first value of each
+    return factors.groupby("fdc_id")[["protein", "fat", "carbs", "nitrogen"]].first()
@@ -0,0 +1,241 @@
+"""food_index.py — Attribute bitmasks over the food bank for diet and allergen filtering.
+
+Every food is tagged once, at import, with a ``uint32`` mask of attributes
+(red meat, fish, dairy, gluten, nuts, high-carb …): planner foods from their
+name and macros, FoodData Central foods from ``food_category.csv``,
+``food_attribute.csv`` and their description.  A user's diet and free-text
+exclusions ("no gluten", "nut allergy") compile to one ``forbidden`` mask, so
+filtering the whole bank is a single vectorised ``(masks & forbidden) == 0``.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import numpy as np
+
+from preference_rules import PhraseAutomaton, normalise
+
+
+logger = logging.getLogger(__name__)
+
+ATTRIBUTES = [
+    "red_meat", "poultry", "fish", "shellfish", "egg", "dairy", "gluten", "grains",
+    "legumes", "soy", "peanuts", "tree_nuts", "sesame", "added_sugar", "processed", "high_carb",
+]
+BITS = {name: 1 << i for i, name in enumerate(ATTRIBUTES)}
+
+# Share of a serving's energy from carbohydrate above which it counts as high-carb
+HIGH_CARB_SHARE = 0.45
+
+# Attribute → pattern over the lower-cased food name (FOOD_DB items and FDC descriptions)
+INGREDIENT_RULES = {
+    "red_meat":    r"mutton|beef|lamb|pork|\bham\b|(?<!turkey )bacon|keema|veal|venison|bison|goat",
+    "poultry":     r"chicken|turkey|duck",
+    "fish":        r"fish|salmon|tuna|\bcod\b|sardine|mackerel|trout|tilapia|anchov",
+    "shellfish":   r"prawn|shrimp|crab|lobster|clam|mussel|oyster|scallop|squid",
+    "egg":         r"\beggs?\b|omelette|pancake|shakshuka|tamagoyaki",
+    "dairy":       r"(?<!almond )(?<!oat )(?<!coconut )(?<!soy )milk|yogurt|\bcurd\b|(?<!coconut )raita"
+                   r"|paneer|cheese|feta|parmesan|\bghee\b|(?<!almond )(?<!peanut )butter|whey|cream|labneh"
+                   r"|chhena|khoa|khoya",
+    "gluten":      r"(?<!millet )roti|chapati|toast|bread|sourdough|(?<!chickpea )pasta|couscous|wheat"
+                   r"|\broll\b|granola|crackers|\bwrap\b|pancake|barley|\brye\b|seitan|\bpita\b|bulgur"
+                   r"|tabbouleh|fatayer|\bsoba\b|maida|plain flour",
+    "grains":      r"rice|\boats\b|oatmeal|porridge|quinoa|millet|poha|idli|dosa|khichdi|kitchari|biryani|\bcorn\b|cereal"
+                   r"|congee|onigiri|bibimbap|noodle|\bpho\b|japchae",
+    "legumes":     r"\bdal\b|lentil|chana|chickpea|rajma|\bbeans?\b|moong|sprout|hummus|tofu|tempeh"
+                   r"|edamame|\bsoy|peanut|sambar|papad|falafel|\bful\b|mujaddara|miso|kung pao",
+    "soy":         r"tofu|tempeh|edamame|\bsoy|miso|teriyaki",
+    "peanuts":     r"peanut|kung pao",
+    "tree_nuts":   r"almond|walnut|cashew|pistachio|hazelnut|pecan|macadamia",
+    "sesame":      r"sesame|tahini|hummus|baba ganoush|za'atar",
+    "added_sugar": r"syrup|chocolate|honey|\bjam\b|granola|candy|sweetened|teriyaki|sugar(?! snap|[- ]free)|jaggery",
+    "processed":   r"bacon|sausage|turkey slices|\bham\b|luncheon|frankfurter",
+}
+_RULES = [(BITS[attr], re.compile(pattern)) for attr, pattern in INGREDIENT_RULES.items()]
+
+# FoodData Central category (lower case) → attributes implied by membership alone
+FDC_CATEGORY_ATTRIBUTES = {
+    "beef products":                 ["red_meat"],
+    "pork products":                 ["red_meat"],
+    "lamb, veal, and game products": ["red_meat"],
+    "sausages and luncheon meats":   ["processed"],
+    "poultry products":              ["poultry"],
+    "legumes and legume products":   ["legumes"],
+    "cereal grains and pasta":       ["grains"],
+    "baked products":                ["grains", "gluten"],
+    "breakfast cereals":             ["grains"],
+    "sweets":                        ["added_sugar"],
+}
+
+# Diet → attributes it rules out
+DIET_EXCLUSIONS = {
+    "Non-Vegetarian": [],
+    "Vegetarian":     ["red_meat", "poultry", "fish", "shellfish"],
+    "Vegan":          ["red_meat", "poultry", "fish", "shellfish", "egg", "dairy"],
+    "Pescatarian":    ["red_meat", "poultry"],
+    "Keto":           ["high_carb", "added_sugar", "grains", "gluten", "legumes"],
+    "Paleo":          ["grains", "gluten", "legumes", "soy", "peanuts", "dairy", "added_sugar",
+                       "processed"],
+}
+
+# Free-text phrase → attributes to exclude (matched on whole words)
+EXCLUSION_PHRASES = {
+    "no gluten": ["gluten"], "gluten free": ["gluten"], "gluten intolerant": ["gluten"],
+    "gluten intolerance": ["gluten"], "celiac": ["gluten"], "coeliac": ["gluten"],
+    "no wheat": ["gluten"], "wheat allergy": ["gluten"],
+    "no dairy": ["dairy"], "dairy free": ["dairy"], "lactose": ["dairy"], "no milk": ["dairy"],
+    "milk allergy": ["dairy"],
+    "no eggs": ["egg"], "no egg": ["egg"], "egg allergy": ["egg"], "egg free": ["egg"],
+    "nut allergy": ["tree_nuts", "peanuts"], "no nuts": ["tree_nuts", "peanuts"],
+    "nut free": ["tree_nuts", "peanuts"], "tree nut": ["tree_nuts"],
+    "peanut allergy": ["peanuts"], "no peanuts": ["peanuts"],
+    "shellfish allergy": ["shellfish"], "no shellfish": ["shellfish"], "no prawns": ["shellfish"],
+    "no shrimp": ["shellfish"], "no seafood": ["fish", "shellfish"], "no fish": ["fish"],
+    "fish allergy": ["fish"],
+    "soy allergy": ["soy"], "no soy": ["soy"], "soy free": ["soy"],
+    "sesame allergy": ["sesame"], "no sesame": ["sesame"],
+    "no meat": ["red_meat", "poultry"], "no red meat": ["red_meat"], "no beef": ["red_meat"],
+    "no pork": ["red_meat"], "no chicken": ["poultry"], "no poultry": ["poultry"],
+    "no sugar": ["added_sugar"], "sugar free": ["added_sugar"], "low sugar": ["added_sugar"],
+    "diabetic": ["added_sugar"], "diabetes": ["added_sugar"],
+    "low carb": ["high_carb"], "no carbs": ["high_carb"],
+    "no grains": ["grains", "gluten"], "grain free": ["grains", "gluten"],
+    "no processed": ["processed"],
+}
+
+# Allergen noun → attributes; each also matches as "allergic to <noun>"
+ALLERGENS = {
+    "gluten": ["gluten"], "wheat": ["gluten"], "dairy": ["dairy"], "milk": ["dairy"],
+    "lactose": ["dairy"], "eggs": ["egg"], "egg": ["egg"], "nuts": ["tree_nuts", "peanuts"],
+    "tree nuts": ["tree_nuts"], "peanuts": ["peanuts"], "peanut": ["peanuts"],
+    "shellfish": ["shellfish"], "shrimp": ["shellfish"], "prawns": ["shellfish"],
+    "seafood": ["fish", "shellfish"], "fish": ["fish"], "soy": ["soy"], "sesame": ["sesame"],
+}
+EXCLUSION_PHRASES.update({f"allergic to {noun}": attrs for noun, attrs in ALLERGENS.items()})
+
+
+def mask_of(attributes) -> int:
+    mask = 0
+    for name in attributes:
+        mask |= BITS[name]
+    return mask
+
+
+def attributes_of(mask: int) -> list[str]:
+    return [name for name in ATTRIBUTES if mask & BITS[name]]
+
+
+def diet_mask(diet: str) -> int:
+    return mask_of(DIET_EXCLUSIONS.get(diet, ()))
+
+
+_EXCLUSIONS = PhraseAutomaton({normalise(phrase): mask_of(attrs)
+                              for phrase, attrs in EXCLUSION_PHRASES.items()})
+
+
+def parse_exclusions(text: str) -> list[str]:
+    """Attributes excluded by free text, e.g. ``"no gluten, nut allergy"`` → gluten + nuts."""
+    mask = 0
+    for value, _, _ in _EXCLUSIONS.find(normalise(text)):
+        mask |= value
+    return attributes_of(mask)
+
+
+def tag_name(text: str) -> int:
+    text = text.casefold()
+    mask = 0
+    for bit, pattern in _RULES:
+        if pattern.search(text):
+            mask |= bit
+    if mask & BITS["gluten"]:
+        mask |= BITS["grains"]
+    return mask
+
+
+def _high_carb(protein: float, carbs: float, fat: float) -> bool:
+    kcal = 4 * protein + 4 * carbs + 9 * fat
+    return kcal > 0 and 4 * carbs / kcal > HIGH_CARB_SHARE
+
+
+def tag_food(item: dict) -> int:
+    """Mask of one FOOD_DB entry (``item`` name plus macros)."""
+    mask = tag_name(item["item"])
+    if _high_carb(item["protein"], item["carbs"], item["fat"]):
+        mask |= BITS["high_carb"]
+    return mask
+
+
+def tag_fdc(description: str, category: str, attributes: str,
+            protein: float, carbs: float, fat: float) -> int:
+    """Mask of one FoodData Central food; macros may be NaN."""
+    mask = tag_name(f"{description}; {attributes}") | mask_of(FDC_CATEGORY_ATTRIBUTES.get(category, ()))
+    if category == "finfish and shellfish products" and not mask & BITS["shellfish"]:
+        mask |= BITS["fish"]
+    if not np.isnan(carbs) and _high_carb(np.nan_to_num(protein), carbs, np.nan_to_num(fat)):
+        mask |= BITS["high_carb"]
+    return mask
+
+
+# ─── Index ────────────────────────────────────────────────────────────────────
+class FoodIndex:
+    """
+    Every FOOD_DB entry (and optionally every FoodData Central food) as one
+    row of parallel arrays.  Planner rows come first, in FOOD_DB order, with
+    their (bank, culture, course) pool and serving cost; FDC rows have no
+    pool (``-1``) and no cost (NaN).
+    """
+
+    def __init__(self, food_db: dict, fdc_dir: str | None = None):
+        self.records: list[dict] = []
+        masks, pools = [], []
+        self.pool_keys: list[tuple[str, str, str]] = []
+        for bank, cultures in food_db.items():
+            for culture, courses in cultures.items():
+                for course, items in courses.items():
+                    self.pool_keys.append((bank, culture, course))
+                    for item in items:
+                        self.records.append(item)
+                        masks.append(tag_food(item))
+                        pools.append(len(self.pool_keys) - 1)
+        self.n_planner = len(self.records)
+
+        if fdc_dir:
+            from fdc_data import load_foods
+
+            foods = load_foods(fdc_dir)
+            if foods is not None:
+                for row in foods.itertuples(index=False):
+                    self.records.append({"item": row.description, "fdc_id": int(row.fdc_id)})
+                    masks.append(tag_fdc(row.description, row.category, row.attributes,
+                                         row.protein, row.carbs, row.fat))
+                    pools.append(-1)
+                logger.info(f"✅ Food index: {len(foods):,} FoodData Central foods tagged")
+
+        self.masks = np.array(masks, dtype=np.uint32)
+        self.pool = np.array(pools, dtype=np.int32)
+        self.cost = np.array([r.get("cost", np.nan) for r in self.records], dtype=np.float64)
+        self._pool_rows = {key: np.flatnonzero(self.pool == p) for p, key in enumerate(self.pool_keys)}
+
+    def allowed(self, forbidden: int) -> np.ndarray:
+        """Boolean row mask of foods with none of the ``forbidden`` attributes."""
+        return (self.masks & np.uint32(forbidden)) == 0
+
+    def choices(self, allowed: np.ndarray, bank: str, culture: str, course: str) -> np.ndarray:
+        """
+        Rows of the allowed entries of the (bank, culture, course) pool, in FOOD_DB order.
+        When the diet empties it, widen to the same course in every bank of the
+        culture, then in every culture; empty if nothing at all is allowed.
+        """
+        rows = self._pool_rows.get((bank, culture, course), np.empty(0, dtype=np.intp))
+        rows = rows[allowed[rows]]
+        if not len(rows):
+            rows = self._widen(allowed, lambda b, c, k: c == culture and k == course)
+        if not len(rows):
+            rows = self._widen(allowed, lambda b, c, k: k == course)
+        return rows
+
+    def _widen(self, allowed: np.ndarray, keep) -> np.ndarray:
+        rows = [self._pool_rows[key] for key in self.pool_keys if keep(*key)]
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+        return rows[allowed[rows]]
@@ -0,0 +1,310 @@
+"""food_search.py — Instant fuzzy food suggestions over every food name we know.
+
+Entries are FoodData Central descriptions (``food.csv``), Indian dish names
+(``indian_food.csv``), the planner's meals and recipe ingredients.  Two
+indexes are compiled once into flat arrays and saved with a JSON manifest:
+
+    trigram index   CSR over the 37³ trigram codes of the space-padded,
+                    accent-folded text: offsets (37³ + 1,) → postings of entry ids
+    prefix trie     over every word, flattened to CSR child arrays; each node
+                    covers a contiguous range of the sorted words, whose
+                    entries are one more CSR slice
+
+A query counts shared trigrams for every entry in one ``np.bincount`` (Dice
+score — typos still match), adds bonuses where a word starts with the token
+being typed and where the entry leads with the first token (trie walks), and
+returns the top ``k`` by ``argpartition``.
+
+    python food_search.py build         # writes models/food_search
+    python food_search.py query "panner tikka"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import unicodedata
+import numpy as np
+
+from config import APP_CONFIG
+from fdc_data import FDC_DIR, read_table
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+MANIFEST_FILE = "food_search.json"
+SOURCES = ["meal", "ingredient", "dish", "fdc"]
+
+ALPHABET = " abcdefghijklmnopqrstuvwxyz0123456789"
+N_SYMBOLS = len(ALPHABET)
+N_TRIGRAMS = N_SYMBOLS ** 3
+_SYMBOL = np.zeros(256, dtype=np.int64)
+_SYMBOL[np.frombuffer(ALPHABET.encode(), np.uint8)] = np.arange(N_SYMBOLS)
+
+WORD_PREFIX_BONUS = 0.5      # a word starts with the token being typed
+LEAD_WORD_BONUS = 0.25       # the entry's first word starts with the query's first token
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """``"Açaí Bowl, frozen"`` → ``"acai bowl frozen"``."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode().casefold()
+    return " ".join(_WORD_RE.findall(text))
+
+
+def _trigrams(padded: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """(entry, code) of every trigram in each padded text, not crossing entries."""
+    lengths = np.array([len(t) for t in padded], dtype=np.int64)
+    symbols = _SYMBOL[np.frombuffer("".join(padded).encode("ascii"), np.uint8)]
+    owner = np.repeat(np.arange(len(padded)), lengths)
+    if len(symbols) < 3:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    codes = (symbols[:-2] * N_SYMBOLS + symbols[1:-1]) * N_SYMBOLS + symbols[2:]
+    inside = owner[:-2] == owner[2:]
+    return owner[:-2][inside], codes[inside]
+
+
+# ─── Entries ──────────────────────────────────────────────────────────────────
+def collect_entries(fdc_dir: str = FDC_DIR) -> list[tuple[str, str, int]]:
+    """(display text, source, ref) for every searchable food; ref is the source's id."""
+    from planner import FOOD_INDEX, RECIPE_BOOK
+
+    entries = [(name, "meal", i) for i, name in enumerate(RECIPE_BOOK.meals)]
+    entries += [(key.replace("_", " ").capitalize(), "ingredient", j)
+                for j, key in enumerate(RECIPE_BOOK.ingredients)]
+
+    dishes = read_table("indian_food", ["name"], fdc_dir)
+    if dishes is not None:
+        entries += [(str(name), "dish", i) for i, name in dishes["name"].dropna().items()]
+    foods = read_table("food", ["fdc_id", "description"], fdc_dir)
+    if foods is not None:
+        foods = foods.dropna(subset=["description"])
+        entries += [(str(d), "fdc", int(f)) for f, d in zip(foods["fdc_id"], foods["description"])]
+    logger.info(f"✅ Search entries: {len(entries):,} ({FOOD_INDEX.n_planner} planner meals)")
+    return entries
+
+
+# ─── Compile ──────────────────────────────────────────────────────────────────
+def compile_index(entries: list[tuple[str, str, int]]) -> tuple[dict, dict]:
+    """Arrays and manifest for ``FoodSearch``."""
+    folded = [fold(text) for text, _, _ in entries]
+    n = len(entries)
+
+    # Trigrams: unique (entry, code) pairs → CSR by code
+    owner, codes = _trigrams([" " + t + " " for t in folded])
+    pairs = np.unique(owner * N_TRIGRAMS + codes)
+    owner, codes = pairs // N_TRIGRAMS, pairs % N_TRIGRAMS
+    order = np.argsort(codes, kind="stable")            # pairs are entry-sorted, keep that per code
+    trigram_offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=N_TRIGRAMS))])
+
+    # Words: sorted vocabulary → entries, and a trie whose nodes are word ranges
+    word_sets = [sorted(set(t.split())) for t in folded]
+    vocab = sorted({w for words in word_sets for w in words})
+    word_id = {w: i for i, w in enumerate(vocab)}
+    w_ids = np.array([word_id[w] for words in word_sets for w in words], dtype=np.int64)
+    w_owner = np.repeat(np.arange(n), [len(words) for words in word_sets])
+    w_order = np.lexsort((w_owner, w_ids))
+    first_word = [word_id[t.split()[0]] if t else -1 for t in folded]
+    word_offsets = np.concatenate([[0], np.cumsum(np.bincount(w_ids, minlength=len(vocab)))])
+
+    arrays = {
+        "trigram_offsets":  trigram_offsets.astype(np.int64),
+        "trigram_postings": owner[order].astype(np.int32),
+        "entry_trigrams":   np.bincount(owner, minlength=n).astype(np.int32),
+        "entry_length":     np.array([len(t) for t in folded], dtype=np.int32),
+        "entry_source":     np.array([SOURCES.index(s) for _, s, _ in entries], dtype=np.int8),
+        "entry_ref":        np.array([ref for _, _, ref in entries], dtype=np.int64),
+        "word_offsets":     word_offsets.astype(np.int64),
+        "word_postings":    w_owner[w_order].astype(np.int32),
+        "entry_first_word": np.array(first_word, dtype=np.int32),
+        **_compile_trie(vocab),
+    }
+    manifest = {
+        "version": INDEX_VERSION,
+        "sources": SOURCES,
+        "texts":   [text for text, _, _ in entries],
+        "folded":  folded,
+    }
+    return arrays, manifest
+
+
+def _compile_trie(vocab: list[str]) -> dict:
+    """
+    Trie over the sorted ``vocab``, breadth-first: node ``i``'s children are
+    ``child_nodes[child_offsets[i]:child_offsets[i + 1]]`` keyed by
+    ``child_chars`` (ASCII), and it spans words ``[node_lo[i], node_hi[i])``.
+    """
+    children: list[dict[str, int]] = [{}]
+    lo, hi = [0], [len(vocab)]
+    for w, word in enumerate(vocab):
+        node = 0
+        for ch in word:
+            nxt = children[node].get(ch)
+            if nxt is None:
+                nxt = children[node][ch] = len(children)
+                children.append({})
+                lo.append(w)
+                hi.append(w)
+            hi[nxt] = w + 1
+            node = nxt
+
+    # Renumber breadth-first so every node's children are contiguous
+    order, bfs = [0], 0
+    while bfs < len(order):
+        order.extend(children[order[bfs]][ch] for ch in sorted(children[order[bfs]]))
+        bfs += 1
+    new_id = np.empty(len(order), dtype=np.int64)
+    new_id[order] = np.arange(len(order))
+    counts = [len(children[old]) for old in order]
+    chars = [ch for old in order for ch in sorted(children[old])]
+    kids = [new_id[children[old][ch]] for old in order for ch in sorted(children[old])]
+    return {
+        "child_offsets": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        "child_chars":   np.frombuffer("".join(chars).encode("ascii"), np.uint8).copy(),
+        "child_nodes":   np.array(kids, dtype=np.int32),
+        "node_lo":       np.array(lo, dtype=np.int32)[order],
+        "node_hi":       np.array(hi, dtype=np.int32)[order],
+    }
+
+
+def build(out_dir: str, fdc_dir: str = FDC_DIR) -> dict:
+    arrays, manifest = compile_index(collect_entries(fdc_dir))
+    os.makedirs(out_dir, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr, allow_pickle=False)
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    size = sum(a.nbytes for a in arrays.values())
+    logger.info(f"✅ Food search: {len(manifest['texts']):,} entries, {size:,} bytes of arrays → {out_dir}")
+    return manifest
+
+
+# ─── Serve ────────────────────────────────────────────────────────────────────
+class FoodSearch:
+    def __init__(self, arrays: dict, manifest: dict):
+        if manifest.get("version") != INDEX_VERSION:
+            raise ValueError(f"unsupported food search version {manifest.get('version')!r}")
+        self.sources: list[str] = manifest["sources"]
+        self.texts: list[str] = manifest["texts"]
+        self.folded: list[str] = manifest["folded"]
+        for name, arr in arrays.items():
+            setattr(self, name, arr)
+        # Plain Python copies of what each query walks per character
+        self._child_offsets = self.child_offsets.tolist()
+        self._child_chars = bytes(self.child_chars)
+
+    @classmethod
+    def load(cls, index_dir: str) -> "FoodSearch":
+        with open(os.path.join(index_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        names = [n[:-4] for n in os.listdir(index_dir) if n.endswith(".npy")]
+        arrays = {n: np.load(os.path.join(index_dir, f"{n}.npy"), mmap_mode="r", allow_pickle=False)
+                  for n in names}
+        return cls(arrays, manifest)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _word_range(self, prefix: str) -> tuple[int, int]:
+        """[lo, hi) of the sorted words starting with ``prefix`` — one trie walk."""
+        node = 0
+        for ch in prefix.encode("ascii"):
+            start, end = self._child_offsets[node], self._child_offsets[node + 1]
+            i = self._child_chars.find(ch, start, end)
+            if i < 0:
+                return 0, 0
+            node = int(self.child_nodes[i])
+        return int(self.node_lo[node]), int(self.node_hi[node])
+
+    def _prefix_postings(self, prefix: str) -> np.ndarray:
+        """Entries with a word starting with ``prefix`` (may repeat): one CSR slice."""
+        lo, hi = self._word_range(prefix)
+        return self.word_postings[self.word_offsets[lo]:self.word_offsets[hi]]
+
+    def search(self, query: str, k: int = 10, sources: list[str] | None = None) -> list[dict]:
+        """Top ``k`` entries for ``query``, best first: ``{"text", "source", "ref", "score"}``."""
+        q = fold(query)
+        if not q or not len(self):
+            return []
+        _, codes = _trigrams([" " + q])
+        codes = np.unique(codes)
+        offsets = self.trigram_offsets
+        hits = [self.trigram_postings[offsets[c]:offsets[c + 1]] for c in codes.tolist()]
+        shared = np.bincount(np.concatenate(hits) if hits else np.empty(0, np.int32), minlength=len(self))
+
+        prefix = np.zeros(len(self), dtype=bool)
+        prefix[self._prefix_postings(q.rsplit(" ", 1)[-1])] = True
+        # Entries sharing under a third of the query's trigrams cannot rank — skip them early
+        keep = (shared >= max(1, len(codes) // 3)) | prefix
+        if sources is not None:
+            keep &= np.isin(self.entry_source, [self.sources.index(s) for s in sources])
+        candidates = np.flatnonzero(keep)
+        if not len(candidates):
+            return []
+
+        lead_lo, lead_hi = self._word_range(q.split(" ", 1)[0])
+        lead = self.entry_first_word[candidates]
+        score = 2 * shared[candidates] / (len(codes) + self.entry_trigrams[candidates])
+        score += WORD_PREFIX_BONUS * prefix[candidates]
+        score += LEAD_WORD_BONUS * ((lead >= lead_lo) & (lead < lead_hi))
+        if len(candidates) > k:
+            keep = np.argpartition(-score, k)[:k]
+            candidates, score = candidates[keep], score[keep]
+        # Best first; shorter entries win ties ("Paneer" before "Paneer tikka masala, restaurant")
+        order = np.lexsort((self.entry_length[candidates], -score))
+        return [{"text": self.texts[e], "source": self.sources[self.entry_source[e]],
+                 "ref": int(self.entry_ref[e]), "score": round(s, 4)}
+                for e, s in zip(candidates[order].tolist(), score[order].tolist())]
+
+
+_SEARCH: FoodSearch | None = None
+
+
+def get_search(index_dir: str | None = None) -> FoodSearch:
+    """The process-wide index: loaded from disk, else compiled in memory from what is available."""
+    global _SEARCH
+    if _SEARCH is not None and index_dir is None:
+        return _SEARCH
+    index_dir = index_dir or APP_CONFIG.FOOD_SEARCH_DIR
+    search = None
+    if os.path.exists(os.path.join(index_dir, MANIFEST_FILE)):
+        try:
+            search = FoodSearch.load(index_dir)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ Cannot load food search {index_dir}: {e}")
+    if search is None:
+        logger.warning(f"⚠️ No food search index in {index_dir} — compiling in memory "
+                       f"(run `python food_search.py build`)")
+        search = FoodSearch(*compile_index(collect_entries()))
+    _SEARCH = search
+    return search
+
+
+def suggest_foods(query: str, k: int = 10) -> list[dict]:
+    """UI / API entry point: ranked suggestions for a partly typed food name."""
+    return get_search().search(query or "", k=k)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cmd", choices=["build", "query"])
+    parser.add_argument("text", nargs="?", default="")
+    parser.add_argument("--dir", default=APP_CONFIG.FOOD_SEARCH_DIR)
+    parser.add_argument("--fdc-dir", default=FDC_DIR)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "build":
+        build(args.dir, args.fdc_dir)
+    else:
+        for r in get_search(args.dir).search(args.text, args.k):
+            print(f"{r['score']:6.3f}  {r['source']:<10} {r['text']}")
+
+
+if __name__ == "__main__":
+    main()
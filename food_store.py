@@ -0,0 +1,290 @@
+"""food_store.py — Compiled FoodData Central nutrient store with a price index.
+
+The FDC export is normalised over dozens of CSVs; serving code wants one row
+per food.  ``build`` joins them once into parallel arrays sorted by
+``fdc_id`` and saves them next to a JSON manifest:
+
+    fdc_id          int64   (n,)   sorted, the lookup key
+    category        int16   (n,)   index into manifest["categories"]
+    protein/fat/carbs float32 (n,) g per 100 g
+    atwater         float32 (n, 3) kcal per g of protein, carbs, fat
+    energy          float32 (n,)   kcal per 100 g = macros · atwater
+    price_per_100g  float32 (n,)   USD per 100 g
+    price_source    int8    (n,)   PRICE_SOURCES index
+    portion_key     int64   (m,)   sorted (fdc_id, unit) keys, see ``portions``
+    portion_grams   float32 (m,)   grams per one unit; unit names in manifest["units"]
+
+``FoodStore`` memory-maps the arrays; every query takes an array of ids (or
+a whole matrix of gram amounts) and is a ``searchsorted`` plus gathers, so
+pricing thousands of candidate meals is one call.
+
+Energy uses each food's own Atwater factors from
+``food_calorie_conversion_factor`` (general 4/4/9 where it has none), and
+protein missing from ``food_nutrient`` is derived from nitrogen with the
+food's ``food_protein_conversion_factor`` (6.25 by default).
+
+Prices: the FDC ``market_acquisition`` table records where and how each
+sample was bought (label weight, store, UPC) but has no price field.  When
+an export carries one (``price_usd`` / ``price``), per-acquisition prices are
+normalised by label weight and carried to sample foods through
+``acquisition_samples``, to sub-samples through ``sub_sample_food`` and to
+Foundation foods through ``input_food``.  Anything left unpriced takes its
+category's median observed price, then ``CATEGORY_PRICE_PER_100G``.
+
+    python food_store.py build    # writes models/food_store
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import numpy as np
+import pandas as pd
+
+from config import APP_CONFIG
+from fdc_data import FDC_DIR, load_conversion_factors, load_foods, read_table
+from portions import PortionTable, compile_portions
+
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 3
+MANIFEST_FILE = "food_store.json"
+PRICE_COLUMNS = ("price_usd", "price")
+PRICE_SOURCES = ["category", "acquisition", "sample"]
+
+# Rough US retail reference, USD per 100 g edible weight, by FDC food category
+CATEGORY_PRICE_PER_100G = {
+    "dairy and egg products":            0.90,
+    "spices and herbs":                  3.00,
+    "baby foods":                        1.20,
+    "fats and oils":                     0.80,
+    "poultry products":                  0.90,
+    "soups, sauces, and gravies":        0.60,
+    "sausages and luncheon meats":       1.30,
+    "breakfast cereals":                 0.90,
+    "fruits and fruit juices":           0.50,
+    "pork products":                     1.00,
+    "vegetables and vegetable products": 0.45,
+    "nut and seed products":             2.00,
+    "beef products":                     1.80,
+    "beverages":                         0.25,
+    "finfish and shellfish products":    2.20,
+    "legumes and legume products":       0.40,
+    "lamb, veal, and game products":     2.40,
+    "baked products":                    0.80,
+    "sweets":                            1.00,
+    "cereal grains and pasta":           0.30,
+    "fast foods":                        1.10,
+    "meals, entrees, and side dishes":   1.00,
+    "snacks":                            1.20,
+    "restaurant foods":                  1.50,
+}
+DEFAULT_PRICE_PER_100G = 0.80
+
+# General Atwater factors, kcal per g of protein, carbs, fat; Jones nitrogen factor
+ATWATER_GENERAL = (4.0, 4.0, 9.0)
+NITROGEN_TO_PROTEIN = 6.25
+
+GRAMS_PER_UNIT = {"g": 1.0, "kg": 1000.0, "oz": 28.3495, "lb": 453.592, "lbs": 453.592,
+                  "ml": 1.0, "l": 1000.0, "fl oz": 29.5735}
+_WEIGHT_RE = re.compile(r"([\d.]+)\s*(fl oz|kg|lbs|lb|oz|ml|g|l)\b")
+
+
+def label_grams(text) -> float:
+    """``"16 oz"`` → 453.6; NaN when the label weight cannot be parsed."""
+    m = _WEIGHT_RE.search(str(text).casefold())
+    if not m:
+        return float("nan")
+    try:
+        return float(m.group(1)) * GRAMS_PER_UNIT[m.group(2)]
+    except ValueError:
+        return float("nan")
+
+
+# ─── Build ────────────────────────────────────────────────────────────────────
+def _observed_prices(fdc_dir: str) -> tuple[pd.Series, pd.Index]:
+    """
+    USD per 100 g by fdc_id from priced acquisitions, propagated down to
+    samples; also the ids priced directly (acquisitions themselves).
+    """
+    acq = read_table("market_acquisition", None, fdc_dir)
+    column = next((c for c in PRICE_COLUMNS if acq is not None and c in acq), None)
+    if column is None:
+        if acq is not None:
+            logger.warning("⚠️ market_acquisition has no price column — using category prices")
+        return pd.Series(dtype="float64"), pd.Index([])
+
+    grams = acq["label_weight"].map(label_grams) if "label_weight" in acq else np.nan
+    per_100g = pd.to_numeric(acq[column], errors="coerce") / grams * 100
+    prices = per_100g[np.isfinite(per_100g) & (per_100g > 0)].groupby(acq["fdc_id"]).median()
+    direct = prices.index
+
+    # acquisition → sample → sub-sample, and sample → Foundation food
+    links = [
+        ("acquisition_samples", "fdc_id_of_acquisition_food", "fdc_id_of_sample_food"),
+        ("sub_sample_food",     "fdc_id_of_sample_food",      "fdc_id"),
+        ("input_food",          "fdc_id_of_input_food",       "fdc_id"),
+    ]
+    for table, src, dst in links:
+        edges = read_table(table, [src, dst], fdc_dir)
+        if edges is None:
+            continue
+        carried = edges.assign(price=edges[src].map(prices)).dropna(subset=["price"])
+        derived = carried.groupby(dst)["price"].mean()
+        prices = pd.concat([prices, derived[~derived.index.isin(prices.index)]])
+    return prices, direct
+
+
+def build(out_dir: str, fdc_dir: str = FDC_DIR) -> dict | None:
+    foods = load_foods(fdc_dir)
+    if foods is None:
+        logger.error(f"❌ No FoodData Central foods in {fdc_dir} — food store not built")
+        return None
+    foods = foods.drop_duplicates(subset=["fdc_id"]).sort_values("fdc_id").reset_index(drop=True)
+
+    categories = sorted(set(foods["category"]) | set(CATEGORY_PRICE_PER_100G))
+    cat_idx = foods["category"].map({c: i for i, c in enumerate(categories)})
+
+    factors = load_conversion_factors(fdc_dir)
+    if factors is None:
+        factors = pd.DataFrame(columns=["protein", "fat", "carbs", "nitrogen"], dtype="float64")
+    by_food = factors.reindex(foods["fdc_id"])
+    atwater = np.column_stack([by_food[key].fillna(default).to_numpy(np.float64)
+                               for key, default in zip(("protein", "carbs", "fat"), ATWATER_GENERAL)])
+    foods["protein"] = foods["protein"].fillna(
+        foods["nitrogen"] * by_food["nitrogen"].fillna(NITROGEN_TO_PROTEIN).to_numpy())
+    macros = foods[["protein", "carbs", "fat"]].to_numpy(np.float64)
+    energy = np.where(np.isnan(macros).all(axis=1), np.nan, (np.nan_to_num(macros) * atwater).sum(axis=1))
+
+    observed, direct = _observed_prices(fdc_dir)
+    price = foods["fdc_id"].map(observed)
+    source = np.where(price.notna(), PRICE_SOURCES.index("sample"), PRICE_SOURCES.index("category"))
+    source[foods["fdc_id"].isin(direct).to_numpy()] = PRICE_SOURCES.index("acquisition")
+    category_median = price.groupby(foods["category"]).transform("median")
+    reference = foods["category"].map(CATEGORY_PRICE_PER_100G).fillna(DEFAULT_PRICE_PER_100G)
+    price = price.fillna(category_median).fillna(reference)
+
+    arrays = {
+        "fdc_id":         foods["fdc_id"].to_numpy(np.int64),
+        "category":       cat_idx.to_numpy(np.int16),
+        "protein":        foods["protein"].to_numpy(np.float32),
+        "fat":            foods["fat"].to_numpy(np.float32),
+        "carbs":          foods["carbs"].to_numpy(np.float32),
+        "atwater":        atwater.astype(np.float32),
+        "energy":         energy.astype(np.float32),
+        "price_per_100g": price.to_numpy(np.float32),
+        "price_source":   source.astype(np.int8),
+    }
+    portions = compile_portions(fdc_dir) or {"keys": np.empty(0, np.int64),
+                                             "grams": np.empty(0, np.float32), "units": []}
+    arrays["portion_key"], arrays["portion_grams"] = portions["keys"], portions["grams"]
+    os.makedirs(out_dir, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr, allow_pickle=False)
+
+    manifest = {
+        "version":      STORE_VERSION,
+        "fdc_dir":      fdc_dir,
+        "categories":   categories,
+        "descriptions": foods["description"].tolist(),
+        "priced":       int((source != PRICE_SOURCES.index("category")).sum()),
+        "units":        portions["units"],
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    logger.info(f"✅ Food store: {len(foods):,} foods, {manifest['priced']:,} with observed prices "
+                f"→ {out_dir}")
+    return manifest
+
+
+# ─── Serve ────────────────────────────────────────────────────────────────────
+class FoodStore:
+    def __init__(self, store_dir: str):
+        with open(os.path.join(store_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != STORE_VERSION:
+            raise ValueError(f"{store_dir}: unsupported food store version {manifest.get('version')!r}")
+        self.categories: list[str] = manifest["categories"]
+        self.descriptions: list[str] = manifest["descriptions"]
+
+        def load(name):
+            return np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+
+        self.fdc_id = load("fdc_id")
+        self.category = load("category")
+        self.protein, self.fat, self.carbs = load("protein"), load("fat"), load("carbs")
+        self.atwater, self.energy = load("atwater"), load("energy")
+        self.price_per_100g = load("price_per_100g")
+        self.price_source = load("price_source")
+        self.portions = PortionTable(load("portion_key"), load("portion_grams"), manifest["units"])
+
+    def __len__(self) -> int:
+        return len(self.fdc_id)
+
+    def rows(self, fdc_ids) -> np.ndarray:
+        """Row of each id (any shape); -1 where the id is not in the store."""
+        ids = np.asarray(fdc_ids, dtype=np.int64)
+        if not len(self):
+            return np.full(ids.shape, -1)
+        pos = np.searchsorted(self.fdc_id, ids).clip(0, len(self) - 1)
+        return np.where(self.fdc_id[pos] == ids, pos, -1)
+
+    def prices(self, fdc_ids) -> np.ndarray:
+        """USD per 100 g for each id; NaN where unknown."""
+        rows = self.rows(fdc_ids)
+        return np.where(rows >= 0, np.asarray(self.price_per_100g)[rows.clip(0)], np.nan)
+
+    def cost(self, fdc_ids, grams) -> np.ndarray:
+        """
+        Cost of ``grams`` (…, k) of the foods ``fdc_ids`` (k,) or (…, k), summed
+        over the last axis — e.g. a (n_meals, k) ingredient matrix priced at once.
+        Unknown ids cost nothing.
+        """
+        per_g = np.nan_to_num(self.prices(fdc_ids)) / 100
+        return (np.asarray(grams, dtype=np.float64) * per_g).sum(axis=-1)
+
+    def kcal(self, fdc_ids, grams) -> np.ndarray:
+        """Energy of ``grams`` of ``fdc_ids``, summed over the last axis like ``cost``."""
+        rows = self.rows(fdc_ids)
+        per_g = np.where(rows >= 0, np.nan_to_num(np.asarray(self.energy)[rows.clip(0)]), 0.0) / 100
+        return (np.asarray(grams, dtype=np.float64) * per_g).sum(axis=-1)
+
+
+_STORE: FoodStore | None = None
+_STORE_LOADED = False
+
+
+def get_store(store_dir: str | None = None) -> FoodStore | None:
+    """The process-wide store, or None when it has not been built."""
+    global _STORE, _STORE_LOADED
+    if _STORE_LOADED and store_dir is None:
+        return _STORE
+    store_dir = store_dir or APP_CONFIG.FOOD_STORE_DIR
+    store = None
+    if os.path.exists(os.path.join(store_dir, MANIFEST_FILE)):
+        try:
+            store = FoodStore(store_dir)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ Cannot load food store {store_dir}: {e}")
+    _STORE, _STORE_LOADED = store, True
+    return store
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cmd", choices=["build"])
+    parser.add_argument("--dir", default=APP_CONFIG.FOOD_STORE_DIR)
+    parser.add_argument("--fdc-dir", default=FDC_DIR)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if build(args.dir, args.fdc_dir) is None:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""grocery.py — Weekly shopping lists from diet plans.
+
+A plan's 35 meals become meal ids, meal ids become a servings-count row per
+household (``np.bincount`` over every member's week, scaled by servings),
+and one multiply with ``RECIPE_BOOK.grams`` gives grams eaten of every
+ingredient.  ``PURCHASE`` then turns eaten grams into what is bought — dry
+rice for cooked, raw chicken for roasted — and whole packs, all as array
+ops, so a list costs well under a millisecond and is built on every plan.
+"""
+
+from __future__ import annotations
+
+import logging
+import numpy as np
+
+from planner import RECIPE_BOOK
+from recipes import INGREDIENTS
+
+
+logger = logging.getLogger(__name__)
+
+# Ingredient → (pack, grams per pack, grams bought per gram eaten)
+PURCHASE = {
+    "oats":              ("1 kg bag", 1000, 1.0),
+    "milk":              ("half gallon", 1950, 1.0),
+    "almond_milk":       ("half gallon", 1890, 1.0),
+    "oat_milk":          ("half gallon", 1890, 1.0),
+    "coconut_milk":      ("quart carton", 946, 1.0),
+    "yogurt":            ("32 oz tub", 907, 1.0),
+    "greek_yogurt":      ("32 oz tub", 907, 1.0),
+    "coconut_yogurt":    ("24 oz tub", 680, 1.0),
+    "paneer":            ("200 g block", 200, 1.0),
+    "cottage_cheese":    ("16 oz tub", 454, 1.0),
+    "feta":              ("6 oz pack", 170, 1.0),
+    "cheese":            ("8 oz block", 227, 1.0),
+    "parmesan":          ("5 oz tub", 142, 1.0),
+    "ghee":              ("16 oz jar", 454, 1.0),
+    "egg":               ("dozen", 600, 1.0),
+    "protein_powder":    ("2 lb tub", 907, 1.0),
+
+    "rice":              ("2 lb bag", 907, 0.35),
+    "brown_rice":        ("2 lb bag", 907, 0.38),
+    "quinoa":            ("1 lb bag", 454, 0.37),
+    "couscous":          ("10 oz box", 283, 0.36),
+    "poha":              ("500 g pack", 500, 1.0),
+    "pasta":             ("1 lb box", 454, 0.45),
+    "chickpea_pasta":    ("8 oz box", 227, 0.45),
+    "roti":              ("pack of 10", 400, 1.0),
+    "millet_roti":       ("1 kg millet flour", 1000, 0.7),
+    "idli":              ("1 kg batter", 1000, 1.0),
+    "whole_grain_bread": ("loaf", 570, 1.0),
+    "whole_grain_roll":  ("pack of 6", 258, 1.0),
+    "sourdough":         ("loaf", 680, 1.0),
+    "tortilla":          ("pack of 8", 400, 1.0),
+    "corn_tortilla":     ("pack of 30", 780, 1.0),
+    "crackers":          ("8.5 oz box", 241, 1.0),
+    "granola":           ("12 oz bag", 340, 1.0),
+    "pancakes":          ("2 lb pancake mix", 907, 0.5),
+    "pita":              ("pack of 6", 384, 1.0),
+    "bulgur":            ("1 lb bag", 454, 0.4),
+    "soba":              ("8 oz pack", 227, 0.45),
+    "rice_noodles":      ("14 oz pack", 397, 0.4),
+
+    "lentils":           ("1 lb bag", 454, 0.4),
+    "mung_beans":        ("1 lb bag", 454, 0.4),
+    "chickpeas":         ("15 oz can", 240, 1.0),
+    "roasted_chana":     ("200 g pack", 200, 1.0),
+    "kidney_beans":      ("15 oz can", 240, 1.0),
+    "black_beans":       ("15 oz can", 240, 1.0),
+    "sprouts":           ("12 oz pack", 340, 1.0),
+    "sambar":            ("1 lb toor dal", 454, 0.15),
+    "papad":             ("pack of 20", 240, 1.0),
+    "tofu":              ("14 oz block", 397, 1.0),
+    "tempeh":            ("8 oz pack", 227, 1.0),
+    "edamame":           ("12 oz frozen bag", 340, 1.0),
+    "hummus":            ("10 oz tub", 283, 1.0),
+    "fava_beans":        ("15 oz can", 240, 1.0),
+    "falafel":           ("12 oz frozen bag", 340, 1.0),
+    "soy_milk":          ("half gallon", 1890, 1.0),
+    "miso":              ("14 oz tub", 400, 1.0),
+
+    "chicken_breast":    ("1 lb pack", 454, 1.33),
+    "chicken_thigh":     ("1.5 lb pack", 680, 1.33),
+    "chicken_sausage":   ("12 oz pack", 340, 1.0),
+    "turkey_bacon":      ("12 oz pack", 340, 1.0),
+    "turkey_slices":     ("8 oz pack", 227, 1.0),
+    "bacon":             ("12 oz pack", 340, 2.8),
+    "mutton":            ("1 lb ground", 454, 1.35),
+    "beef":              ("1 lb steak", 454, 1.35),
+    "fish":              ("1 lb fillets", 454, 1.3),
+    "salmon":            ("1 lb fillet", 454, 1.3),
+    "tuna":              ("5 oz can", 113, 1.0),
+    "shrimp":            ("1 lb frozen bag", 454, 1.2),
+
+    "lettuce":           ("head", 626, 1.0),
+    "mixed_veg":         ("1 lb frozen bag", 454, 1.0),
+    "spinach":           ("10 oz bag", 283, 1.0),
+    "cucumber":          ("each", 301, 1.0),
+    "onion":             ("3 lb bag", 1360, 1.0),
+    "tomato":            ("each", 123, 1.0),
+    "carrot":            ("2 lb bag", 907, 1.0),
+    "celery":            ("bunch", 450, 1.0),
+    "bell_pepper":       ("each", 119, 1.0),
+    "broccoli":          ("head", 608, 1.0),
+    "asparagus":         ("bunch", 454, 1.0),
+    "bok_choy":          ("head", 500, 1.0),
+    "sweet_potato":      ("each", 130, 1.14),
+    "portobello":        ("pack of 2", 240, 1.0),
+    "eggplant":          ("each", 458, 1.0),
+    "kimchi":            ("16 oz jar", 454, 1.0),
+    "marinara":          ("24 oz jar", 680, 1.0),
+    "salsa":             ("16 oz jar", 454, 1.0),
+    "guacamole":         ("8 oz tub", 227, 1.0),
+    "coconut_chutney":   ("200 g grated coconut", 200, 0.5),
+
+    "banana":            ("each", 118, 1.0),
+    "apple":             ("each", 182, 1.0),
+    "berries":           ("pint", 296, 1.0),
+    "pineapple":         ("each", 905, 1.0),
+    "avocado":           ("each", 150, 1.0),
+    "acai":              ("4-pack frozen", 400, 1.0),
+    "dates":             ("12 oz box", 340, 1.0),
+
+    "peanuts":           ("16 oz jar", 454, 1.0),
+    "peanut_butter":     ("16 oz jar", 454, 1.0),
+    "almonds":           ("16 oz bag", 454, 1.0),
+    "almond_butter":     ("12 oz jar", 340, 1.0),
+    "walnuts":           ("8 oz bag", 227, 1.0),
+    "pistachios":        ("8 oz bag", 227, 1.0),
+    "chia":              ("12 oz bag", 340, 1.0),
+    "flaxseed":          ("16 oz bag", 454, 1.0),
+    "hemp_seeds":        ("8 oz bag", 227, 1.0),
+    "pumpkin_seeds":     ("8 oz bag", 227, 1.0),
+    "makhana":           ("100 g pack", 100, 1.0),
+    "tahini":            ("16 oz jar", 454, 1.0),
+    "nutritional_yeast": ("4.5 oz tub", 128, 1.0),
+    "dark_chocolate":    ("3.5 oz bar", 100, 1.0),
+
+    "oil":               ("48 oz bottle", 1300, 1.0),
+    "olive_oil":         ("500 ml bottle", 460, 1.0),
+    "vinaigrette":       ("16 oz bottle", 473, 1.0),
+    "maple_syrup":       ("12 oz bottle", 470, 1.0),
+    "soy_sauce":         ("10 oz bottle", 296, 1.0),
+    "spices":            ("3 oz jar", 85, 1.0),
+    "tea":               ("box of 20 bags", 40, 0.0084),
+}
+DEFAULT_PACK = ("100 g", 100, 1.0)       # anything without an entry is sold loose by weight
+
+AISLES = {
+    "Produce":          ["lettuce", "mixed_veg", "spinach", "cucumber", "onion", "tomato", "carrot",
+                         "celery", "bell_pepper", "broccoli", "asparagus", "bok_choy", "sweet_potato",
+                         "portobello", "eggplant", "banana", "apple", "berries", "pineapple", "avocado",
+                         "acai", "dates", "sprouts"],
+    "Dairy & eggs":     ["milk", "yogurt", "greek_yogurt", "paneer", "cottage_cheese", "feta", "cheese",
+                         "parmesan", "ghee", "egg"],
+    "Meat & seafood":   ["chicken_breast", "chicken_thigh", "chicken_sausage", "turkey_bacon",
+                         "turkey_slices", "bacon", "mutton", "beef", "fish", "salmon", "shrimp"],
+    "Tofu & plant milk": ["tofu", "tempeh", "edamame", "almond_milk", "oat_milk", "coconut_milk",
+                          "coconut_yogurt", "hummus", "guacamole", "soy_milk", "miso", "kimchi",
+                          "falafel"],
+    "Bakery":           ["roti", "whole_grain_bread", "whole_grain_roll", "sourdough", "tortilla",
+                         "corn_tortilla", "idli", "pita"],
+    "Grains & legumes": ["oats", "rice", "brown_rice", "quinoa", "couscous", "poha", "pasta",
+                         "chickpea_pasta", "millet_roti", "granola", "pancakes", "lentils", "mung_beans",
+                         "chickpeas", "roasted_chana", "kidney_beans", "black_beans", "sambar", "papad",
+                         "crackers", "tuna", "bulgur", "soba", "rice_noodles", "fava_beans"],
+    "Nuts & seeds":     ["peanuts", "peanut_butter", "almonds", "almond_butter", "walnuts", "pistachios",
+                         "chia", "flaxseed", "hemp_seeds", "pumpkin_seeds", "makhana", "tahini"],
+    "Pantry":           ["oil", "olive_oil", "vinaigrette", "maple_syrup", "spices", "tea", "marinara",
+                         "salsa", "coconut_chutney", "nutritional_yeast", "dark_chocolate",
+                         "protein_powder", "soy_sauce"],
+}
+OTHER_AISLE = "Other"
+
+
+# ─── Compiled purchase table ─────────────────────────────────────────────────
+class GroceryTable:
+    """``PURCHASE`` / ``AISLES`` as arrays aligned with ``book.ingredients``."""
+
+    def __init__(self, book=RECIPE_BOOK):
+        self.book = book
+        specs = [PURCHASE.get(key, DEFAULT_PACK) for key in book.ingredients]
+        self.pack_names = [spec[0] for spec in specs]
+        self.pack_grams = np.array([spec[1] for spec in specs], dtype=np.float64)
+        self.bought_per_eaten = np.array([spec[2] for spec in specs], dtype=np.float64)
+
+        self.aisles = list(AISLES) + [OTHER_AISLE]
+        aisle_of = {key: a for a, keys in enumerate(AISLES.values()) for key in keys}
+        self.aisle = np.array([aisle_of.get(key, len(AISLES)) for key in book.ingredients], dtype=np.int16)
+        # Display order: by aisle, then as listed in INGREDIENTS
+        self.order = np.lexsort((np.arange(len(self.aisle)), self.aisle))
+        self.names = [key.replace("_", " ").capitalize() for key in book.ingredients]
+        missing = [key for key in INGREDIENTS if key not in PURCHASE]
+        if missing:
+            logger.warning(f"⚠️ No pack size for {len(missing)} ingredient(s), e.g. {missing[0]!r} "
+                           f"— sold by {DEFAULT_PACK[0]}")
+
+    def household_grams(self, meal_ids, household=None, servings=None) -> np.ndarray:
+        """
+        (n_households, n_ingredients) grams eaten.  ``meal_ids`` is
+        (n_plans, …) ``book`` meal ids, one plan per member; ``household``
+        (n_plans,) groups members (default: each plan its own household);
+        ``servings`` broadcasts against ``meal_ids`` like ``RecipeBook.counts``.
+        """
+        counts = self.book.counts(meal_ids, servings)
+        if household is not None:
+            household = np.asarray(household, dtype=np.int64)
+            grouped = np.zeros((int(household.max()) + 1 if len(household) else 0, counts.shape[1]))
+            np.add.at(grouped, household, counts)
+            counts = grouped
+        return self.book.ingredient_grams(counts)
+
+    def purchase(self, grams) -> tuple[np.ndarray, np.ndarray]:
+        """Grams to buy and whole packs (any leading shape) for grams eaten."""
+        bought = np.asarray(grams, dtype=np.float64) * self.bought_per_eaten
+        packs = np.ceil(bought / self.pack_grams - 1e-9).astype(np.int64)
+        return bought, packs
+
+    def shopping_list(self, grams) -> list[dict]:
+        """One household's (n_ingredients,) grams eaten → list entries, grouped by aisle."""
+        bought, packs = self.purchase(grams)
+        rows = self.order[bought[self.order] > 0]
+        return [{
+            "ingredient": self.book.ingredients[j],
+            "name":       self.names[j],
+            "aisle":      self.aisles[self.aisle[j]],
+            "grams":      round(float(bought[j])),
+            "packs":      int(packs[j]),
+            "pack":       self.pack_names[j],
+        } for j in rows.tolist()]
+
+
+GROCERY_TABLE = GroceryTable()
+
+
+def grocery_list(weekly_plan: list[dict], household_size: int = 1) -> list[dict]:
+    """Shopping list for a ``DietPlanner`` week (at its servings) cooked for ``household_size`` people."""
+    ids = RECIPE_BOOK.plan_ids(weekly_plan)[None]
+    servings = RECIPE_BOOK.plan_servings(weekly_plan)[None] * max(int(household_size), 1)
+    grams = GROCERY_TABLE.household_grams(ids, servings=servings)
+    return GROCERY_TABLE.shopping_list(grams[0])
+
+
+def family_grocery_lists(weekly_plans: list[list[dict]], household: list[int],
+                         servings: list[float] | None = None) -> list[list[dict]]:
+    """
+    One list per household for many members' weeks at once: ``household[i]``
+    is member ``i``'s household, ``servings[i]`` their portion (default 1)
+    on top of each meal's planned ``servings``.
+    """
+    ids = np.stack([RECIPE_BOOK.plan_ids(plan) for plan in weekly_plans])
+    scale = np.stack([RECIPE_BOOK.plan_servings(plan) for plan in weekly_plans])
+    if servings is not None:
+        scale = scale * np.asarray(servings, dtype=np.float64)[:, None, None]
+    grams = GROCERY_TABLE.household_grams(ids, household, scale)
+    return [GROCERY_TABLE.shopping_list(row) for row in grams]
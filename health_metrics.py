@@ -1,5 +1,7 @@
 """health_metrics.py — BMI, BMR, TDEE and related computations."""
 
+import numpy as np
+
 ACTIVITY_MULTIPLIERS = {
     "Sedentary":        1.2,
     "Lightly Active":   1.375,
@@ -8,6 +10,15 @@ ACTIVITY_MULTIPLIERS = {
     "Extremely Active": 1.9,
 }
 
+# Closed-form daily target relative to TDEE (fallback when the calorie model is unavailable)
+GOAL_CALORIE_FACTORS = {
+    "Weight Loss":     0.80,
+    "Muscle Gain":     1.10,
+    "Endurance":       1.05,
+    "General Fitness": 1.00,
+    "Maintenance":     1.00,
+}
+
 BMI_CATEGORIES = [
     (0,    18.5, "Underweight",    "🔵"),
     (18.5, 25.0, "Normal Weight",  "🟢"),
@@ -49,6 +60,11 @@ class HealthMetrics:
         multiplier = ACTIVITY_MULTIPLIERS.get(self.activity, 1.55)
         return self.bmr() * multiplier
 
+    def target_calories(self) -> float:
+        """TDEE scaled by goal, clipped to the same range as the calorie model."""
+        target = self.tdee() * GOAL_CALORIE_FACTORS.get(self.goal, 1.0)
+        return float(np.clip(target, 1200, 6000))
+
     def ideal_weight_range(self) -> tuple[float, float]:
         """BMI 18.5–24.9 → kg range."""
         h_m = self.height / 100
@@ -61,3 +77,26 @@ class HealthMetrics:
             return round(1.20 * b + 0.23 * self.age - 16.2, 1)
         else:
             return round(1.20 * b + 0.23 * self.age - 5.4, 1)
+
+
+# ─── Vectorised equivalents (training, batch reporting) ───────────────────────
+def bmi_array(weight_kg, height_cm):
+    h_m = np.asarray(height_cm, dtype=np.float64) / 100
+    return np.asarray(weight_kg, dtype=np.float64) / h_m ** 2
+
+
+def bmr_array(gender, weight_kg, height_cm, age):
+    """Harris-Benedict revised, element-wise; ``gender`` is an array of labels."""
+    w, h, a = (np.asarray(x, dtype=np.float64) for x in (weight_kg, height_cm, age))
+    male = np.asarray(gender) == "Male"
+    return np.where(
+        male,
+        88.362 + 13.397 * w + 4.799 * h - 5.677 * a,
+        447.593 + 9.247 * w + 3.098 * h - 4.330 * a,
+    )
+
+
+def tdee_array(bmr, activity_level):
+    labels, inverse = np.unique(np.asarray(activity_level, dtype=str), return_inverse=True)
+    mult = np.array([ACTIVITY_MULTIPLIERS.get(a, 1.55) for a in labels])
+    return np.asarray(bmr, dtype=np.float64) * mult[inverse]
@@ -0,0 +1,78 @@
+"""load_control.py — Request deadlines and admission control for plan generation.
+
+``Deadline`` is created once per request and handed down through the
+pipeline stages so each can decide whether it still has budget.
+``AdmissionController`` bounds concurrency: at most ``max_concurrent``
+requests run, at most ``max_queue`` wait, and a waiter gives up once its
+deadline can no longer be met — excess load is shed immediately instead of
+growing an unbounded queue whose tail latency collapses.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Overloaded(RuntimeError):
+    """Raised when a request is shed by admission control."""
+
+
+class Deadline:
+    def __init__(self, budget_s: float | None):
+        self.budget_s = budget_s
+        self._end = None if budget_s is None else time.monotonic() + budget_s
+
+    def remaining(self) -> float:
+        return float("inf") if self._end is None else self._end - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self.stats = {"admitted": 0, "shed_queue_full": 0, "shed_deadline": 0,
+                      "max_wait_s": 0.0, "total_wait_s": 0.0}
+
+    @contextmanager
+    def admit(self, deadline: Deadline):
+        start = time.monotonic()
+        with self._cond:
+            if self._running >= self.max_concurrent and self._waiting >= self.max_queue:
+                self.stats["shed_queue_full"] += 1
+                raise Overloaded("plan queue is full")
+            self._waiting += 1
+            try:
+                while self._running >= self.max_concurrent:
+                    remaining = deadline.remaining()
+                    if remaining <= 0 or not self._cond.wait(timeout=min(remaining, 3600)):
+                        if self._running >= self.max_concurrent:
+                            self.stats["shed_deadline"] += 1
+                            raise Overloaded("deadline expired while queued")
+            finally:
+                self._waiting -= 1
+            self._running += 1
+            waited = time.monotonic() - start
+            self.stats["admitted"] += 1
+            self.stats["total_wait_s"] += waited
+            self.stats["max_wait_s"] = max(self.stats["max_wait_s"], waited)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return dict(self.stats, running=self._running, waiting=self._waiting)
@@ -0,0 +1,190 @@
+"""meal_bank.py — Cultural dish catalogue keyed by (cuisine, diet, course).
+
+The planner's FOOD_DB holds a few recipe-backed meals per cuisine; the wider
+catalogue comes from dish datasets such as ``indian_food.csv`` (Kaggle's
+Indian dishes with diet, course, prep / cook time, state and region).  Each
+source in ``DISH_SOURCES`` yields dish records; ``MealBank`` sorts them once
+by key and total time into parallel arrays with a CSR ``offsets`` array over
+the keys, so a (cuisine, diet, course) lookup is a dict hit plus a slice, an
+unfiltered random draw is one integer over the compatible diets' slices, and
+a "ready in 30 min" limit is one ``searchsorted`` inside each slice — however
+many dishes the bank grows to.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import numpy as np
+
+from fdc_data import FDC_DIR, read_table
+from food_index import tag_name
+
+
+logger = logging.getLogger(__name__)
+
+CUISINES = ["South Asian", "Western", "Middle Eastern", "East Asian"]
+DEFAULT_CUISINE = "Western"
+DIETS = ["Vegan", "Vegetarian", "Non-Vegetarian"]
+COURSES = ["breakfast", "lunch", "snack", "dinner", "dessert"]
+
+# Free-text culture → cuisine; longer aliases are tried first ("southeast asian" before "east asian")
+CUISINE_ALIASES = {
+    "south asian": "South Asian", "indian": "South Asian", "pakistani": "South Asian",
+    "bangladeshi": "South Asian", "sri lankan": "South Asian", "nepali": "South Asian",
+    "desi": "South Asian",
+    "middle eastern": "Middle Eastern", "arab": "Middle Eastern", "lebanese": "Middle Eastern",
+    "levantine": "Middle Eastern", "persian": "Middle Eastern", "iranian": "Middle Eastern",
+    "turkish": "Middle Eastern", "israeli": "Middle Eastern", "egyptian": "Middle Eastern",
+    "moroccan": "Middle Eastern",
+    "east asian": "East Asian", "southeast asian": "East Asian", "chinese": "East Asian",
+    "japanese": "East Asian", "korean": "East Asian", "taiwanese": "East Asian",
+    "vietnamese": "East Asian", "thai": "East Asian",
+    "western": "Western", "american": "Western", "european": "Western", "mediterranean": "Western",
+}
+_ALIASES = sorted(CUISINE_ALIASES.items(), key=lambda kv: -len(kv[0]))
+
+# Planner diet bank → catalogue diets it may draw from (the attribute mask does the rest)
+COMPATIBLE_DIETS = {
+    "Vegan":          ["Vegan", "Vegetarian"],
+    "Vegetarian":     ["Vegan", "Vegetarian"],
+    "Non-Vegetarian": ["Vegan", "Vegetarian", "Non-Vegetarian"],
+}
+
+# indian_food.csv vocabulary → ours; a main course is offered for lunch and dinner
+INDIAN_FOOD_DIETS = {"vegetarian": "Vegetarian", "non vegetarian": "Non-Vegetarian"}
+INDIAN_FOOD_COURSES = {
+    "main course": ["lunch", "dinner"],
+    "starter":     ["snack"],
+    "snack":       ["snack", "breakfast"],
+    "dessert":     ["dessert"],
+}
+
+
+def resolve_cuisine(culture: str) -> str:
+    """UI / free-text culture → one of ``CUISINES`` (``DEFAULT_CUISINE`` when nothing matches)."""
+    folded = (culture or "").casefold()
+    for alias, cuisine in _ALIASES:
+        if alias in folded:
+            return cuisine
+    return DEFAULT_CUISINE
+
+
+# ─── Sources ──────────────────────────────────────────────────────────────────
+def _indian_food_dishes(fdc_dir: str) -> list[dict]:
+    table = read_table("indian_food", ["name", "ingredients", "diet", "prep_time", "cook_time",
+                                       "course", "state", "region"], fdc_dir)
+    if table is None:
+        return []
+    dishes = []
+    for row in table.itertuples(index=False):
+        diet = INDIAN_FOOD_DIETS.get(str(row.diet).strip().casefold())
+        courses = INDIAN_FOOD_COURSES.get(str(row.course).strip().casefold(), [])
+        if not diet or not isinstance(row.name, str):
+            continue
+        # The dataset marks unknown values with -1
+        prep, cook = row.prep_time, row.cook_time
+        minutes = float(prep + cook) if prep >= 0 and cook >= 0 else np.nan
+        region = str(row.region) if str(row.region) not in ("-1", "nan") else None
+        mask = tag_name(f"{row.name}; {row.ingredients}")
+        for course in courses:
+            dishes.append({"item": row.name, "cuisine": "South Asian", "diet": diet, "course": course,
+                           "minutes": minutes, "region": region, "mask": mask,
+                           "source": "indian_food"})
+    return dishes
+
+
+# Source name → loader(fdc_dir) returning dish records; add new cuisines here
+DISH_SOURCES = {
+    "indian_food": _indian_food_dishes,
+}
+
+
+def collect_dishes(fdc_dir: str = FDC_DIR) -> list[dict]:
+    dishes = []
+    for name, load in DISH_SOURCES.items():
+        found = load(fdc_dir)
+        dishes += found
+        logger.info(f"✅ Meal bank source {name}: {len(found):,} dish × course entries")
+    return dishes
+
+
+# ─── Index ────────────────────────────────────────────────────────────────────
+class MealBank:
+    """
+    Dish records sorted by (key, minutes) as parallel arrays; key ``k`` =
+    (cuisine, diet, course) owns rows ``[offsets[k], offsets[k + 1])``, with
+    unknown times (NaN) last.
+    """
+
+    def __init__(self, dishes: list[dict]):
+        self.keys = [(c, d, k) for c in CUISINES for d in DIETS for k in COURSES]
+        self._key_id = {key: i for i, key in enumerate(self.keys)}
+        known = [d for d in dishes if (d["cuisine"], d["diet"], d["course"]) in self._key_id]
+        if len(known) < len(dishes):
+            logger.warning(f"⚠️ Meal bank: {len(dishes) - len(known)} dish(es) outside "
+                           f"CUISINES × DIETS × COURSES skipped")
+
+        key = np.array([self._key_id[(d["cuisine"], d["diet"], d["course"])] for d in known],
+                       dtype=np.int32)
+        minutes = np.array([d.get("minutes", np.nan) for d in known], dtype=np.float64)
+        order = np.lexsort((minutes, key))
+        self.dishes = [known[i] for i in order]
+        self.key, self.minutes = key[order], minutes[order]
+        self.masks = np.array([d.get("mask", 0) for d in self.dishes], dtype=np.uint32)
+        counts = np.bincount(self.key, minlength=len(self.keys))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.dishes)
+
+    def span(self, cuisine: str, diet: str, course: str,
+             max_minutes: float | None = None) -> tuple[int, int]:
+        """[lo, hi) rows of one key, cut at ``max_minutes`` total time when given."""
+        k = self._key_id.get((cuisine, diet, course))
+        if k is None:
+            return 0, 0
+        lo, hi = int(self.offsets[k]), int(self.offsets[k + 1])
+        if max_minutes is not None:
+            hi = lo + int(np.searchsorted(self.minutes[lo:hi], max_minutes, side="right"))
+        return lo, hi
+
+    def rows(self, cuisine: str, diets: list[str], course: str, forbidden: int = 0,
+             max_minutes: float | None = None) -> np.ndarray:
+        """Rows of ``course`` dishes in any of ``diets`` with none of the ``forbidden`` attributes."""
+        spans = [self.span(cuisine, diet, course, max_minutes) for diet in diets]
+        rows = np.concatenate([np.arange(lo, hi) for lo, hi in spans]) if spans else np.empty(0, np.int64)
+        if forbidden:
+            rows = rows[(self.masks[rows] & np.uint32(forbidden)) == 0]
+        return rows
+
+    def draw(self, cuisine: str, diet: str, course: str, rng: random.Random,
+             forbidden: int = 0, max_minutes: float | None = None) -> dict | None:
+        """
+        One random dish for a planner diet bank, or None.  Unfiltered draws
+        are one index into the compatible diets' slices, taken as a single
+        range (each slice weighted by its size); filtered draws only filter
+        those slices.
+        """
+        diets = COMPATIBLE_DIETS.get(diet, [diet])
+        if not forbidden:
+            spans = [self.span(cuisine, d, course, max_minutes) for d in diets]
+            i = rng.randrange(sum(hi - lo for lo, hi in spans) or 1)
+            for lo, hi in spans:
+                if i < hi - lo:
+                    return self.dishes[lo + i]
+                i -= hi - lo
+            return None
+        rows = self.rows(cuisine, diets, course, forbidden, max_minutes)
+        return self.dishes[int(rows[rng.randrange(len(rows))])] if len(rows) else None
+
+
+_BANK: MealBank | None = None
+
+
+def get_meal_bank(fdc_dir: str | None = None) -> MealBank:
+    """The process-wide bank, built on first use from every source that is available."""
+    global _BANK
+    if _BANK is None or fdc_dir is not None:
+        _BANK = MealBank(collect_dishes(fdc_dir or FDC_DIR))
+    return _BANK
@@ -0,0 +1,618 @@
+"""model_artifacts.py — Versioned, pickle-free model artifact format.
+
+An artifact directory holds a ``manifest.json`` plus one ``.npy`` file per
+numeric array (scaler statistics, KMeans centroids, one-hot categories live in
+the manifest, decision-tree node arrays).  The sentence transformer is stored
+in its native ``SentenceTransformer.save`` directory layout.  Every file is
+listed in the manifest with its SHA-256 so a partial copy or a stale file is
+rejected at load time instead of silently producing wrong predictions.
+
+Export once from the legacy pickles::
+
+    python model_artifacts.py export --model-dir . --out models/artifacts
+
+Loading never unpickles: arrays are read with ``allow_pickle=False`` and the
+runtime objects below re-implement ``transform`` / ``predict`` in NumPy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME    = "planner-model-artifacts"
+FORMAT_VERSION = 1
+MANIFEST_FILE  = "manifest.json"
+
+# Manifest keys for the calorie regressor, one per backend (see calorie_models)
+CALORIE_BACKEND_KEYS = ("dtr", "hgb", "ridge")
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact directory is missing, corrupt or incompatible."""
+
+
+# ─── Runtime objects (NumPy re-implementations) ───────────────────────────────
+def _as_array(X, columns: list | None = None) -> np.ndarray:
+    """Select ``columns`` from a DataFrame (if given) and return a 2-D array."""
+    if hasattr(X, "columns") and columns is not None:
+        X = X[columns]
+    arr = X.to_numpy() if hasattr(X, "to_numpy") else np.asarray(X)
+    return arr.reshape(1, -1) if arr.ndim == 1 else arr
+
+
+class AffineTransform:
+    """``X * scale + offset`` — covers StandardScaler and MinMaxScaler."""
+
+    def __init__(self, scale: np.ndarray, offset: np.ndarray, columns: list | None = None):
+        self.scale   = scale
+        self.offset  = offset
+        self.columns = columns
+
+    def transform(self, X) -> np.ndarray:
+        arr = _as_array(X, self.columns).astype(np.float64)
+        return arr * self.scale + self.offset
+
+
+class MeanImputer:
+    """Replaces NaNs column-wise with fitted statistics (SimpleImputer)."""
+
+    def __init__(self, statistics: np.ndarray, columns: list | None = None):
+        self.statistics = statistics
+        self.columns    = columns
+
+    def transform(self, X) -> np.ndarray:
+        arr = _as_array(X, self.columns).astype(np.float64)
+        return np.where(np.isnan(arr), self.statistics, arr)
+
+
+class OneHot:
+    """OneHotEncoder with ``handle_unknown='ignore'`` semantics."""
+
+    def __init__(self, categories: list[list], drop: list[int], columns: list | None = None):
+        self.categories = categories
+        self.drop       = drop
+        self.columns    = columns
+        self._lookup    = [{c: i for i, c in enumerate(cats)} for cats in categories]
+
+    def transform(self, X) -> np.ndarray:
+        arr  = _as_array(X, self.columns)
+        blocks = []
+        for j, (cats, lookup, drop) in enumerate(zip(self.categories, self._lookup, self.drop)):
+            block = np.zeros((arr.shape[0], len(cats)))
+            for row, value in enumerate(arr[:, j]):
+                idx = lookup.get(value.item() if hasattr(value, "item") else value)
+                if idx is not None:
+                    block[row, idx] = 1.0
+            if drop >= 0:
+                block = np.delete(block, drop, axis=1)
+            blocks.append(block)
+        return np.hstack(blocks) if blocks else np.empty((arr.shape[0], 0))
+
+
+class Passthrough:
+    def __init__(self, columns: list | None = None):
+        self.columns = columns
+
+    def transform(self, X) -> np.ndarray:
+        return _as_array(X, self.columns).astype(np.float64)
+
+
+class Pipeline:
+    """Sequential steps; only the first step selects input columns."""
+
+    def __init__(self, steps: list, columns: list | None = None):
+        self.steps   = steps
+        self.columns = columns
+
+    def transform(self, X) -> np.ndarray:
+        out = _as_array(X, self.columns)
+        for step in self.steps:
+            out = step.transform(out)
+        return out
+
+
+class ColumnTransformer:
+    def __init__(self, parts: list):
+        self.parts = parts
+
+    def transform(self, X) -> np.ndarray:
+        return np.hstack([p.transform(X) for p in self.parts])
+
+
+class NearestCentroid:
+    """KMeans.predict as an argmin over squared distances to the centroids."""
+
+    def __init__(self, centers: np.ndarray):
+        self.centers  = centers
+        self._sq_norm = np.einsum("ij,ij->i", centers, centers)
+
+    def predict(self, X) -> np.ndarray:
+        arr = _as_array(X).astype(np.float64)
+        # ‖x‖² is constant per row, so argmin(‖c‖² − 2x·c) is enough
+        return np.argmin(self._sq_norm - 2.0 * arr @ self.centers.T, axis=1)
+
+
+class TreeRegressor:
+    """DecisionTreeRegressor.predict over flattened node arrays."""
+
+    def __init__(self, children_left, children_right, feature, threshold, value):
+        self.children_left  = children_left
+        self.children_right = children_right
+        self.feature        = feature
+        self.threshold      = threshold
+        self.value          = value
+        self.n_features     = int(feature.max()) + 1 if feature.size else 0
+
+    def predict(self, X) -> np.ndarray:
+        # sklearn compares float32 inputs against float64 thresholds
+        arr  = _as_array(X).astype(np.float32)
+        rows = np.arange(arr.shape[0])
+        node = np.zeros(arr.shape[0], dtype=np.intp)
+        while True:
+            left   = self.children_left[node]
+            active = left != -1
+            if not active.any():
+                return self.value[node]
+            feat    = np.where(active, self.feature[node], 0)
+            go_left = arr[rows, feat] <= self.threshold[node]
+            node    = np.where(active, np.where(go_left, left, self.children_right[node]), node)
+
+
+class TreeEnsemble:
+    """
+    Sum of regression trees kept in one flat node table (HistGradientBoosting).
+    All trees are walked together: ``node`` is an (n_rows, n_trees) index array.
+    """
+
+    def __init__(self, roots, children_left, children_right, feature, threshold,
+                 value, missing_left, baseline):
+        self.roots          = roots
+        self.children_left  = children_left
+        self.children_right = children_right
+        self.feature        = feature
+        self.threshold      = threshold
+        self.value          = value
+        self.missing_left   = missing_left
+        self.baseline       = float(baseline[0])
+        self.n_features     = int(feature.max()) + 1 if feature.size else 0
+
+    def predict(self, X) -> np.ndarray:
+        arr  = _as_array(X).astype(np.float64)
+        rows = np.arange(arr.shape[0])[:, None]
+        node = np.repeat(self.roots[None, :], arr.shape[0], axis=0).astype(np.intp)
+        while True:
+            left   = self.children_left[node]
+            active = left != -1
+            if not active.any():
+                return self.baseline + self.value[node].sum(axis=1)
+            x       = arr[rows, np.where(active, self.feature[node], 0)]
+            go_left = (x <= self.threshold[node]) | (np.isnan(x) & self.missing_left[node])
+            node    = np.where(active, np.where(go_left, left, self.children_right[node]), node)
+
+
+class LinearRegressor:
+    """``RidgeCalorieModel.predict`` without the class: expand, then one GEMV."""
+
+    def __init__(self, coef, intercept, interaction_idx):
+        self.coef            = coef
+        self.intercept       = float(intercept[0])
+        self.interaction_idx = interaction_idx
+
+    def predict(self, X) -> np.ndarray:
+        arr = _as_array(X).astype(np.float64)
+        Z = np.hstack([arr] + [arr * arr[:, [i]] for i in self.interaction_idx])
+        return Z @ self.coef + self.intercept
+
+
+# ─── Checksums & array I/O ────────────────────────────────────────────────────
+def _sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def entry_checksum(entry: dict) -> str:
+    """Digest of a manifest entry — it lists every file's sha256, so this names the model version."""
+    return hashlib.sha256(json.dumps(entry, sort_keys=True).encode()).hexdigest()
+
+
+def file_checksum(path: str) -> str:
+    return _sha256(path)
+
+
+def _save_array(out_dir: str, name: str, arr: np.ndarray) -> dict:
+    arr  = np.ascontiguousarray(arr)
+    file = f"{name}.npy"
+    path = os.path.join(out_dir, file)
+    np.save(path, arr, allow_pickle=False)
+    return {"file": file, "sha256": _sha256(path),
+            "shape": list(arr.shape), "dtype": str(arr.dtype)}
+
+
+def _load_array(art_dir: str, spec: dict, verify: bool = True) -> np.ndarray:
+    path = os.path.join(art_dir, spec["file"])
+    if not os.path.exists(path):
+        raise ArtifactError(f"missing array file {spec['file']}")
+    if verify and _sha256(path) != spec["sha256"]:
+        raise ArtifactError(f"checksum mismatch for {spec['file']}")
+    try:
+        arr = np.load(path, allow_pickle=False)
+    except ValueError as e:
+        raise ArtifactError(f"{spec['file']}: {e}") from e
+    if list(arr.shape) != spec["shape"] or str(arr.dtype) != spec["dtype"]:
+        raise ArtifactError(
+            f"{spec['file']}: expected {spec['dtype']}{spec['shape']}, "
+            f"got {arr.dtype}{list(arr.shape)}"
+        )
+    return arr
+
+
+# ─── Export (offline, from fitted sklearn objects) ────────────────────────────
+def _columns(obj) -> list | None:
+    names = getattr(obj, "feature_names_in_", None)
+    return [str(c) for c in names] if names is not None else None
+
+
+def _export_transformer(obj, out_dir: str, prefix: str, columns: list | None = None) -> dict:
+    """Describe a fitted transformer as a manifest entry + saved arrays."""
+    if isinstance(obj, str):
+        if obj == "passthrough":
+            return {"kind": "passthrough", "columns": columns}
+        raise ArtifactError(f"{prefix}: unsupported transformer {obj!r}")
+
+    kind = type(obj).__name__
+    if columns is None:
+        columns = _columns(obj)
+
+    if kind == "StandardScaler":
+        n      = obj.n_features_in_
+        mean   = obj.mean_   if obj.mean_  is not None else np.zeros(n)
+        std    = obj.scale_  if obj.scale_ is not None else np.ones(n)
+        scale  = 1.0 / std
+        offset = -mean * scale
+        return {"kind": "affine", "columns": columns, "arrays": {
+            "scale":  _save_array(out_dir, f"{prefix}.scale",  scale.astype(np.float64)),
+            "offset": _save_array(out_dir, f"{prefix}.offset", offset.astype(np.float64)),
+        }}
+    if kind == "MinMaxScaler":
+        return {"kind": "affine", "columns": columns, "arrays": {
+            "scale":  _save_array(out_dir, f"{prefix}.scale",  obj.scale_.astype(np.float64)),
+            "offset": _save_array(out_dir, f"{prefix}.offset", obj.min_.astype(np.float64)),
+        }}
+    if kind == "SimpleImputer" and obj.strategy in ("mean", "median", "constant"):
+        return {"kind": "impute", "columns": columns, "arrays": {
+            "statistics": _save_array(out_dir, f"{prefix}.statistics",
+                                      np.asarray(obj.statistics_, dtype=np.float64)),
+        }}
+    if kind == "OneHotEncoder":
+        drop_idx = getattr(obj, "drop_idx_", None)
+        drop = [-1 if drop_idx is None or d is None else int(d)
+                for d in (drop_idx if drop_idx is not None else [None] * len(obj.categories_))]
+        return {"kind": "one_hot", "columns": columns, "drop": drop,
+                "categories": [c.tolist() for c in obj.categories_]}
+    if kind == "Pipeline":
+        return {"kind": "pipeline", "columns": columns, "steps": [
+            _export_transformer(step, out_dir, f"{prefix}.{name}")
+            for name, step in obj.steps if step not in (None, "passthrough")
+        ]}
+    if kind == "ColumnTransformer":
+        names_in = _columns(obj)
+        parts = []
+        for name, trans, cols in obj.transformers_:
+            if trans == "drop":
+                continue
+            cols = [names_in[c] if isinstance(c, (int, np.integer)) else str(c)
+                    for c in np.atleast_1d(cols)]
+            if not cols:
+                continue
+            parts.append(_export_transformer(trans, out_dir, f"{prefix}.{name}", cols))
+        return {"kind": "column_transformer", "parts": parts}
+
+    raise ArtifactError(f"{prefix}: unsupported transformer type {kind}")
+
+
+def _export_regressor(obj, out_dir: str, prefix: str) -> dict:
+    kind = type(obj).__name__
+    if kind == "DecisionTreeRegressor":
+        return _export_tree(obj, out_dir, prefix)
+    if kind == "HistGradientBoostingRegressor":
+        return _export_hgb(obj, out_dir, prefix)
+    if kind == "RidgeCalorieModel":
+        return {"kind": "linear", "n_features": int(obj.n_features_in_), "arrays": {
+            "coef":            _save_array(out_dir, f"{prefix}.coef", obj.coef_.astype(np.float64)),
+            "intercept":       _save_array(out_dir, f"{prefix}.intercept",
+                                           np.array([obj.intercept_], dtype=np.float64)),
+            "interaction_idx": _save_array(out_dir, f"{prefix}.interaction_idx",
+                                           np.array(obj.interaction_idx, dtype=np.int32)),
+        }}
+    raise ArtifactError(f"{prefix}: unsupported regressor type {kind}")
+
+
+def _export_hgb(obj, out_dir: str, prefix: str) -> dict:
+    if getattr(obj, "is_categorical_", None) is not None and np.any(obj.is_categorical_):
+        raise ArtifactError(f"{prefix}: native categorical splits are not supported")
+    trees = [p[0].nodes for p in obj._predictors]
+    offsets = np.cumsum([0] + [len(t) for t in trees[:-1]])
+    nodes = np.concatenate(trees)
+    offs  = np.repeat(offsets, [len(t) for t in trees])
+    leaf  = nodes["is_leaf"].astype(bool)
+    left  = np.where(leaf, -1, nodes["left"].astype(np.int64) + offs)
+    right = np.where(leaf, -1, nodes["right"].astype(np.int64) + offs)
+    baseline = np.asarray(obj._baseline_prediction, dtype=np.float64).reshape(-1)[:1]
+    return {"kind": "tree_ensemble", "n_features": int(obj.n_features_in_), "arrays": {
+        "roots":          _save_array(out_dir, f"{prefix}.roots",          offsets.astype(np.int32)),
+        "children_left":  _save_array(out_dir, f"{prefix}.children_left",  left.astype(np.int32)),
+        "children_right": _save_array(out_dir, f"{prefix}.children_right", right.astype(np.int32)),
+        "feature":        _save_array(out_dir, f"{prefix}.feature",
+                                      nodes["feature_idx"].astype(np.int32)),
+        "threshold":      _save_array(out_dir, f"{prefix}.threshold",
+                                      nodes["num_threshold"].astype(np.float64)),
+        "value":          _save_array(out_dir, f"{prefix}.value",
+                                      nodes["value"].astype(np.float64)),
+        "missing_left":   _save_array(out_dir, f"{prefix}.missing_left",
+                                      nodes["missing_go_to_left"].astype(bool)),
+        "baseline":       _save_array(out_dir, f"{prefix}.baseline", baseline),
+    }}
+
+
+def _export_tree(obj, out_dir: str, prefix: str) -> dict:
+    if type(obj).__name__ != "DecisionTreeRegressor":
+        raise ArtifactError(f"{prefix}: expected DecisionTreeRegressor, got {type(obj).__name__}")
+    t = obj.tree_
+    return {"kind": "tree", "n_features": int(obj.n_features_in_), "arrays": {
+        "children_left":  _save_array(out_dir, f"{prefix}.children_left",  t.children_left.astype(np.int32)),
+        "children_right": _save_array(out_dir, f"{prefix}.children_right", t.children_right.astype(np.int32)),
+        "feature":        _save_array(out_dir, f"{prefix}.feature",        t.feature.astype(np.int32)),
+        "threshold":      _save_array(out_dir, f"{prefix}.threshold",      t.threshold.astype(np.float64)),
+        "value":          _save_array(out_dir, f"{prefix}.value",          t.value[:, 0, 0].astype(np.float64)),
+    }}
+
+
+def _export_encoder(obj, out_dir: str, name: str) -> dict:
+    if not hasattr(obj, "save"):
+        raise ArtifactError(f"{name}: object has no native save() — was it a stub?")
+    enc_dir = os.path.join(out_dir, name)
+    obj.save(enc_dir)
+    files = {}
+    for root, _, filenames in os.walk(enc_dir):
+        for fn in sorted(filenames):
+            path = os.path.join(root, fn)
+            files[os.path.relpath(path, enc_dir)] = _sha256(path)
+    return {"kind": "sentence_transformer", "directory": name, "files": files}
+
+
+def _export_model(key: str, obj, out_dir: str) -> dict:
+    """Manifest entry for one ModelLoader key."""
+    from model_loader import ModelLoader
+
+    if key == "scaler":
+        return _export_transformer(obj, out_dir, key, ModelLoader.SCALER_COLUMNS)
+    if key == "kmeans":
+        return {"kind": "nearest_centroid", "arrays": {
+            "centers": _save_array(out_dir, "kmeans.centers",
+                                   obj.cluster_centers_.astype(np.float64)),
+        }}
+    if key == "calorie_preprocessor":
+        return _export_transformer(obj, out_dir, key)
+    if key in CALORIE_BACKEND_KEYS:
+        return _export_regressor(obj, out_dir, key)
+    if key == "sentence_transformer":
+        return _export_encoder(obj, out_dir, key)
+    raise ArtifactError(f"unknown model key {key!r}")
+
+
+def _write_manifest(out_dir: str, models: dict) -> dict:
+    try:
+        import sklearn
+        sklearn_version = sklearn.__version__
+    except ImportError:
+        sklearn_version = None
+
+    manifest = {
+        "format":          FORMAT_NAME,
+        "format_version":  FORMAT_VERSION,
+        "created":         time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sklearn_version": sklearn_version,
+        "models":          models,
+    }
+    tmp = os.path.join(out_dir, f"{MANIFEST_FILE}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST_FILE))
+    return manifest
+
+
+def export_artifacts(model_dir: str, out_dir: str) -> dict:
+    """Convert the legacy pickles under ``model_dir`` into an artifact directory."""
+    from model_loader import ModelLoader, _safe_load
+
+    os.makedirs(out_dir, exist_ok=True)
+    objs = {
+        key: _safe_load(os.path.join(model_dir, filename))
+        for key, filename in ModelLoader.MODEL_FILES.items()
+    }
+    for key, filename in ModelLoader.CALORIE_BACKEND_FILES.items():
+        path = os.path.join(model_dir, filename)
+        if key not in objs and os.path.exists(path):
+            objs[key] = _safe_load(path)
+    manifest = _write_manifest(out_dir, {key: _export_model(key, obj, out_dir)
+                                         for key, obj in objs.items()})
+
+    _check_parity(objs, {key: load_model(out_dir, manifest, key)
+                         for key in objs if key != "sentence_transformer"})
+    logger.info(f"✅ Exported artifacts to {out_dir}")
+    return manifest
+
+
+def update_artifacts(out_dir: str, objs: dict) -> dict:
+    """Re-export only the given keys (e.g. after retraining) into an existing directory."""
+    manifest = read_manifest(out_dir)
+    models = dict(manifest["models"])
+    for key, obj in objs.items():
+        models[key] = _export_model(key, obj, out_dir)
+    manifest = _write_manifest(out_dir, models)
+    _check_parity(objs, {key: load_model(out_dir, manifest, key) for key in objs})
+    logger.info(f"✅ Updated {', '.join(objs)} in {out_dir}")
+    return manifest
+
+
+def _check_parity(legacy: dict, loaded: dict, n: int = 256, seed: int = 0):
+    """Compare artifact outputs with the source sklearn objects on random probes."""
+    rng = np.random.default_rng(seed)
+    if "scaler" in loaded:
+        X = rng.normal(size=(n, len(loaded["scaler"].scale)))
+        if not np.allclose(legacy["scaler"].transform(X), loaded["scaler"].transform(X)):
+            raise ArtifactError("scaler parity check failed")
+        if "kmeans" in loaded and not np.array_equal(legacy["kmeans"].predict(X),
+                                                     loaded["kmeans"].predict(X)):
+            raise ArtifactError("kmeans parity check failed")
+    for key in CALORIE_BACKEND_KEYS:
+        if key not in loaded:
+            continue
+        T = rng.normal(size=(n, legacy[key].n_features_in_)) * 1000
+        if not np.allclose(legacy[key].predict(T), loaded[key].predict(T)):
+            raise ArtifactError(f"{key} parity check failed")
+
+
+# ─── Load ─────────────────────────────────────────────────────────────────────
+def read_manifest(art_dir: str) -> dict:
+    path = os.path.join(art_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise ArtifactError(f"no {MANIFEST_FILE} in {art_dir}")
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ArtifactError(f"unreadable manifest: {e}") from e
+    if manifest.get("format") != FORMAT_NAME:
+        raise ArtifactError(f"unknown artifact format {manifest.get('format')!r}")
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(
+            f"artifact format v{manifest.get('format_version')} "
+            f"is not supported (expected v{FORMAT_VERSION})"
+        )
+    return manifest
+
+
+def _build(art_dir: str, entry: dict, verify: bool):
+    kind = entry["kind"]
+    arrays = {k: _load_array(art_dir, spec, verify) for k, spec in entry.get("arrays", {}).items()}
+    cols = entry.get("columns")
+
+    if kind == "affine":
+        if arrays["scale"].shape != arrays["offset"].shape:
+            raise ArtifactError("affine scale/offset shape mismatch")
+        if cols is not None and len(cols) != arrays["scale"].shape[0]:
+            raise ArtifactError("affine column count does not match arrays")
+        return AffineTransform(arrays["scale"], arrays["offset"], cols)
+    if kind == "impute":
+        return MeanImputer(arrays["statistics"], cols)
+    if kind == "one_hot":
+        return OneHot(entry["categories"], entry["drop"], cols)
+    if kind == "passthrough":
+        return Passthrough(cols)
+    if kind == "pipeline":
+        return Pipeline([_build(art_dir, s, verify) for s in entry["steps"]], cols)
+    if kind == "column_transformer":
+        return ColumnTransformer([_build(art_dir, p, verify) for p in entry["parts"]])
+    if kind == "nearest_centroid":
+        if arrays["centers"].ndim != 2:
+            raise ArtifactError("kmeans centers must be 2-D")
+        return NearestCentroid(arrays["centers"])
+    if kind == "tree":
+        tree = TreeRegressor(**arrays)
+        n_nodes = arrays["value"].shape[0]
+        for name in ("children_left", "children_right", "feature", "threshold"):
+            if arrays[name].shape[0] != n_nodes:
+                raise ArtifactError(f"tree array {name} has wrong length")
+        if tree.n_features > entry["n_features"]:
+            raise ArtifactError("tree references features beyond n_features")
+        return tree
+    if kind == "tree_ensemble":
+        n_nodes = arrays["value"].shape[0]
+        for name in ("children_left", "children_right", "feature", "threshold", "missing_left"):
+            if arrays[name].shape[0] != n_nodes:
+                raise ArtifactError(f"ensemble array {name} has wrong length")
+        if arrays["roots"].size and arrays["roots"].max() >= n_nodes:
+            raise ArtifactError("ensemble root index out of range")
+        ensemble = TreeEnsemble(**arrays)
+        if ensemble.n_features > entry["n_features"]:
+            raise ArtifactError("ensemble references features beyond n_features")
+        return ensemble
+    if kind == "linear":
+        expected = entry["n_features"] * (1 + arrays["interaction_idx"].size)
+        if arrays["coef"].shape != (expected,):
+            raise ArtifactError(f"linear coef has {arrays['coef'].shape}, expected ({expected},)")
+        return LinearRegressor(**arrays)
+    if kind == "sentence_transformer":
+        enc_dir = os.path.join(art_dir, entry["directory"])
+        if verify:
+            for rel, digest in entry["files"].items():
+                path = os.path.join(enc_dir, rel)
+                if not os.path.exists(path) or _sha256(path) != digest:
+                    raise ArtifactError(f"encoder file {rel} missing or corrupt")
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(enc_dir)
+
+    raise ArtifactError(f"unknown model kind {kind!r}")
+
+
+def load_model(art_dir: str, manifest: dict, key: str, verify: bool = True):
+    """Build the runtime object for one ``key`` of the manifest."""
+    entry = manifest["models"].get(key)
+    if entry is None:
+        raise ArtifactError(f"manifest has no entry for {key}")
+    return _build(art_dir, entry, verify)
+
+
+def load_artifacts(art_dir: str, verify: bool = True) -> dict:
+    """Load every model in the artifact directory; validates the cross-model shapes."""
+    manifest = read_manifest(art_dir)
+    loaded = {key: load_model(art_dir, manifest, key, verify) for key in manifest["models"]}
+    validate(loaded)
+    return loaded
+
+
+def validate(loaded: dict):
+    """Cross-check shapes that must agree between the scaler and KMeans."""
+    scaler, kmeans = loaded.get("scaler"), loaded.get("kmeans")
+    if isinstance(scaler, AffineTransform) and isinstance(kmeans, NearestCentroid):
+        if scaler.scale.shape[0] != kmeans.centers.shape[1]:
+            raise ArtifactError(
+                f"scaler has {scaler.scale.shape[0]} features but "
+                f"kmeans centers have {kmeans.centers.shape[1]}"
+            )
+
+
+# ─── CLI ──────────────────────────────────────────────────────────────────────
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    exp = sub.add_parser("export", help="convert legacy pickles to artifacts")
+    exp.add_argument("--model-dir", default=".")
+    exp.add_argument("--out", default="models/artifacts")
+
+    chk = sub.add_parser("verify", help="validate checksums and shapes")
+    chk.add_argument("--dir", default="models/artifacts")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "export":
+        export_artifacts(args.model_dir, args.out)
+    else:
+        start = time.perf_counter()
+        load_artifacts(args.dir)
+        print(f"✅ {args.dir} OK ({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
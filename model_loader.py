@@ -1,13 +1,26 @@
 """model_loader.py — Loads all ML models with graceful fallback stubs."""
 
+from __future__ import annotations
+
 import os
+import random
 import sys
+import threading
 import types
+import time
 import pickle
 import logging
+import zlib
 import numpy as np
 import pandas as pd
 
+from config import APP_CONFIG
+from model_artifacts import (
+    ArtifactError, MANIFEST_FILE, entry_checksum, file_checksum, load_model, read_manifest, validate,
+)
+from model_simulation import SimulatedModel, input_seed, load_profile
+from preference_rules import PreferenceRules
+
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +94,29 @@ def _safe_load(path: str):
         return _SafeUnpickler(f).load()
 
 
+# ─── Array views of fitted models ─────────────────────────────────────────────
+def _affine_terms(scaler):
+    """(scale, offset) with ``transform(X) == X * scale + offset``, or None."""
+    if hasattr(scaler, "scale") and hasattr(scaler, "offset"):
+        return scaler.scale, scaler.offset
+    kind = type(scaler).__name__
+    if kind == "StandardScaler":
+        n = scaler.n_features_in_
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n)
+        std = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+        return 1.0 / std, -mean / std
+    if kind == "MinMaxScaler":
+        return scaler.scale_, scaler.min_
+    return None
+
+
+def _centroids(kmeans):
+    centers = getattr(kmeans, "centers", None)
+    if centers is None:
+        centers = getattr(kmeans, "cluster_centers_", None)
+    return None if centers is None else np.asarray(centers, dtype=np.float64)
+
+
 # ─── Stub classes ─────────────────────────────────────────────────────────────
 class _StubScaler:
     def transform(self, X):
@@ -102,14 +138,16 @@ class _StubDTR:
     def predict(self, X):
         arr = X.values if hasattr(X, "values") else np.asarray(X)
         if arr.ndim == 2 and arr.shape[1] > 0:
-            return arr[:, 0] * np.random.uniform(0.95, 1.05, size=arr.shape[0])
+            # Deterministic ±5 % jitter keyed on each row
+            jitter = np.array([input_seed(row) for row in arr], dtype=np.float64) / 2**32
+            return arr[:, 0].astype(np.float64) * (0.95 + 0.1 * jitter)
         return np.array([2000.0])
 
 
 class _StubSentenceTransformer:
     def encode(self, sentences, **kwargs):
         n = len(sentences) if isinstance(sentences, list) else 1
-        rng = np.random.default_rng(abs(hash(str(sentences))) % (2**32))
+        rng = np.random.default_rng(zlib.crc32(str(sentences).encode()))
         vecs = rng.standard_normal((n, 384))
         return vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-9)
 
@@ -124,6 +162,16 @@ class ModelLoader:
         "sentence_transformer": "models/sentence_transformer_model.pkl",
     }
 
+    # The "dtr" slot serves whichever calorie backend is configured
+    CALORIE_BACKEND_FILES = {
+        "dtr":                  "models/dtr_model.pkl",
+        "hgb":                  "models/hgb_model.pkl",
+        "ridge":                "models/ridge_model.pkl",
+    }
+
+    # Keys ``validate`` cross-checks; they fall back together
+    VALIDATED_KEYS = ("scaler", "kmeans")
+
     STUBS = {
         "scaler":               _StubScaler(),
         "kmeans":               _StubKMeans(),
@@ -143,27 +191,194 @@ class ModelLoader:
         "activity_level_very active",
     ]
 
-    def __init__(self, model_dir: str = "."):
+    # App activity labels → trained one-hot column.  The training data had one
+    # level above "active", so the app's top two levels align ordinally.
+    ACTIVITY_COLUMNS = {
+        "Sedentary":         "activity_level_sedentary",
+        "Lightly Active":    "activity_level_light",
+        "Moderately Active": "activity_level_moderate",
+        "Very Active":       "activity_level_active",
+        "Extremely Active":  "activity_level_very active",
+    }
+    DEFAULT_ACTIVITY = "Moderately Active"
+
+    # Ordinal intensity of each one-hot column (used to profile centroids)
+    ACTIVITY_INTENSITY = {
+        "activity_level_sedentary":   0,
+        "activity_level_light":       1,
+        "activity_level_moderate":    2,
+        "activity_level_active":      3,
+        "activity_level_very active": 4,
+    }
+    FITNESS_LEVELS = ["Beginner", "Intermediate", "Advanced", "Elite"]
+    LEVEL_BY_INTENSITY = [0, 0, 1, 2, 3]  # rounded intensity → FITNESS_LEVELS index
+
+    def __init__(
+        self,
+        model_dir: str = ".",
+        artifact_dir: str | None = None,
+        calorie_backend: str | None = None,
+        simulation_profile: str | None = None,
+    ):
         self._models: dict = {}
         self._warnings: list = []
         self._model_dir = model_dir
+        self._artifact_dir = artifact_dir or os.path.join(model_dir, APP_CONFIG.ARTIFACT_DIR)
+        self.calorie_backend = calorie_backend or APP_CONFIG.CALORIE_BACKEND
+        if self.calorie_backend not in self.CALORIE_BACKEND_FILES:
+            raise ValueError(f"Unknown calorie backend {self.calorie_backend!r}")
+        self._files = dict(self.MODEL_FILES, dtr=self.CALORIE_BACKEND_FILES[self.calorie_backend])
+        profile_path = simulation_profile if simulation_profile is not None else APP_CONFIG.SIMULATION_PROFILE
+        self._simulation = load_profile(profile_path)["models"] if profile_path else {}
+        self.sources: dict = {}
+        self.checksums: dict = {}       # key → digest of the loaded model version (None for stubs)
+        self.load_times: dict = {}
+        self._preference_rules = PreferenceRules(self._build_candidate_bank("", ""))
+        self.preference_stats = {"calls": 0, "empty": 0, "fast_path": 0, "encoder": 0,
+                                 "audited": 0, "agreed": 0}
+        self._stats_lock = threading.Lock()   # match_preferences runs on several threads
         self._load_all()
+        self._build_cluster_lookup()
         if self._warnings:
            print("⚠ Demo mode — some model files missing")
+
     def _load_all(self):
-        for key, filename in self.MODEL_FILES.items():
-            path = os.path.join(self._model_dir, filename)
+        """
+        Prefer the versioned artifact directory; the legacy pickles are read
+        when no readable manifest exists (e.g. before the one-off export), and
+        per key when its artifact fails to load or validate.
+        """
+        manifest = None
+        if os.path.exists(os.path.join(self._artifact_dir, MANIFEST_FILE)):
             try:
-                self._models[key] = _safe_load(path)
-                logger.info(f"✅ Loaded {filename}")
-            except FileNotFoundError:
-                self._models[key] = self.STUBS[key]
-                self._warnings.append(filename)
-                logger.warning(f"⚠️ {filename} not found — using stub")
-            except Exception as e:
-                self._models[key] = self.STUBS[key]
-                self._warnings.append(f"{filename} (error: {e})")
-                logger.error(f"❌ Error loading {filename}: {e}")
+                manifest = read_manifest(self._artifact_dir)
+            except ArtifactError as e:
+                self._warnings.append(f"{self._artifact_dir} (error: {e})")
+                logger.error(f"❌ Invalid artifact manifest: {e} — trying pickles")
+
+        for key, filename in self._files.items():
+            start = time.perf_counter()
+            if manifest is not None:
+                self._load_artifact(manifest, key)
+            else:
+                self._load_pickle(key, filename)
+            self.load_times[key] = time.perf_counter() - start
+
+        if manifest is not None:
+            try:
+                validate(self._models)
+            except ArtifactError as e:
+                self._warnings.append(f"{self._artifact_dir} (error: {e})")
+                logger.error(f"❌ Artifact validation failed: {e} — trying pickles")
+                for key in self.VALIDATED_KEYS:
+                    self._load_pickle(key, self._files[key])
+                try:
+                    validate(self._models)
+                except ArtifactError as e:
+                    self._warnings.append(f"pickles (error: {e})")
+                    logger.error(f"❌ Pickle validation failed: {e} — using stubs")
+                    for key in self.VALIDATED_KEYS:
+                        self._stub(key)
+
+    def _stub(self, key: str):
+        """
+        Demo stub; with a simulation profile it mimics the real model's
+        latency / memory and is recorded as ``"simulated"`` so callers still
+        exercise it (a ``"stub"`` source means "don't call the model").
+        """
+        profile = self._simulation.get(key)
+        if profile:
+            self._models[key], self.sources[key] = SimulatedModel(key, self.STUBS[key], profile), "simulated"
+        else:
+            self._models[key], self.sources[key] = self.STUBS[key], "stub"
+        self.checksums[key] = None
+
+    def _load_artifact(self, manifest: dict, key: str):
+        entry = self.calorie_backend if key == "dtr" else key
+        try:
+            self._models[key] = load_model(self._artifact_dir, manifest, entry)
+            self.sources[key] = "artifact"
+            self.checksums[key] = entry_checksum(manifest["models"][entry])
+            logger.info(f"✅ Loaded {entry} artifact")
+        except (ArtifactError, ImportError, OSError, KeyError, TypeError) as e:
+            # KeyError / TypeError: a malformed manifest entry
+            self._warnings.append(f"{entry} artifact (error: {e!r})")
+            logger.error(f"❌ Error loading {entry} artifact: {e!r} — trying pickle")
+            self._load_pickle(key, self._files[key])
+
+    def _load_pickle(self, key: str, filename: str):
+        path = os.path.join(self._model_dir, filename)
+        try:
+            self._models[key] = _safe_load(path)
+            self.sources[key] = "pickle"
+            self.checksums[key] = file_checksum(path)
+            logger.info(f"✅ Loaded {filename}")
+        except FileNotFoundError:
+            self._stub(key)
+            self._warnings.append(filename)
+            logger.warning(f"⚠️ {filename} not found — using stub")
+        except Exception as e:
+            self._stub(key)
+            self._warnings.append(f"{filename} (error: {e})")
+            logger.error(f"❌ Error loading {filename}: {e}")
+
+    # ── Cluster lookup ────────────────────────────────────────────────────────
+
+    def _build_cluster_lookup(self):
+        """
+        Fold the scaler into plain arrays and profile every centroid once, so
+        per-request assignment is a 7-wide affine + argmin with no DataFrame
+        or sklearn call, and each cluster maps straight to plan parameters.
+        """
+        self._cluster_lookup = None
+        self.cluster_profiles: list[dict] = []
+        terms   = _affine_terms(self._models["scaler"])
+        centers = _centroids(self._models["kmeans"])
+        if terms is None or centers is None:
+            logger.warning("⚠️ No real scaler/KMeans — cluster lookup disabled")
+            return
+        scale, offset = terms
+        self._cluster_lookup = (scale, offset, centers, np.einsum("ij,ij->i", centers, centers))
+
+        raw = (centers - offset) / scale
+        act_cols = self.SCALER_COLUMNS[2:]
+        intensity = np.array([self.ACTIVITY_INTENSITY[c] for c in act_cols], dtype=np.float64)
+        for row in raw:
+            age, bmi = float(row[0]), float(row[1])
+            weights = np.clip(row[2:], 0, None)
+            score = float(weights @ intensity / weights.sum()) if weights.sum() > 0 else 2.0
+            level = self.LEVEL_BY_INTENSITY[int(round(score))]
+            if bmi >= 30 or age >= 60:
+                level = max(level - 1, 0)
+            self.cluster_profiles.append({
+                "fitness_level":      self.FITNESS_LEVELS[level],
+                "age":                round(age, 1),
+                "bmi":                round(bmi, 1),
+                "activity_intensity": round(score, 2),
+            })
+
+    def cluster_features(self, age: float, bmi: float, activity_level: str) -> np.ndarray:
+        """One row in ``SCALER_COLUMNS`` order with the activity one-hot set."""
+        row = np.zeros((1, len(self.SCALER_COLUMNS)))
+        row[0, 0], row[0, 1] = age, bmi
+        col = self.ACTIVITY_COLUMNS.get(activity_level,
+                                        self.ACTIVITY_COLUMNS[self.DEFAULT_ACTIVITY])
+        row[0, self.SCALER_COLUMNS.index(col)] = 1.0
+        return row
+
+    def assign_cluster(self, age: float, bmi: float, activity_level: str) -> int:
+        features = self.cluster_features(age, bmi, activity_level)
+        if self._cluster_lookup is None:
+            return self.predict_cluster(self.scale(features))
+        scale, offset, centers, sq_norm = self._cluster_lookup
+        x = features[0] * scale + offset
+        return int(np.argmin(sq_norm - 2.0 * (centers @ x)))
+
+    def cluster_profile(self, cluster: int) -> dict:
+        """Plan parameters for a cluster; ``Intermediate`` when running on stubs."""
+        if 0 <= cluster < len(self.cluster_profiles):
+            return self.cluster_profiles[cluster]
+        return {"fitness_level": "Intermediate"}
 
     # ── Public API ────────────────────────────────────────────────────────────
 
@@ -187,12 +402,58 @@ class ModelLoader:
         result = self._models["dtr"].predict(processed_features)
         return float(np.clip(result[0], 1200, 6000))
 
+    def predict_calories_batch(self, processed_features: np.ndarray) -> np.ndarray:
+        """Vectorised ``predict_calories`` for batch jobs — one call for all rows."""
+        result = np.asarray(self._models["dtr"].predict(processed_features), dtype=np.float64)
+        return np.clip(result, 1200, 6000)
+
     def match_preferences(
         self,
         free_text: str,
         fitness_level: str,
         fitness_goal: str,
     ) -> list:
+        """
+        Keyword fast path first; the encoder only sees ambiguous text.  A
+        ``PREFERENCE_AUDIT_RATE`` share of fast-path hits is also encoded to
+        track agreement (``preference_stats``).
+        """
+        if not free_text or not free_text.strip():
+            self._count("calls", "empty")
+            return []
+
+        fast = self._preference_rules.match(free_text)
+        if fast is not None:
+            audit = bool(fast) and random.random() < APP_CONFIG.PREFERENCE_AUDIT_RATE
+            self._count("calls", "fast_path", *(("audited",) if audit else ()))
+            if audit and fast[0] in self._encode_preferences(free_text, fitness_level, fitness_goal):
+                self._count("agreed")
+            return fast
+
+        self._count("calls", "encoder")
+        return self._encode_preferences(free_text, fitness_level, fitness_goal)
+
+    def _count(self, *keys: str):
+        with self._stats_lock:
+            for key in keys:
+                self.preference_stats[key] += 1
+
+    def preference_report(self) -> dict:
+        with self._stats_lock:
+            s = dict(self.preference_stats)
+        answered = s["calls"] - s["empty"]
+        return dict(
+            s,
+            fast_path_rate=s["fast_path"] / answered if answered else 0.0,
+            agreement=s["agreed"] / s["audited"] if s["audited"] else None,
+        )
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """L2-normalised ``float32`` sentence embeddings, one row per text."""
+        vecs = np.asarray(self._models["sentence_transformer"].encode(list(texts)), dtype=np.float32)
+        return vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-9)
+
+    def _encode_preferences(self, free_text: str, fitness_level: str, fitness_goal: str) -> list:
         model = self._models["sentence_transformer"]
         candidates = self._build_candidate_bank(fitness_level, fitness_goal)
 
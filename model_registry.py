@@ -0,0 +1,240 @@
+"""model_registry.py — Hot-swappable ``ModelLoader`` versions.
+
+Requests take a lease on the current version (``with registry.acquire() as
+lease: lease.models …``).  ``reload`` builds a new ``ModelLoader`` in a
+background thread, runs a smoke batch through the full pipeline, and only
+then swaps it in under the lock — a pointer swap, so requests never see a
+half-loaded version.  Leases are reference-counted: the previous version
+stays alive until its last in-flight request finishes, then it is dropped.
+A new version is only loaded once no older one is still draining, so at
+most two copies of the models are ever resident.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from model_loader import ModelLoader
+from model_simulation import rss_mb
+
+
+logger = logging.getLogger(__name__)
+
+SMOKE_USERS = [
+    {"age": 28, "gender": "Male", "height_cm": 170, "weight_kg": 70,
+     "activity_level": "Moderately Active", "fitness_goal": "General Fitness",
+     "dietary_preference": "Non-Vegetarian", "cultural_food_habits": "Western",
+     "budget_usd_per_day": 15, "available_equipment": ["Bodyweight"], "free_text_prefs": ""},
+    {"age": 45, "gender": "Female", "height_cm": 160, "weight_kg": 82,
+     "activity_level": "Sedentary", "fitness_goal": "Weight Loss",
+     "dietary_preference": "Vegetarian", "cultural_food_habits": "South Asian",
+     "budget_usd_per_day": 8, "available_equipment": ["Dumbbells"],
+     "free_text_prefs": "knee pain, prefer quick meals"},
+    {"age": 23, "gender": "Male", "height_cm": 185, "weight_kg": 80,
+     "activity_level": "Very Active", "fitness_goal": "Muscle Gain",
+     "dietary_preference": "Pescatarian", "cultural_food_habits": "Middle Eastern",
+     "budget_usd_per_day": 25, "available_equipment": ["Barbell", "Dumbbells"],
+     "free_text_prefs": "I want something to help me sleep better"},
+]
+
+
+class SmokeTestError(RuntimeError):
+    pass
+
+
+def smoke_test(models: ModelLoader) -> dict:
+    """Run ``SMOKE_USERS`` end to end; raise ``SmokeTestError`` on bad output."""
+    from plan_pipeline import generate_plan
+
+    start = time.perf_counter()
+    for user in SMOKE_USERS:
+        plan = generate_plan(models, user)
+        cal = plan["predicted_calories"]
+        if not (isinstance(cal, float) and math.isfinite(cal) and 1200 <= cal <= 6000):
+            raise SmokeTestError(f"predicted_calories out of range: {cal!r}")
+        if len(plan["workout_plan"]) != 7 or not plan["diet_plan"]:
+            raise SmokeTestError("planner output incomplete")
+        if not isinstance(models.match_preferences(user["free_text_prefs"] or "yoga",
+                                                   plan["fitness_level"], user["fitness_goal"]), list):
+            raise SmokeTestError("match_preferences did not return a list")
+    return {"users": len(SMOKE_USERS), "smoke_s": time.perf_counter() - start}
+
+
+class ModelVersion:
+    def __init__(self, number: int, models: ModelLoader, fingerprint: tuple):
+        self.number = number
+        self.models = models
+        self.fingerprint = fingerprint
+        self.refcount = 0
+        self.retired = False
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+    def __init__(self, model_dir: str = ".", smoke: bool = True, **loader_kwargs):
+        self._model_dir = model_dir
+        self._loader_kwargs = loader_kwargs
+        self._smoke = smoke
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._loading = False
+        self._draining: list[ModelVersion] = []
+        self._watcher: threading.Thread | None = None
+        self._last_attempt: tuple | None = None
+        self._stop = threading.Event()
+        self.history: list[dict] = []
+
+        start = time.perf_counter()
+        fingerprint = self._fingerprint()
+        self._current = ModelVersion(1, self._new_loader(), fingerprint)
+        self.history.append({"version": 1, "status": "initial",
+                             "load_s": time.perf_counter() - start, "rss_mb": rss_mb()})
+
+    # ── Requests ──────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            version = self._current
+            version.refcount += 1
+        try:
+            yield version
+        finally:
+            with self._lock:
+                version.refcount -= 1
+                if version.retired and version.refcount == 0:
+                    self._release(version)
+
+    @property
+    def version(self) -> int:
+        return self._current.number
+
+    # ── Reloading ─────────────────────────────────────────────────────────────
+
+    def _new_loader(self) -> ModelLoader:
+        return ModelLoader(model_dir=self._model_dir, **self._loader_kwargs)
+
+    def _fingerprint(self) -> tuple:
+        """mtimes of every model file and the artifact manifest."""
+        from model_artifacts import MANIFEST_FILE
+        from config import APP_CONFIG
+
+        art_dir = self._loader_kwargs.get("artifact_dir") or os.path.join(
+            self._model_dir, APP_CONFIG.ARTIFACT_DIR)
+        paths = [os.path.join(art_dir, MANIFEST_FILE)]
+        paths += [os.path.join(self._model_dir, f)
+                  for f in {**ModelLoader.MODEL_FILES, **ModelLoader.CALORIE_BACKEND_FILES}.values()]
+        out = []
+        for path in sorted(paths):
+            try:
+                out.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
+                out.append((path, None))
+        return tuple(out)
+
+    def reload(self, wait: bool = False, drain_timeout_s: float = 60.0) -> threading.Thread | dict:
+        """Load + validate + swap in a background thread (``wait=True`` blocks and returns the record)."""
+        with self._lock:
+            if self._loading:
+                raise RuntimeError("a model reload is already in progress")
+            self._loading = True
+        result: dict = {}
+        thread = threading.Thread(target=self._reload, args=(drain_timeout_s, result),
+                                  name="model-reload", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+            return result
+        return thread
+
+    def _reload(self, drain_timeout_s: float, record: dict):
+        number = self._current.number + 1
+        record.update(version=number, status="failed")
+        try:
+            # Bound memory: never load while an older version is still draining
+            with self._lock:
+                if not self._drained.wait_for(lambda: not self._draining, timeout=drain_timeout_s):
+                    record["error"] = "previous version still draining"
+                    return
+
+            fingerprint = self._fingerprint()
+            start = time.perf_counter()
+            loader = self._new_loader()
+            record["load_s"] = time.perf_counter() - start
+
+            if loader._warnings and not self._current.models._warnings:
+                record["error"] = f"new version fell back to stubs: {loader._warnings}"
+                return
+            if self._smoke:
+                record.update(smoke_test(loader))
+
+            start = time.perf_counter()
+            with self._lock:
+                old = self._current
+                self._current = ModelVersion(number, loader, fingerprint)
+                old.retired = True
+                if old.refcount == 0:
+                    self._release(old)
+                else:
+                    self._draining.append(old)
+            record["swap_s"] = time.perf_counter() - start
+            record["status"] = "swapped"
+            logger.info(f"✅ Model version {number} live (load {record['load_s']:.2f}s, "
+                        f"swap {record['swap_s'] * 1e6:.0f}µs, {old.refcount} request(s) draining)")
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            record["rss_mb"] = rss_mb()
+            if record["status"] != "swapped":
+                logger.error(f"❌ Model reload to version {number} rejected: {record.get('error')}")
+            with self._lock:
+                self._loading = False
+                self.history.append(dict(record))
+
+    def _release(self, version: ModelVersion):
+        """Drop a retired version (called with the lock held)."""
+        if version in self._draining:
+            self._draining.remove(version)
+        version.models = None          # last reference — freed by refcounting
+        self._drained.notify_all()
+        logger.info(f"Model version {version.number} released")
+
+    # ── Watching ──────────────────────────────────────────────────────────────
+
+    def start_watching(self, interval_s: float):
+        """Poll model file mtimes and reload when they change."""
+        if self._watcher is not None or interval_s <= 0:
+            return
+
+        def loop():
+            while not self._stop.wait(interval_s):
+                fingerprint = self._fingerprint()
+                if self._loading or fingerprint in (self._current.fingerprint, self._last_attempt):
+                    continue
+                self._last_attempt = fingerprint
+                logger.info("Model files changed — reloading")
+                try:
+                    self.reload(wait=True)
+                except RuntimeError:
+                    pass
+
+        self._watcher = threading.Thread(target=loop, name="model-watch", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._current.number,
+                "in_flight": self._current.refcount,
+                "draining": [(v.number, v.refcount) for v in self._draining],
+                "loading": self._loading,
+                "history": list(self.history),
+            }
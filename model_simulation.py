@@ -0,0 +1,206 @@
+"""model_simulation.py — Latency- and memory-realistic stand-ins for the models.
+
+Demo-mode stubs answer instantly, so load tests without the real artifacts
+say nothing about capacity.  ``record`` times every real model call the
+pipeline makes (and the memory each model adds) and writes a JSON profile;
+with ``APP_CONFIG.SIMULATION_PROFILE`` pointing at it, ``ModelLoader`` wraps
+each stub in ``SimulatedModel``, which holds a ballast buffer of the recorded
+size and sleeps for a latency drawn from the recorded distribution.  The draw
+is seeded from the call's input, so a given request always produces the same
+output *and* the same latency — load-test runs are reproducible.
+
+    python model_simulation.py record --out models/latency_profile.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import time
+import zlib
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_VERSION = 1
+QUANTILES = [0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.0]
+
+# Model key → method the pipeline calls
+MODEL_METHODS = {
+    "scaler":               "transform",
+    "kmeans":               "predict",
+    "calorie_preprocessor": "transform",
+    "dtr":                  "predict",
+    "sentence_transformer": "encode",
+}
+
+
+def rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def input_seed(x) -> int:
+    """Process-independent seed for a model input."""
+    if hasattr(x, "values"):
+        x = x.values
+    if isinstance(x, np.ndarray) and x.dtype != object:
+        return zlib.crc32(np.ascontiguousarray(x).tobytes())
+    return zlib.crc32(repr(x).encode())
+
+
+def _rows(x) -> int:
+    if isinstance(x, (list, tuple)):
+        return len(x)
+    shape = getattr(x, "shape", None)
+    return int(shape[0]) if shape else 1
+
+
+# ─── Simulation ───────────────────────────────────────────────────────────────
+class SimulatedModel:
+    """Deterministic ``stub`` with the latency / memory of the real model."""
+
+    def __init__(self, key: str, stub, profile: dict):
+        self.key = key
+        self._stub = stub
+        self._method = MODEL_METHODS[key]
+        q = np.asarray(profile["quantiles_ms"], dtype=np.float64)
+        self._q, self._ms = q[:, 0], q[:, 1]
+        self._per_row_ms = float(profile.get("per_row_ms", 0.0))
+        # Touch every page so the footprint shows up in RSS
+        self._ballast = np.ones(int(profile.get("memory_mb", 0.0) * 2**20), dtype=np.uint8)
+
+    def latency_s(self, x) -> float:
+        u = (input_seed(x) % 1_000_003) / 1_000_003
+        base = float(np.interp(u, self._q, self._ms))
+        return (base + self._per_row_ms * max(_rows(x) - 1, 0)) / 1000
+
+    def _call(self, x, *args, **kwargs):
+        time.sleep(self.latency_s(x))
+        return getattr(self._stub, self._method)(x, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name == self._method:
+            return self._call
+        return getattr(self._stub, name)
+
+
+def load_profile(path: str) -> dict:
+    with open(path) as f:
+        profile = json.load(f)
+    if profile.get("version") != PROFILE_VERSION:
+        raise ValueError(f"{path}: unsupported profile version {profile.get('version')!r}")
+    return profile
+
+
+# ─── Recording ────────────────────────────────────────────────────────────────
+def _sample_inputs(models, n: int) -> dict:
+    """Representative inputs for each model, as the pipeline builds them."""
+    import pandas as pd
+    from health_metrics import HealthMetrics
+
+    rng = np.random.default_rng(0)
+    users = []
+    for _ in range(n):
+        user = {
+            "age": int(rng.integers(18, 70)),
+            "gender": str(rng.choice(["Male", "Female"])),
+            "height_cm": float(rng.uniform(150, 195)),
+            "weight_kg": float(rng.uniform(50, 120)),
+            "activity_level": str(rng.choice(list(models.ACTIVITY_COLUMNS))),
+            "fitness_goal": str(rng.choice(["Weight Loss", "Muscle Gain", "Endurance",
+                                            "General Fitness"])),
+        }
+        m = HealthMetrics(user)
+        users.append(dict(user, bmi=m.bmi(), bmr=m.bmr(), tdee=m.tdee()))
+
+    cluster_rows = [pd.DataFrame(models.cluster_features(u["age"], u["bmi"], u["activity_level"]),
+                                 columns=models.SCALER_COLUMNS) for u in users]
+    calorie_rows = [pd.DataFrame([u]) for u in users]
+    return {
+        "scaler":               cluster_rows,
+        "kmeans":               [models._models["scaler"].transform(r) for r in cluster_rows],
+        "calorie_preprocessor": calorie_rows,
+        "dtr":                  [models._models["calorie_preprocessor"].transform(r)
+                                 for r in calorie_rows],
+        "sentence_transformer": [["knee pain and quick meals"]] * n,
+    }
+
+
+def record(models, n: int = 200, memory: dict | None = None) -> dict:
+    """Latency quantiles (ms) of every real model call; stubs are skipped."""
+    inputs = _sample_inputs(models, n)
+    profile = {"version": PROFILE_VERSION, "recorded_at": time.time(),
+               "calorie_backend": models.calorie_backend, "models": {}}
+    for key, method in MODEL_METHODS.items():
+        if models.sources.get(key) in ("stub", "simulated"):
+            logger.warning(f"⚠️ {key} is a {models.sources[key]} model — not profiled")
+            continue
+        fn = getattr(models._models[key], method)
+        fn(inputs[key][0])                                      # warm-up
+        samples = []
+        for x in inputs[key]:
+            start = time.perf_counter()
+            fn(x)
+            samples.append((time.perf_counter() - start) * 1000)
+        entry = {"method": method,
+                 "quantiles_ms": [[q, float(np.quantile(samples, q))] for q in QUANTILES],
+                 "memory_mb": (memory or {}).get(key, 0.0)}
+        if key == "sentence_transformer":
+            bank = models._build_candidate_bank("", "")
+            start = time.perf_counter()
+            fn(bank)
+            batch_ms = (time.perf_counter() - start) * 1000
+            entry["per_row_ms"] = max(batch_ms - float(np.median(samples)), 0.0) / (len(bank) - 1)
+        profile["models"][key] = entry
+        logger.info(f"✅ {key}.{method}: p50 {np.median(samples):.2f} ms, "
+                    f"p99 {np.quantile(samples, 0.99):.2f} ms")
+    return profile
+
+
+def measure_memory(model_dir: str, files: dict) -> dict:
+    """RSS added by loading each model file (MB); objects stay alive until all are measured."""
+    from model_loader import _safe_load
+
+    out, keep = {}, []
+    for key, filename in files.items():
+        path = os.path.join(model_dir, filename)
+        if not os.path.exists(path):
+            continue
+        before = rss_mb()
+        keep.append(_safe_load(path))
+        after = rss_mb()
+        out[key] = max((after or 0.0) - (before or 0.0), 0.0)
+    return out
+
+
+def main(argv: list[str] | None = None):
+    from model_loader import ModelLoader
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="profile the real models")
+    rec.add_argument("--model-dir", default=".")
+    rec.add_argument("--out", default="models/latency_profile.json")
+    rec.add_argument("-n", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    models = ModelLoader(model_dir=args.model_dir)
+    profile = record(models, args.n, measure_memory(args.model_dir, models._files))
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(profile, f, indent=2)
+    print(f"✅ Wrote {args.out} ({len(profile['models'])} models)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""plan_pipeline.py — UI-independent plan generation shared by the app and batch jobs.
+
+Generation is a chain of stages, each declaring the ``user_data`` fields it
+reads and the stages it depends on.  ``generate_plan`` runs them all;
+``IncrementalPlanner`` keeps the last inputs / outputs per session and re-runs
+only stages whose inputs changed or whose upstream output actually changed —
+a budget tweak re-runs the diet stage (and the grocery list if the meals
+changed), an extra equipment box only the workout stage (and the energy stage
+if the workout itself changed).
+
+An optional ``Deadline`` is passed to every stage.  Stages that cannot finish
+in budget degrade instead of blocking: preference matching and injury-driven
+exercise swaps are skipped, the calorie model falls back to ``HealthMetrics.target_calories`` (also when the
+model is a stub or fails), and the weight projection is dropped.  The result
+lists what applied under ``degradations``; degraded outputs are never cached.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from typing import Callable
+
+import plan_table
+from exercise_index import get_exercise_index, mentions_injury
+from food_index import parse_exclusions
+from grocery import grocery_list
+from health_metrics import HealthMetrics
+from load_control import Deadline
+from plan_records import DietPlan, WorkoutWeek
+from planner import BURN_ENGINE, WorkoutPlanner
+from weight_projection import project_user
+
+
+logger = logging.getLogger(__name__)
+
+# Time kept back for the stages after preference matching (table lookups, projection)
+DOWNSTREAM_RESERVE_S = 0.05
+
+PREFERENCE_WORKERS = 2
+_preference_pool: ThreadPoolExecutor | None = None
+_preference_pool_lock = threading.Lock()
+# Submitted-but-unfinished encoder calls; a timed-out call keeps its worker until it returns
+_preference_slots = threading.BoundedSemaphore(PREFERENCE_WORKERS)
+
+
+def _preference_executor() -> ThreadPoolExecutor:
+    global _preference_pool
+    with _preference_pool_lock:
+        if _preference_pool is None:
+            _preference_pool = ThreadPoolExecutor(max_workers=PREFERENCE_WORKERS,
+                                                  thread_name_prefix="preferences")
+        return _preference_pool
+
+
+def build_user_data(
+    age, gender, height, weight,
+    activity_level, fitness_goal,
+    dietary_preference, cultural_food,
+    budget, equipment, free_text,
+    household_size: int = 1,
+) -> dict:
+    """Map the app's form inputs onto the ``user_data`` dict used everywhere else."""
+    return {
+        "age": age,
+        "gender": gender,
+        "height_cm": height,
+        "weight_kg": weight,
+        "activity_level": activity_level,
+        "fitness_goal": fitness_goal,
+        "dietary_preference": dietary_preference,
+        "cultural_food_habits": cultural_food,
+        "budget_usd_per_day": budget,
+        "available_equipment": equipment or [],
+        "free_text_prefs": free_text or "",
+        "household_size": household_size,
+    }
+
+
+# ─── Stages ───────────────────────────────────────────────────────────────────
+class RunContext:
+    """Per-request deadline plus the degradations applied so far."""
+
+    def __init__(self, deadline: Deadline | None = None):
+        self.deadline = deadline or Deadline(None)
+        self.degradations: list[str] = []
+        self.degraded_stages: set[str] = set()
+
+    def degrade(self, stage: str, code: str, reason: str):
+        self.degradations.append(code)
+        self.degraded_stages.add(stage)
+        logger.warning(f"⚠️ {stage}: {reason}")
+
+
+def _metrics(models, user_data: dict, r: dict, ctx: RunContext) -> dict:
+    metrics = HealthMetrics(user_data)
+    return {
+        "bmi": round(metrics.bmi(), 2),
+        "bmr": round(metrics.bmr(), 1),
+        "tdee": round(metrics.tdee(), 1),
+    }
+
+
+def _cluster(models, user_data: dict, r: dict, ctx: RunContext) -> dict:
+    cluster = models.assign_cluster(user_data["age"], r["bmi"], user_data["activity_level"])
+    return {"cluster": cluster, "fitness_level": models.cluster_profile(cluster)["fitness_level"]}
+
+
+def _calories(models, user_data: dict, r: dict, ctx: RunContext) -> dict:
+    def fallback(reason: str) -> dict:
+        ctx.degrade("calories", "calories_fallback", f"{reason} — using TDEE-based target")
+        return {"predicted_calories": HealthMetrics(user_data).target_calories()}
+
+    if models.sources.get("dtr") == "stub":
+        return fallback("calorie model unavailable")
+    if ctx.deadline.expired():
+        return fallback("deadline reached")
+
+    calorie_features = models.preprocess_calories({
+        "age": user_data["age"],
+        "gender": user_data["gender"],
+        "height_cm": user_data["height_cm"],
+        "weight_kg": user_data["weight_kg"],
+        "activity_level": user_data["activity_level"],
+        "fitness_goal": user_data["fitness_goal"],
+        "bmi": r["bmi"],
+        "bmr": r["bmr"],
+        "tdee": r["tdee"],
+    })
+    try:
+        return {"predicted_calories": models.predict_calories(calorie_features)}
+    except Exception as e:
+        return fallback(f"calorie model failed ({type(e).__name__}: {e})")
+
+
+def _preferences(models, user_data: dict, r: dict, ctx: RunContext) -> dict:
+    text = user_data["free_text_prefs"].strip()
+    if not text:
+        return {"notes": []}
+    args = (text, r["fitness_level"], user_data["fitness_goal"])
+
+    budget = ctx.deadline.remaining() - DOWNSTREAM_RESERVE_S
+    if budget == float("inf"):
+        return {"notes": models.match_preferences(*args)}
+    if budget <= 0:
+        ctx.degrade("preferences", "preferences_skipped", "no time budget left")
+        return {"notes": []}
+
+    # Never queue behind encoder calls that outlived their own request's budget
+    if not _preference_slots.acquire(blocking=False):
+        ctx.degrade("preferences", "preferences_skipped", "preference workers busy")
+        return {"notes": []}
+    future = _preference_executor().submit(models.match_preferences, *args)
+    future.add_done_callback(lambda _: _preference_slots.release())
+    try:
+        return {"notes": future.result(timeout=budget)}
+    except FuturesTimeout:
+        future.cancel()
+        ctx.degrade("preferences", "preferences_skipped", f"not done within {budget * 1000:.0f} ms")
+        return {"notes": []}
+
+
+def _workout(models, user_data: dict, r: dict, ctx: RunContext) -> dict:
+    plan = plan_table.workout_plan(
+        fitness_level=r["fitness_level"],
+        fitness_goal=user_data["fitness_goal"],
+        available_equipment=user_data["available_equipment"],
+        notes=r["notes"],
+    )
+    text = user_data["free_text_prefs"].strip()
+    index = get_exercise_index()
+    if not mentions_injury(text) or index is None or not index.usable_with(models):
+        return {"workout_plan": plan}
+    if ctx.deadline.remaining() <= DOWNSTREAM_RESERVE_S:
+        ctx.degrade("workout", "swaps_skipped", "no time budget left for exercise swaps")
+        return {"workout_plan": plan}
+    return {"workout_plan": WorkoutPlanner.swap_exercises(
+        plan, models.encode([text])[0], r["fitness_level"], user_data["available_equipment"])}
+
+
+def _diet(models, user_data: dict, r: dict, ctx: RunContext) -> dict:
+    return {"diet_plan": plan_table.diet_plan(
+        daily_calories=r["predicted_calories"],
+        macros={"protein_pct": 30, "carbs_pct": 40, "fat_pct": 30},
+        dietary_preference=user_data["dietary_preference"],
+        cultural_food_habits=user_data["cultural_food_habits"],
+        budget_usd=user_data["budget_usd_per_day"],
+        notes=r["notes"],
+        exclusions=parse_exclusions(user_data["free_text_prefs"]),
+    )}
+
+
+def _grocery(models, user_data: dict, r: dict, ctx: RunContext) -> dict:
+    return {"grocery_list": grocery_list(r["diet_plan"]["weekly_plan"], user_data.get("household_size", 1))}
+
+
+def _energy(models, user_data: dict, r: dict, ctx: RunContext) -> dict:
+    weekly_burn = round(BURN_ENGINE.plan_burn(r["workout_plan"], user_data["weight_kg"]), 0)
+    if ctx.deadline.expired():
+        ctx.degrade("energy", "projection_skipped", "deadline reached")
+        return {"weekly_burn_kcal": weekly_burn, "weight_projection": None}
+    return {
+        "weekly_burn_kcal": weekly_burn,
+        "weight_projection": project_user(user_data, r["tdee"], r["predicted_calories"], weekly_burn),
+    }
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    inputs: tuple[str, ...]      # user_data fields read
+    deps: tuple[str, ...]        # upstream stages whose outputs are read
+    run: Callable[[object, dict, dict, RunContext], dict]
+
+
+_BODY = ("age", "gender", "height_cm", "weight_kg", "activity_level", "fitness_goal")
+
+# Topological order
+STAGES = [
+    Stage("metrics",     _BODY,                                       (),                                  _metrics),
+    Stage("cluster",     ("age", "activity_level"),                   ("metrics",),                        _cluster),
+    Stage("calories",    _BODY,                                       ("metrics",),                        _calories),
+    Stage("preferences", ("free_text_prefs", "fitness_goal"),         ("cluster",),                        _preferences),
+    Stage("workout",     ("fitness_goal", "available_equipment", "free_text_prefs"),
+                                                                      ("cluster", "preferences"),          _workout),
+    Stage("diet",        ("dietary_preference", "cultural_food_habits", "budget_usd_per_day",
+                          "free_text_prefs"),                         ("calories", "preferences"),         _diet),
+    Stage("grocery",     ("household_size",),                         ("diet",),                           _grocery),
+    Stage("energy",      ("age", "gender", "height_cm", "weight_kg"), ("metrics", "calories", "workout"), _energy),
+]
+STAGE_INPUTS = sorted({field for stage in STAGES for field in stage.inputs})
+
+RESULT_KEYS = ["bmi", "bmr", "tdee", "cluster", "fitness_level", "predicted_calories",
+               "workout_plan", "diet_plan", "grocery_list", "weekly_burn_kcal", "weight_projection"]
+
+
+def generate_plan(models, user_data: dict, deadline: Deadline | None = None) -> dict:
+    """Run metrics → clustering → calorie model → planners for one user."""
+    ctx = RunContext(deadline)
+    merged: dict = {}
+    for stage in STAGES:
+        merged.update(stage.run(models, user_data, merged, ctx))
+    return dict({k: merged[k] for k in RESULT_KEYS}, degradations=ctx.degradations)
+
+
+# ─── Incremental re-planning ──────────────────────────────────────────────────
+# Stage outputs held per session as frozen plan records instead of nested dicts
+_RECORDS = {"workout_plan": WorkoutWeek, "diet_plan": DietPlan}
+
+
+def _compact(out: dict) -> dict:
+    return {k: _RECORDS[k].from_dict(v) if k in _RECORDS else v for k, v in out.items()}
+
+
+def _expand(out: dict) -> dict:
+    return {k: v.to_dict() if k in _RECORDS else v for k, v in out.items()}
+
+
+class _Session:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.user_data: dict | None = None
+        self.outputs: dict[str, dict] = {}
+        self.stale: set[str] = set()        # degraded last time — recompute
+        self.models_ref = None              # weakref to the models the outputs came from
+
+
+class IncrementalPlanner:
+    """
+    Per-session stage cache (LRU over ``max_sessions``).  ``plan`` returns the
+    ``generate_plan`` dict and a ``{"ran": [...], "skipped": [...]}`` report.
+    Workout and diet plans are cached as ``plan_records`` and expanded into
+    fresh dicts per call, so callers cannot edit the cache.
+    Passing different ``models`` (e.g. after a registry swap) invalidates the
+    session's cached outputs.
+    """
+
+    def __init__(self, models=None, max_sessions: int = 1024):
+        self.models = models
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _session(self, session_id: str) -> _Session:
+        with self._lock:
+            session = self._sessions.pop(session_id, None) or _Session()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def plan(self, session_id: str, user_data: dict,
+             deadline: Deadline | None = None, models=None) -> tuple[dict, dict]:
+        models = models or self.models
+        session = self._session(session_id)
+        ctx = RunContext(deadline)
+        with session.lock:
+            if session.models_ref is None or session.models_ref() is not models:
+                session.outputs.clear()
+                session.models_ref = weakref.ref(models)
+            prev, outputs = session.user_data, session.outputs
+            changed_inputs = (set(STAGE_INPUTS) if prev is None else
+                              {k for k in STAGE_INPUTS if prev.get(k) != user_data.get(k)})
+
+            ran, skipped, changed_stages = [], [], set()
+            merged: dict = {}
+            for stage in STAGES:
+                if (stage.name not in outputs
+                        or stage.name in session.stale
+                        or changed_inputs.intersection(stage.inputs)
+                        or changed_stages.intersection(stage.deps)):
+                    raw = stage.run(models, user_data, merged, ctx)
+                    out = _compact(raw)
+                    # Early cut-off: an identical output leaves dependents valid
+                    if out != outputs.get(stage.name):
+                        changed_stages.add(stage.name)
+                    outputs[stage.name] = out
+                    ran.append(stage.name)
+                    merged.update(raw)
+                else:
+                    skipped.append(stage.name)
+                    merged.update(_expand(outputs[stage.name]))
+            session.stale = set(ctx.degraded_stages)
+
+            session.user_data = dict(user_data)
+            result = dict({k: merged[k] for k in RESULT_KEYS}, degradations=ctx.degradations)
+
+        logger.debug(f"Session {session_id}: ran {ran}, skipped {skipped}")
+        return result, {"ran": ran, "skipped": skipped}
+
+    def adopt(self, session_id: str, source_id: str):
+        """
+        Copy ``source_id``'s stage cache into ``session_id`` — for a session
+        that was handed another session's (single-flight) result, so its next
+        edit re-runs only what changed.  Stage outputs are replaced, never
+        mutated, so the two sessions can share them.
+        """
+        if session_id == source_id:
+            return
+        with self._lock:
+            source = self._sessions.get(source_id)
+        if source is None:
+            return
+        with source.lock:
+            user_data, outputs, stale, models_ref = (
+                source.user_data, dict(source.outputs), set(source.stale), source.models_ref)
+        session = self._session(session_id)
+        with session.lock:
+            session.user_data, session.outputs, session.stale, session.models_ref = (
+                user_data, outputs, stale, models_ref)
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
@@ -0,0 +1,187 @@
+"""plan_records.py — Immutable, slotted plan records with the dict / JSON shape on demand.
+
+A plan held as nested dicts repeats every key string slot per meal and per
+exercise, and its exercise dicts used to be the very ``EXERCISE_DB`` entries,
+so a caller editing a plan edited the database.  The records here are frozen
+``__slots__`` dataclasses laid out per plan in columns: a week is one object
+holding a tuple per field, and its leaves (``Exercise``, ``Food``) are
+interned, so every plan that prescribes "Push-ups 4×12" or "Masala oats"
+points at the same instance.  ``to_dict`` rebuilds the current
+``WorkoutPlanner.generate`` / ``DietPlanner.generate`` shape with fresh dicts;
+``from_dict`` compacts such a dict (e.g. a plan-table or swapped week).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+_EXERCISES: dict[tuple, "Exercise"] = {}
+_FOODS: dict[tuple, "Food"] = {}
+
+
+# ─── Workout ──────────────────────────────────────────────────────────────────
+@dataclass(frozen=True, slots=True)
+class Exercise:
+    name: str
+    sets: str
+    muscle: str
+
+    @classmethod
+    def of(cls, name: str, sets: str, muscle: str) -> "Exercise":
+        """The interned record for this prescription."""
+        key = (name, sets, muscle)
+        ex = _EXERCISES.get(key)
+        if ex is None:
+            ex = _EXERCISES.setdefault(key, cls(name, sets, muscle))
+        return ex
+
+    @classmethod
+    def from_dict(cls, ex: dict) -> "Exercise":
+        return cls.of(ex["name"], ex["sets"], ex["muscle"])
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "sets": self.sets, "muscle": self.muscle}
+
+
+REST_NOTES = "Active recovery: light walking or stretching"
+
+
+@dataclass(frozen=True, slots=True)
+class WorkoutWeek:
+    """One plan, one tuple per day field; rest days have no exercises and 0 minutes."""
+    days: tuple[str, ...]
+    focus: tuple[str, ...]
+    exercises: tuple[tuple[Exercise, ...], ...]
+    duration_min: tuple[int, ...]
+    notes: tuple[str, ...]
+
+    @classmethod
+    def from_dict(cls, plan: list[dict]) -> "WorkoutWeek":
+        return cls(
+            days=tuple(d["day"] for d in plan),
+            focus=tuple(d["focus"] for d in plan),
+            exercises=tuple(tuple(Exercise.from_dict(ex) for ex in d["exercises"]) for d in plan),
+            duration_min=tuple(d["duration_min"] for d in plan),
+            notes=tuple(d["notes"] for d in plan),
+        )
+
+    def to_dict(self) -> list[dict]:
+        return [
+            {"day": day, "focus": focus, "type": "rest" if "Rest" in focus else "workout",
+             "exercises": [ex.to_dict() for ex in exercises],
+             "duration_min": minutes, "notes": notes}
+            for day, focus, exercises, minutes, notes
+            in zip(self.days, self.focus, self.exercises, self.duration_min, self.notes)
+        ]
+
+
+# ─── Diet ─────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True, slots=True)
+class Food:
+    """A meal's food: energy, macros and (for planned days) cost of ``servings`` servings."""
+    item: str
+    calories: int
+    protein: float
+    carbs: float
+    fat: float
+    cost: float | None = None
+    servings: float = 1.0
+
+    @classmethod
+    def of(cls, item: str, calories: int, protein: float, carbs: float, fat: float,
+           cost: float | None = None, servings: float = 1.0) -> "Food":
+        key = (item, calories, protein, carbs, fat, cost, servings)
+        food = _FOODS.get(key)
+        if food is None:
+            food = _FOODS.setdefault(key, cls(*key))
+        return food
+
+    @classmethod
+    def from_dict(cls, meal: dict) -> "Food":
+        return cls.of(meal["item"], meal["calories"], meal["protein"], meal["carbs"], meal["fat"],
+                      meal.get("cost"), meal.get("servings", 1.0))
+
+    def meal(self, name: str, target_calories: int, with_cost: bool = True) -> dict:
+        meal = {"name": name, "item": self.item, "servings": self.servings, "calories": self.calories,
+                "target_calories": target_calories,
+                "protein": self.protein, "carbs": self.carbs, "fat": self.fat}
+        if with_cost:
+            meal["cost"] = self.cost
+        return meal
+
+
+@dataclass(frozen=True, slots=True)
+class DishIdea:
+    item: str
+    course: str
+    region: str | None
+    minutes: int | None
+
+    def to_dict(self) -> dict:
+        return {"item": self.item, "course": self.course, "region": self.region, "minutes": self.minutes}
+
+
+@dataclass(frozen=True, slots=True)
+class DietPlan:
+    """
+    ``weekly[d][m]`` is day ``d``'s meal ``m``; meal names and calorie targets
+    are shared by every day (and the template), so they are stored once.
+    """
+    days: tuple[str, ...]
+    meal_names: tuple[str, ...]
+    target_calories: tuple[int, ...]
+    weekly: tuple[tuple[Food, ...], ...]
+    template: tuple[Food, ...]
+    total_daily_cal: float
+    macros: tuple[tuple[str, object], ...]
+    budget_usd: float
+    within_budget: bool
+    dietary_preference: str
+    cultural_food_habits: str
+    exclusions: tuple[str, ...]
+    nlp_adjustment: str | None
+    dish_ideas: tuple[DishIdea, ...]
+
+    @classmethod
+    def from_dict(cls, plan: dict) -> "DietPlan":
+        template = plan["daily_template"]
+        return cls(
+            days=tuple(d["day"] for d in plan["weekly_plan"]),
+            meal_names=tuple(m["name"] for m in template),
+            target_calories=tuple(m["target_calories"] for m in template),
+            weekly=tuple(tuple(Food.from_dict(m) for m in d["meals"]) for d in plan["weekly_plan"]),
+            template=tuple(Food.from_dict(m) for m in template),
+            total_daily_cal=plan["total_daily_cal"],
+            macros=tuple(plan["macros"].items()),
+            budget_usd=plan["budget_usd"],
+            within_budget=plan["within_budget"],
+            dietary_preference=plan["dietary_preference"],
+            cultural_food_habits=plan["cultural_food_habits"],
+            exclusions=tuple(plan["exclusions"]),
+            nlp_adjustment=plan["nlp_adjustment"],
+            dish_ideas=tuple(DishIdea(**idea) for idea in plan["dish_ideas"]),
+        )
+
+    def to_dict(self) -> dict:
+        names, targets = self.meal_names, self.target_calories
+        weekly_plan = []
+        for day, foods in zip(self.days, self.weekly):
+            meals = [food.meal(name, target) for food, name, target in zip(foods, names, targets)]
+            calories = sum(f.calories for f in foods)
+            weekly_plan.append({"day": day, "meals": meals, "calories": calories,
+                                "calorie_gap": calories - round(self.total_daily_cal)})
+        return {
+            "weekly_plan":       weekly_plan,
+            "daily_template":    [food.meal(name, target, with_cost=False)
+                                  for food, name, target in zip(self.template, names, targets)],
+            "total_daily_cal":   self.total_daily_cal,
+            "macros":            dict(self.macros),
+            "budget_usd":        self.budget_usd,
+            "within_budget":     self.within_budget,
+            "dietary_preference":self.dietary_preference,
+            "cultural_food_habits": self.cultural_food_habits,
+            "exclusions":        list(self.exclusions),
+            "nlp_adjustment":    self.nlp_adjustment,
+            "dish_ideas":        [idea.to_dict() for idea in self.dish_ideas],
+        }
@@ -0,0 +1,330 @@
+"""plan_table.py — Precomputed lookup table over the finite plan space.
+
+``WorkoutPlanner.generate`` only depends on (fitness_level, fitness_goal, owned
+equipment set) and ``DietPlanner.generate`` picks meals only by (diet key,
+culture key), with calorie targets scaled linearly.  That is 4 × 5 × 32 workout
+weeks and 6 × 4 meal weeks, so we enumerate all of them offline into small integer
+arrays that index into a catalog of exercises / foods:
+
+    workout_exercises  int16 (n_workout_keys, 7, 6)   -1 = padding
+    workout_focus      int16 (n_workout_keys, 7)      index into focus names
+    workout_duration   int16 (n_workout_keys, 7)
+    diet_weekly        int16 (n_diet_keys, 7, 5)      index into foods
+    diet_template      int16 (n_diet_keys, 5)
+
+The arrays are memory-mapped at load; serving is a dict lookup for the row
+plus rebuilding the output dicts, rescaling calorie targets and each day's
+servings (tabled weeks are built at one serving; catalogue
+``dish_ideas`` are O(1) draws from ``meal_bank`` and stay live).  A fingerprint of
+the planner's data tables is stored with the arrays, so a stale table is
+ignored rather than served.  Plans with free-text food exclusions are not
+tabled and always generate live.
+
+    python plan_table.py build    # writes models/plan_table
+    python plan_table.py verify   # table output == live generation
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+
+from config import APP_CONFIG
+from exercise_catalog import TIMING
+from exercise_scheduler import (
+    EQUIPMENT, FOCUS_MUSCLES, MAX_EXERCISES, MUSCLE_TOKENS, SCORE_WEIGHTS, equipment_mask, equipment_names,
+)
+from food_index import DIET_EXCLUSIONS, diet_mask
+from meal_bank import CUISINES
+from plan_records import REST_NOTES
+from planner import (
+    DAYS, DIET_BANKS, EXERCISE_DB, FOOD_DB, FOOD_INDEX, MEAL_CALORIE_SPLITS, MEAL_COST, MEAL_NAMES,
+    RECIPE_BOOK, WEEKLY_STRUCTURE,
+    DietPlanner, WorkoutPlanner, _dish_ideas, _resolve_culture_key, _resolve_diet_key,
+    _serve, _servings, _workout_note,
+)
+
+
+logger = logging.getLogger(__name__)
+
+TABLE_VERSION  = 8
+MANIFEST_FILE  = "plan_table.json"
+CULTURE_KEYS   = CUISINES
+
+
+def fingerprint() -> str:
+    """Hash of every planner table the enumeration depends on."""
+    blob = json.dumps(
+        [EXERCISE_DB, WEEKLY_STRUCTURE, FOOD_DB, MEAL_NAMES, MEAL_CALORIE_SPLITS, DAYS,
+         TIMING, MUSCLE_TOKENS, FOCUS_MUSCLES, SCORE_WEIGHTS, EQUIPMENT, DIET_BANKS, DIET_EXCLUSIONS, FOOD_INDEX.masks.tolist(),
+         RECIPE_BOOK.meal_nutrients.round(3).tolist(), MEAL_COST.round(4).tolist(), TABLE_VERSION],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+# ─── Build ────────────────────────────────────────────────────────────────────
+class _Interner:
+    """Assigns stable integer ids to JSON-able records."""
+
+    def __init__(self):
+        self.items: list = []
+        self._ids: dict = {}
+
+    def __call__(self, record) -> int:
+        key = json.dumps(record, sort_keys=True, ensure_ascii=False)
+        if key not in self._ids:
+            self._ids[key] = len(self.items)
+            self.items.append(record)
+        return self._ids[key]
+
+
+def build(out_dir: str) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    exercises, foods, focus = _Interner(), _Interner(), _Interner()
+
+    workout_keys = [(lvl, goal, mask)
+                    for lvl in EXERCISE_DB for goal in WEEKLY_STRUCTURE for mask in range(1 << len(EQUIPMENT))]
+    w_ex  = np.full((len(workout_keys), len(DAYS), MAX_EXERCISES), -1, dtype=np.int16)
+    w_foc = np.zeros((len(workout_keys), len(DAYS)), dtype=np.int16)
+    w_dur = np.zeros((len(workout_keys), len(DAYS)), dtype=np.int16)
+    for k, (lvl, goal, mask) in enumerate(workout_keys):
+        for d, day in enumerate(WorkoutPlanner.generate(lvl, goal, equipment_names(mask), notes=[])):
+            w_foc[k, d] = focus(day["focus"])
+            w_dur[k, d] = day["duration_min"]
+            for e, ex in enumerate(day["exercises"]):
+                w_ex[k, d, e] = exercises(ex)
+
+    diet_keys = [(diet, culture) for diet in DIET_BANKS for culture in CULTURE_KEYS]
+    d_week = np.zeros((len(diet_keys), len(DAYS), len(MEAL_NAMES)), dtype=np.int16)
+    d_tmpl = np.zeros((len(diet_keys), len(MEAL_NAMES)), dtype=np.int16)
+    for k, (diet, culture) in enumerate(diet_keys):
+        plan = DietPlanner.generate(0.0, {}, diet, culture, 0.0, notes=[])
+        for d, day in enumerate(plan["weekly_plan"]):
+            for m, meal in enumerate(day["meals"]):
+                d_week[k, d, m] = foods(_food_record(meal))
+        for m, meal in enumerate(plan["daily_template"]):
+            d_tmpl[k, m] = foods(_food_record(meal))
+
+    arrays = {"workout_exercises": w_ex, "workout_focus": w_foc, "workout_duration": w_dur,
+              "diet_weekly": d_week, "diet_template": d_tmpl}
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr, allow_pickle=False)
+
+    manifest = {
+        "version":      TABLE_VERSION,
+        "fingerprint":  fingerprint(),
+        "workout_keys": workout_keys,
+        "diet_keys":    diet_keys,
+        "exercises":    exercises.items,
+        "foods":        foods.items,
+        "focus":        focus.items,
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    size = sum(a.nbytes for a in arrays.values())
+    logger.info(f"✅ Plan table: {len(workout_keys)} workout × {len(diet_keys)} diet keys, "
+                f"{size:,} bytes of arrays → {out_dir}")
+    return manifest
+
+
+def _food_record(meal: dict) -> dict:
+    # The template has no cost; keep whichever fields the live output carries
+    return {k: meal[k] for k in ("item", "calories", "protein", "carbs", "fat", "cost") if k in meal}
+
+
+# ─── Serve ────────────────────────────────────────────────────────────────────
+class PlanTable:
+    def __init__(self, table_dir: str):
+        with open(os.path.join(table_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != TABLE_VERSION:
+            raise ValueError(f"plan table v{manifest.get('version')} != v{TABLE_VERSION}")
+        self.fresh = manifest["fingerprint"] == fingerprint()
+
+        def load(name):
+            return np.load(os.path.join(table_dir, f"{name}.npy"), mmap_mode="r")
+
+        self._w_ex, self._w_foc, self._w_dur = (
+            load("workout_exercises"), load("workout_focus"), load("workout_duration"))
+        self._d_week, self._d_tmpl = load("diet_weekly"), load("diet_template")
+        self._workout_row = {tuple(k): i for i, k in enumerate(manifest["workout_keys"])}
+        self._diet_row    = {tuple(k): i for i, k in enumerate(manifest["diet_keys"])}
+        self._exercises   = manifest["exercises"]
+        self._foods       = manifest["foods"]
+        self._focus       = manifest["focus"]
+        # Unrounded one-serving MEAL_COST and energy, as _fit_budget prices and scales days
+        self._food_row    = np.array([RECIPE_BOOK.meal_index[food["item"]] for food in self._foods],
+                                     dtype=np.int64)
+        d_week            = self._food_row[np.asarray(self._d_week)]
+        self._d_day_cost  = MEAL_COST[d_week].sum(axis=-1)                    # (n_diet_keys, 7)
+        self._d_day_kcal  = RECIPE_BOOK.meal_energy[d_week].sum(axis=-1)      # (n_diet_keys, 7)
+
+    def workout(self, fitness_level: str, fitness_goal: str,
+                available_equipment: list[str], notes: list[str]) -> list[dict] | None:
+        """Same output as ``WorkoutPlanner.generate``; None if the key is not tabled."""
+        row = self._workout_row.get(
+            (fitness_level, fitness_goal, equipment_mask(available_equipment)))
+        if row is None:
+            return None
+        ex_rows, foc_row, dur_row = (
+            self._w_ex[row].tolist(), self._w_foc[row].tolist(), self._w_dur[row].tolist())
+        plan = []
+        for d, day in enumerate(DAYS):
+            focus = self._focus[foc_row[d]]
+            if "Rest" in focus:
+                plan.append({
+                    "day": day, "focus": focus, "type": "rest",
+                    "exercises": [],
+                    "duration_min": 0, "notes": REST_NOTES,
+                })
+            else:
+                plan.append({
+                    "day": day, "focus": focus, "type": "workout",
+                    "exercises": [dict(self._exercises[e]) for e in ex_rows[d] if e >= 0],
+                    "duration_min": dur_row[d],
+                    "notes": _workout_note(focus, fitness_goal, notes),
+                })
+        return plan
+
+    def diet(self, daily_calories: float, macros: dict, dietary_preference: str,
+             cultural_food_habits: str, budget_usd: float, notes: list[str],
+             exclusions: list[str] | None = None) -> dict | None:
+        """Same output as ``DietPlanner.generate``; None if the key is not tabled."""
+        if exclusions:
+            return None
+        diet_key = _resolve_diet_key(dietary_preference)
+        culture_key = _resolve_culture_key(cultural_food_habits)
+        row = self._diet_row.get((diet_key, culture_key))
+        if row is None:
+            return None
+        # Tabled weeks are unconstrained; a day over budget once served needs the live optimiser
+        day_cost = self._d_day_cost[row] * _servings(self._d_day_kcal[row], daily_calories)
+        if budget_usd and budget_usd > 0 and day_cost.max() > budget_usd + 1e-9:
+            return None
+        cals = [round(daily_calories * split) for split in MEAL_CALORIE_SPLITS]
+        week_rows, tmpl_row = self._food_row[self._d_week[row]], self._food_row[self._d_tmpl[row]]
+
+        weekly_plan = []
+        for d, day in enumerate(DAYS):
+            foods = _serve(week_rows[d], daily_calories)
+            calories = sum(food.calories for food in foods)
+            weekly_plan.append({"day": day,
+                                "meals": [food.meal(name, cal) for food, name, cal in zip(foods, MEAL_NAMES, cals)],
+                                "calories": calories, "calorie_gap": calories - round(daily_calories)})
+
+        daily_template = [food.meal(name, cal, with_cost=False)
+                          for food, name, cal in zip(_serve(tmpl_row, daily_calories), MEAL_NAMES, cals)]
+
+        return {
+            "weekly_plan":       weekly_plan,
+            "daily_template":    daily_template,
+            "total_daily_cal":   daily_calories,
+            "macros":            macros,
+            "budget_usd":        budget_usd,
+            "within_budget":     True,
+            "dietary_preference":dietary_preference,
+            "cultural_food_habits": cultural_food_habits,
+            "exclusions":        [],
+            "nlp_adjustment":    notes[1] if len(notes) > 1 else None,
+            "dish_ideas":        _dish_ideas(diet_key, culture_key, diet_mask(diet_key)),
+        }
+
+
+_TABLE: PlanTable | None = None
+_TABLE_LOADED = False
+
+
+def get_table(table_dir: str | None = None) -> PlanTable | None:
+    """The process-wide table, or None when it is missing or stale."""
+    global _TABLE, _TABLE_LOADED
+    if _TABLE_LOADED and table_dir is None:
+        return _TABLE
+    table_dir = table_dir or APP_CONFIG.PLAN_TABLE_DIR
+    table = None
+    if os.path.exists(os.path.join(table_dir, MANIFEST_FILE)):
+        try:
+            table = PlanTable(table_dir)
+            if not table.fresh:
+                logger.warning(f"⚠️ {table_dir} was built from different planner data — ignoring")
+                table = None
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ Cannot load plan table {table_dir}: {e}")
+    _TABLE, _TABLE_LOADED = table, True
+    return table
+
+
+def workout_plan(fitness_level: str, fitness_goal: str,
+                 available_equipment: list[str], notes: list[str]) -> list[dict]:
+    """Table lookup with live generation as the fallback."""
+    table = get_table()
+    plan = table.workout(fitness_level, fitness_goal, available_equipment, notes) if table else None
+    if plan is None:
+        plan = WorkoutPlanner.generate(fitness_level, fitness_goal, available_equipment, notes)
+    return plan
+
+
+def diet_plan(daily_calories: float, macros: dict, dietary_preference: str,
+              cultural_food_habits: str, budget_usd: float, notes: list[str],
+              exclusions: list[str] | None = None) -> dict:
+    table = get_table()
+    args = (daily_calories, macros, dietary_preference, cultural_food_habits, budget_usd, notes,
+            exclusions)
+    plan = table.diet(*args) if table else None
+    if plan is None:
+        plan = DietPlanner.generate(*args)
+    return plan
+
+
+# ─── Verify ───────────────────────────────────────────────────────────────────
+def verify(table_dir: str, calories: tuple[float, ...] = (1200.0, 2187.4, 3999.5)) -> int:
+    """Compare table output with live generation for every key; returns mismatch count."""
+    table = PlanTable(table_dir)
+    if not table.fresh:
+        logger.error("❌ Fingerprint mismatch — rebuild the table")
+        return 1
+    notes = ["Focus on quick-prep meals under 20 minutes.", "Include intermittent fasting window (16:8)."]
+    mismatches = 0
+    for lvl, goal, mask in table._workout_row:
+        for equipment in (equipment_names(mask), equipment_names(mask)[::-1] + ["Kettlebell"]):
+            for n in ([], notes):
+                live = WorkoutPlanner.generate(lvl, goal, equipment, n)
+                if table.workout(lvl, goal, equipment, n) != live:
+                    mismatches += 1
+                    logger.error(f"❌ workout mismatch for {(lvl, goal, equipment, n)}")
+    prefs = ["Vegetarian", "Vegan", "Non-Vegetarian", "Pescatarian", "Keto", "Paleo"]
+    cultures = ["South Asian", "Western", "Middle Eastern", "East Asian"]
+    for pref in prefs:
+        for culture in cultures:
+            for cal in calories:
+                for budget in (0.0, 10.0):
+                    args = (cal, {"protein_pct": 30}, pref, culture, budget, notes)
+                    plan = table.diet(*args)
+                    # None is only allowed when the budget forces live generation
+                    if (plan is None and not budget) or (plan is not None
+                                                         and plan != DietPlanner.generate(*args)):
+                        mismatches += 1
+                        logger.error(f"❌ diet mismatch for {(pref, culture, cal, budget)}")
+    logger.info(f"{'✅' if not mismatches else '❌'} plan table verify: {mismatches} mismatches")
+    return mismatches
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cmd", choices=["build", "verify"])
+    parser.add_argument("--dir", default=APP_CONFIG.PLAN_TABLE_DIR)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "build":
+        build(args.dir)
+    else:
+        raise SystemExit(1 if verify(args.dir) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,19 @@
 
 from __future__ import annotations
 import random
+import zlib
+import numpy as np
+
+from calorie_burn import MEGAGYM_CSV, BurnEngine, load_gym_exercises
+from config import APP_CONFIG
+from exercise_catalog import ExerciseCatalog
+from exercise_index import EQUIPMENT_NAMES, PLANNER_LEVELS, body_parts_of, get_exercise_index
+from exercise_scheduler import ExerciseScheduler
+from food_index import FoodIndex, diet_mask, mask_of
+from food_store import get_store
+from meal_bank import get_meal_bank, resolve_cuisine
+from plan_records import REST_NOTES, DietPlan, DishIdea, Food, WorkoutWeek
+from recipes import MACROS, NUTRIENTS, RecipeBook
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -146,9 +159,54 @@ WEEKLY_STRUCTURE = {
 }
 
 DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+_DAYS = tuple(DAYS)
+
+# Embedded megaGym exercises (None until ``python exercise_index.py build``) — swap candidates
+EXERCISE_INDEX = get_exercise_index()
+# megaGym records with METs: the index's, else read from the CSV ([] when it is not pulled)
+_GYM_EXERCISES = EXERCISE_INDEX.gym_exercises() if EXERCISE_INDEX else load_gym_exercises(MEGAGYM_CSV)
+
+# Numeric sets/reps/seconds compiled once from the display strings above (+ megaGym swap-ins)
+EXERCISE_CATALOG = ExerciseCatalog(EXERCISE_DB, extra=_GYM_EXERCISES)
+# Per-exercise MET → kcal/kg, same ids as EXERCISE_CATALOG
+BURN_ENGINE = BurnEngine(EXERCISE_DB, gym=_GYM_EXERCISES)
+# Muscle / equipment bitsets for picking each day's exercises
+EXERCISE_SCHEDULER = ExerciseScheduler(EXERCISE_DB)
+
+
+# Session minutes per scheduled day (a tuple of interned exercises)
+_SESSION_MINUTES: dict[tuple, int] = {}
+
+
+def _session_minutes(exercises: tuple) -> int:
+    minutes = _SESSION_MINUTES.get(exercises)
+    if minutes is None:
+        minutes = _SESSION_MINUTES[exercises] = EXERCISE_CATALOG.estimate_session_minutes(
+            [ex.to_dict() for ex in exercises])
+    return minutes
 
 
 class WorkoutPlanner:
+    @staticmethod
+    def plan(
+        fitness_level: str,
+        fitness_goal: str,
+        available_equipment: list[str],
+        notes: list[str],
+    ) -> WorkoutWeek:
+        """The 7-day workout plan as an immutable record (``generate`` for dicts)."""
+        structure = WEEKLY_STRUCTURE.get(fitness_goal, WEEKLY_STRUCTURE["General Fitness"])
+        week = EXERCISE_SCHEDULER.week(fitness_level, fitness_goal, available_equipment, structure)
+        rest = ["Rest" in focus for focus in structure]
+        return WorkoutWeek(
+            days=_DAYS,
+            focus=tuple(structure),
+            exercises=week,
+            duration_min=tuple(0 if r else _session_minutes(ex) for r, ex in zip(rest, week)),
+            notes=tuple(REST_NOTES if r else _workout_note(focus, fitness_goal, notes)
+                        for r, focus in zip(rest, structure)),
+        )
+
     @staticmethod
     def generate(
         fitness_level: str,
@@ -157,55 +215,75 @@ class WorkoutPlanner:
         notes: list[str],
     ) -> list[dict]:
         """Return a 7-day workout plan."""
-        structure = WEEKLY_STRUCTURE.get(fitness_goal, WEEKLY_STRUCTURE["General Fitness"])
+        return WorkoutPlanner.plan(fitness_level, fitness_goal, available_equipment, notes).to_dict()
 
-        # Find best exercise set
-        level_db = EXERCISE_DB.get(fitness_level, EXERCISE_DB["Intermediate"])
-        goal_db  = level_db.get(fitness_goal, next(iter(level_db.values())))
-
-        # Pick equipment tier
-        equip_order = _rank_equipment(available_equipment)
-        exercises = goal_db.get(equip_order[0], next(iter(goal_db.values())))
-
-        plan = []
-        for i, (day, focus) in enumerate(zip(DAYS, structure)):
-            if "Rest" in focus:
-                plan.append({
-                    "day": day, "focus": focus, "type": "rest",
-                    "exercises": [],
-                    "duration_min": 0, "notes": "Active recovery: light walking or stretching",
-                })
-            else:
-                # Pick 4-6 exercises with slight variation per day
-                rng = random.Random(i + hash(fitness_level))
-                shuffled = exercises.copy()
-                rng.shuffle(shuffled)
-                n = min(6, max(4, len(shuffled)))
-                plan.append({
-                    "day": day, "focus": focus, "type": "workout",
-                    "exercises": shuffled[:n],
-                    "duration_min": 45 if fitness_level in ("Beginner", "Intermediate") else 60,
-                    "notes": _workout_note(focus, fitness_goal, notes),
-                })
+    @staticmethod
+    def swap_exercises(
+        plan: list[dict], avoid: np.ndarray, fitness_level: str, available_equipment: list[str],
+    ) -> list[dict]:
+        """
+        Replace exercises whose embedding is close to ``avoid`` (the encoded
+        injury text) with the nearest megaGym exercise for the same body
+        parts that the user's equipment and level allow and that is itself
+        far from ``avoid``.  Returns a new plan; ``plan`` is not modified.
+        """
+        index = EXERCISE_INDEX
+        avoid = np.asarray(avoid, dtype=np.float32)
+        if index is None or avoid.shape != (index.dim,):
+            return plan
+        threshold = APP_CONFIG.EXERCISE_SWAP_SIMILARITY
+
+        slots = [(d, e) for d, day in enumerate(plan) for e in range(len(day["exercises"]))]
+        vecs, found = index.planner_vectors([plan[d]["exercises"][e]["name"] for d, e in slots])
+        risky = found & (vecs @ avoid >= threshold)
+        if not risky.any():
+            return plan
+
+        equipment = [v for e in available_equipment or ["Bodyweight"] for v in EQUIPMENT_NAMES.get(e, [])]
+        safe = index.mask(PLANNER_LEVELS.get(fitness_level), equipment) & (index.embeddings @ avoid < threshold)
+
+        plan = [dict(day) for day in plan]
+        swapped = {}
+        for (d, e), vec in zip([s for s, r in zip(slots, risky) if r], vecs[risky]):
+            day = plan[d]
+            if d not in swapped:
+                day["exercises"], swapped[d] = list(day["exercises"]), []
+            old = day["exercises"][e]
+            parts = body_parts_of(old["muscle"])
+            keep = safe & index.mask(body_parts=parts) if parts else safe
+            taken = {ex["name"] for ex in day["exercises"]}
+            rows, _ = index.top_k(vec, len(taken) + 1, keep)
+            pick = next((r for r in rows.tolist() if index.titles[r] not in taken), None)
+            if pick is not None:
+                day["exercises"][e] = new = index.exercise(pick)
+                swapped[d].append(f"{old['name']} → {new['name']}")
+        for d, swaps in swapped.items():
+            day = plan[d]
+            day["duration_min"] = EXERCISE_CATALOG.estimate_session_minutes(day["exercises"])
+            if swaps:
+                day["notes"] = f"{day['notes']} Swapped for your notes: {'; '.join(swaps)}."
         return plan
 
+    @staticmethod
+    def weekly_training_load(plan: list[dict]) -> dict:
+        """Weekly volume (reps), time under tension and session minutes."""
+        load = EXERCISE_CATALOG.weekly_load(EXERCISE_CATALOG.plan_ids(plan))
+        return {k: round(float(v), 1) for k, v in load.items()}
+
     @staticmethod
     def estimate_weekly_calorie_burn(
-        fitness_level: str, fitness_goal: str, weight_kg: float
+        fitness_level: str, fitness_goal: str, weight_kg: float,
+        plan: list[dict] | None = None, available_equipment: list[str] | None = None,
     ) -> float:
-        """Rough weekly calorie burn from workouts."""
-        sessions = {"Beginner": 4, "Intermediate": 5, "Advanced": 6, "Elite": 6}.get(fitness_level, 5)
-        met      = {"Weight Loss": 7.0, "Muscle Gain": 5.5, "Endurance": 8.5,
-                    "General Fitness": 6.0, "Maintenance": 5.0}.get(fitness_goal, 6.0)
-        duration_h = 0.75
-        return round(met * weight_kg * duration_h * sessions, 0)
+        """Weekly workout burn from each exercise's MET and prescribed duration."""
+        if plan is None:
+            plan = WorkoutPlanner.generate(fitness_level, fitness_goal, available_equipment or [], [])
+        return round(BURN_ENGINE.plan_burn(plan, weight_kg), 0)
 
 
-def _rank_equipment(equipment: list[str]) -> list[str]:
-    """Prefer barbell > dumbbells > resistance bands > bodyweight."""
-    priority = ["Barbell", "Dumbbells", "Resistance Bands", "Bodyweight", "Machines"]
-    owned = set(equipment)
-    return [e for e in priority if e in owned] + [e for e in priority if e not in owned]
+def _stable_hash(text: str) -> int:
+    """Process-independent seed (``hash(str)`` is randomised per interpreter)."""
+    return zlib.crc32(text.encode())
 
 
 def _workout_note(focus: str, goal: str, nlp_notes: list[str]) -> str:
@@ -277,6 +355,50 @@ FOOD_DB = {
                 {"item": "Veggie stir-fry with tofu + brown rice", "protein": 24, "carbs": 62, "fat": 8, "cost": 1.80},
             ],
         },
+        "Middle Eastern": {
+            "breakfast": [
+                {"item": "Shakshuka (2 eggs) + pita", "protein": 21, "carbs": 49, "fat": 17, "cost": 1.40},
+                {"item": "Labneh + pita + cucumber + za'atar", "protein": 19, "carbs": 43, "fat": 6, "cost": 1.20},
+                {"item": "Ful medames + boiled egg + pita", "protein": 20, "carbs": 46, "fat": 11, "cost": 1.10},
+            ],
+            "lunch": [
+                {"item": "Falafel wrap + tahini + salad", "protein": 19, "carbs": 64, "fat": 22, "cost": 2.00},
+                {"item": "Mujaddara (lentils + bulgur) + yogurt", "protein": 24, "carbs": 75, "fat": 10, "cost": 1.10},
+                {"item": "Tabbouleh + chickpeas + feta", "protein": 17, "carbs": 56, "fat": 22, "cost": 1.90},
+            ],
+            "snack": [
+                {"item": "Hummus + pita", "protein": 7, "carbs": 24, "fat": 5, "cost": 0.70},
+                {"item": "Dates (3) + pistachios", "protein": 5, "carbs": 58, "fat": 7, "cost": 0.90},
+                {"item": "Labneh + cucumber sticks", "protein": 13, "carbs": 8, "fat": 5, "cost": 0.80},
+            ],
+            "dinner": [
+                {"item": "Stuffed peppers (bulgur + chickpeas) + yogurt", "protein": 19, "carbs": 71, "fat": 12, "cost": 2.20},
+                {"item": "Eggplant + chickpea stew + couscous", "protein": 20, "carbs": 84, "fat": 18, "cost": 1.80},
+                {"item": "Spinach & feta fatayer + lentil soup", "protein": 30, "carbs": 78, "fat": 13, "cost": 2.00},
+            ],
+        },
+        "East Asian": {
+            "breakfast": [
+                {"item": "Rice congee + soft egg + greens", "protein": 11, "carbs": 36, "fat": 6, "cost": 0.80},
+                {"item": "Tamagoyaki (3 eggs) + rice + miso soup", "protein": 33, "carbs": 41, "fat": 22, "cost": 1.20},
+                {"item": "Egg fried rice + edamame", "protein": 27, "carbs": 53, "fat": 20, "cost": 1.00},
+            ],
+            "lunch": [
+                {"item": "Soba noodles + egg + edamame + miso broth", "protein": 29, "carbs": 52, "fat": 11, "cost": 1.80},
+                {"item": "Vegetarian mapo tofu + rice", "protein": 33, "carbs": 61, "fat": 18, "cost": 1.40},
+                {"item": "Bibimbap (egg, spinach, carrot, sprouts)", "protein": 13, "carbs": 52, "fat": 11, "cost": 1.60},
+            ],
+            "snack": [
+                {"item": "Edamame + sea salt", "protein": 18, "carbs": 14, "fat": 8, "cost": 0.80},
+                {"item": "Tea eggs (2) + cucumber", "protein": 13, "carbs": 3, "fat": 11, "cost": 0.50},
+                {"item": "Silken tofu + soy sauce", "protein": 21, "carbs": 4, "fat": 10, "cost": 0.60},
+            ],
+            "dinner": [
+                {"item": "Kung pao tofu + broccoli + rice", "protein": 37, "carbs": 62, "fat": 23, "cost": 1.70},
+                {"item": "Yaki soba with egg + vegetables", "protein": 27, "carbs": 62, "fat": 15, "cost": 1.50},
+                {"item": "Kimchi fried rice + fried egg", "protein": 11, "carbs": 47, "fat": 11, "cost": 1.30},
+            ],
+        },
     },
     "Non-Vegetarian": {
         "South Asian": {
@@ -323,6 +445,50 @@ FOOD_DB = {
                 {"item": "Baked chicken thighs + roasted veg + couscous", "protein": 40, "carbs": 52, "fat": 10, "cost": 3.50},
             ],
         },
+        "Middle Eastern": {
+            "breakfast": [
+                {"item": "Shakshuka (3 eggs) + pita", "protein": 27, "carbs": 47, "fat": 22, "cost": 1.60},
+                {"item": "Eggs (2) + labneh + pita + cucumber", "protein": 32, "carbs": 43, "fat": 12, "cost": 1.50},
+                {"item": "Ful medames + eggs (2) + pita", "protein": 29, "carbs": 61, "fat": 17, "cost": 1.30},
+            ],
+            "lunch": [
+                {"item": "Chicken shawarma plate + rice + salad", "protein": 48, "carbs": 52, "fat": 26, "cost": 2.80},
+                {"item": "Lamb kofta + bulgur + yogurt sauce", "protein": 36, "carbs": 42, "fat": 25, "cost": 3.20},
+                {"item": "Chicken kebab + hummus + pita", "protein": 50, "carbs": 44, "fat": 10, "cost": 2.60},
+            ],
+            "snack": [
+                {"item": "Greek yogurt + dates + pistachios", "protein": 21, "carbs": 45, "fat": 4, "cost": 1.20},
+                {"item": "Boiled eggs (2) + za'atar + cucumber", "protein": 14, "carbs": 6, "fat": 15, "cost": 0.60},
+                {"item": "Tuna + hummus + pita", "protein": 24, "carbs": 22, "fat": 4, "cost": 1.20},
+            ],
+            "dinner": [
+                {"item": "Grilled fish + bulgur pilaf + tomato salad", "protein": 41, "carbs": 39, "fat": 18, "cost": 2.80},
+                {"item": "Chicken & vegetable tagine + couscous", "protein": 52, "carbs": 60, "fat": 22, "cost": 2.50},
+                {"item": "Lamb & eggplant stew + rice", "protein": 33, "carbs": 56, "fat": 26, "cost": 3.20},
+            ],
+        },
+        "East Asian": {
+            "breakfast": [
+                {"item": "Chicken congee + soft egg", "protein": 31, "carbs": 34, "fat": 8, "cost": 1.20},
+                {"item": "Japanese breakfast (salmon, rice, miso soup)", "protein": 34, "carbs": 39, "fat": 17, "cost": 2.60},
+                {"item": "Steamed egg custard (3 eggs) + rice + edamame", "protein": 31, "carbs": 42, "fat": 20, "cost": 1.00},
+            ],
+            "lunch": [
+                {"item": "Teriyaki chicken + rice + broccoli", "protein": 50, "carbs": 63, "fat": 18, "cost": 2.40},
+                {"item": "Salmon poke bowl + rice + edamame", "protein": 41, "carbs": 57, "fat": 24, "cost": 3.50},
+                {"item": "Beef bulgogi + rice + kimchi", "protein": 36, "carbs": 47, "fat": 14, "cost": 3.20},
+            ],
+            "snack": [
+                {"item": "Tea eggs (2) + edamame", "protein": 22, "carbs": 8, "fat": 15, "cost": 0.70},
+                {"item": "Chicken yakitori skewers (2)", "protein": 28, "carbs": 0, "fat": 11, "cost": 1.20},
+                {"item": "Tuna onigiri (2)", "protein": 17, "carbs": 45, "fat": 1, "cost": 1.10},
+            ],
+            "dinner": [
+                {"item": "Kung pao chicken + rice + bok choy", "protein": 50, "carbs": 50, "fat": 14, "cost": 2.40},
+                {"item": "Miso-glazed salmon + soba + bok choy", "protein": 45, "carbs": 32, "fat": 21, "cost": 3.80},
+                {"item": "Shrimp & vegetable stir-fry + rice noodles", "protein": 45, "carbs": 90, "fat": 6, "cost": 3.00},
+            ],
+        },
     },
     "Vegan": {
         "South Asian": {
@@ -369,105 +535,274 @@ FOOD_DB = {
                 {"item": "Red lentil soup + crusty sourdough + side salad", "protein": 18, "carbs": 65, "fat": 5, "cost": 2.00},
             ],
         },
+        "Middle Eastern": {
+            "breakfast": [
+                {"item": "Ful medames + pita + tomato", "protein": 20, "carbs": 73, "fat": 16, "cost": 1.00},
+                {"item": "Tahini date oatmeal", "protein": 10, "carbs": 67, "fat": 13, "cost": 1.00},
+                {"item": "Hummus toast + tomato + cucumber", "protein": 12, "carbs": 38, "fat": 7, "cost": 1.10},
+            ],
+            "lunch": [
+                {"item": "Falafel bowl + tabbouleh + tahini", "protein": 19, "carbs": 60, "fat": 24, "cost": 2.20},
+                {"item": "Lentil kofta + pita + salad", "protein": 23, "carbs": 84, "fat": 7, "cost": 1.50},
+                {"item": "Chickpea shawarma wrap + tahini", "protein": 24, "carbs": 87, "fat": 18, "cost": 1.60},
+            ],
+            "snack": [
+                {"item": "Roasted chana + dates", "protein": 8, "carbs": 53, "fat": 2, "cost": 0.70},
+                {"item": "Baba ganoush + carrot sticks", "protein": 4, "carbs": 14, "fat": 13, "cost": 0.90},
+                {"item": "Pistachios + apple", "protein": 4, "carbs": 30, "fat": 8, "cost": 1.00},
+            ],
+            "dinner": [
+                {"item": "Mujaddara (lentils + rice) + cucumber salad", "protein": 22, "carbs": 82, "fat": 15, "cost": 1.20},
+                {"item": "Chickpea tagine + sweet potato + couscous", "protein": 23, "carbs": 100, "fat": 10, "cost": 1.70},
+                {"item": "Stuffed eggplant with lentils + bulgur", "protein": 21, "carbs": 66, "fat": 9, "cost": 1.90},
+            ],
+        },
+        "East Asian": {
+            "breakfast": [
+                {"item": "Tofu scramble + rice + bok choy", "protein": 32, "carbs": 41, "fat": 18, "cost": 1.10},
+                {"item": "Rice congee + edamame + peanuts", "protein": 15, "carbs": 43, "fat": 9, "cost": 0.80},
+                {"item": "Soy milk + steamed sweet potato + peanuts", "protein": 12, "carbs": 41, "fat": 10, "cost": 0.90},
+            ],
+            "lunch": [
+                {"item": "Cold soba + tofu + edamame + sesame dressing", "protein": 38, "carbs": 50, "fat": 21, "cost": 1.80},
+                {"item": "Vegetable pho with tofu", "protein": 26, "carbs": 75, "fat": 10, "cost": 1.60},
+                {"item": "Tempeh teriyaki + brown rice + broccoli", "protein": 28, "carbs": 70, "fat": 11, "cost": 2.40},
+            ],
+            "snack": [
+                {"item": "Edamame + apple", "protein": 14, "carbs": 35, "fat": 6, "cost": 0.90},
+                {"item": "Miso soup + tofu cubes", "protein": 19, "carbs": 7, "fat": 10, "cost": 0.60},
+                {"item": "Soy milk + roasted peanuts", "protein": 12, "carbs": 19, "fat": 14, "cost": 0.60},
+            ],
+            "dinner": [
+                {"item": "Vegan mapo tofu + brown rice", "protein": 34, "carbs": 61, "fat": 19, "cost": 1.50},
+                {"item": "Sesame tofu noodles + bok choy", "protein": 31, "carbs": 76, "fat": 19, "cost": 1.70},
+                {"item": "Japchae with tofu + vegetables", "protein": 29, "carbs": 94, "fat": 14, "cost": 1.60},
+            ],
+        },
     },
 }
 
 MEAL_NAMES = ["Breakfast", "Morning Snack", "Lunch", "Afternoon Snack", "Dinner"]
 MEAL_CALORIE_SPLITS = [0.25, 0.10, 0.30, 0.10, 0.25]
+MEAL_COURSES = ["breakfast", "snack", "lunch", "snack", "dinner"]
+
+# Diet → FOOD_DB bank it draws from; the diet's attribute mask then filters it
+DIET_BANKS = {
+    "Vegetarian":     "Vegetarian",
+    "Vegan":          "Vegan",
+    "Non-Vegetarian": "Non-Vegetarian",
+    "Pescatarian":    "Non-Vegetarian",
+    "Keto":           "Non-Vegetarian",
+    "Paleo":          "Non-Vegetarian",
+}
+
+# Attribute bitmask per FOOD_DB entry, same row order as FOOD_DB
+FOOD_INDEX = FoodIndex(FOOD_DB)
+
+FALLBACK_MEAL = {"item": "Mixed salad", "protein": 10, "carbs": 20, "fat": 5, "cost": 1.00}
+
+# Ingredient grams, nutrients and kcal per serving; meal id = FOOD_INDEX row, FALLBACK_MEAL last
+RECIPE_BOOK = RecipeBook([r["item"] for r in FOOD_INDEX.records[:FOOD_INDEX.n_planner]]
+                         + [FALLBACK_MEAL["item"]], get_store())
+FALLBACK_ROW = FOOD_INDEX.n_planner
+# Protein / carbs / fat grams per serving, from the same recipe grams as the energy
+_MEAL_MACROS = RECIPE_BOOK.meal_nutrients[:, [NUTRIENTS.index(m) for m in MACROS]]
+# USD per serving per RECIPE_BOOK row: ingredient grams at FDC prices, FOOD_DB constant for the rest
+MEAL_COST = RECIPE_BOOK.meal_costs(np.append(FOOD_INDEX.cost[:FALLBACK_ROW], FALLBACK_MEAL["cost"]))
+
+# A day's servings are scaled toward its calorie target, in steps of SERVING_STEP
+SERVING_STEP, MIN_SERVINGS, MAX_SERVINGS = 0.25, 0.5, 3.0
+
+
+def _servings(day_kcal, target_kcal: float):
+    """Servings factor (per day, broadcast) bringing ``day_kcal`` nearest ``target_kcal``; 1 without a target."""
+    day_kcal = np.asarray(day_kcal, dtype=np.float64)
+    if not target_kcal or target_kcal <= 0:
+        return np.ones(day_kcal.shape)
+    steps = np.round(target_kcal / np.maximum(day_kcal, 1.0) / SERVING_STEP) * SERVING_STEP
+    return np.clip(steps, MIN_SERVINGS, MAX_SERVINGS)
+
+
+def _food(row: int, servings: float = 1.0) -> Food:
+    return Food.of(RECIPE_BOOK.meals[row], round(float(RECIPE_BOOK.meal_energy[row]) * servings),
+                   *(round(float(g) * servings) for g in _MEAL_MACROS[row]),
+                   round(float(MEAL_COST[row]) * servings, 2), servings)
+
+
+# Interned one-serving plan record per RECIPE_BOOK row
+_FOOD_RECORDS = [_food(row) for row in range(len(RECIPE_BOOK.meals))]
+
+
+def _serve(rows: list[int], target_kcal: float) -> tuple[Food, ...]:
+    """One day's (or the template's) meals, servings scaled together toward ``target_kcal``."""
+    servings = float(_servings(RECIPE_BOOK.meal_energy[rows].sum(), target_kcal))
+    if servings == 1.0:
+        return tuple(_FOOD_RECORDS[r] for r in rows)
+    return tuple(_food(r, servings) for r in rows)
+
+
+_MEAL_NAMES = tuple(MEAL_NAMES)
+
+# Per course, the cheapest alternatives considered when a day is over budget
+MAX_BUDGET_ALTERNATIVES = 8
+
+# Courses a catalogue dish idea is drawn for (see ``meal_bank``), one each
+IDEA_COURSES = ["breakfast", "lunch", "dinner", "snack", "dessert"]
 
 
 class DietPlanner:
     @staticmethod
-    def generate(
+    def plan(
         daily_calories: float,
         macros: dict,
         dietary_preference: str,
         cultural_food_habits: str,
         budget_usd: float,
         notes: list[str],
-    ) -> dict:
-        """Return a structured 7-day diet plan."""
+        exclusions: list[str] | None = None,
+    ) -> DietPlan:
+        """The 7-day diet plan as an immutable record (``generate`` for dicts).
+
+        ``exclusions`` are ``food_index.ATTRIBUTES`` names (e.g. from
+        ``food_index.parse_exclusions``) removed on top of the diet's own.
+        A positive ``budget_usd`` caps each day's meal cost (see ``_fit_budget``).
+        Meal ``calories`` are the item's energy from ``RECIPE_BOOK`` (Atwater
+        factors over its ingredients) times the day's ``servings``, which
+        scale every meal of the day toward ``daily_calories`` in quarter
+        steps (see ``_servings``); ``target_calories`` is its share of
+        ``daily_calories``.  ``dish_ideas`` are catalogue dishes of the same
+        cuisine and diet from ``meal_bank`` (empty when no source is available).
+        """
         # Resolve DB keys
         diet_key    = _resolve_diet_key(dietary_preference)
         culture_key = _resolve_culture_key(cultural_food_habits)
-        meal_db     = FOOD_DB.get(diet_key, FOOD_DB["Non-Vegetarian"])
-        culture_db  = meal_db.get(culture_key, next(iter(meal_db.values())))
+        exclusions  = sorted(set(exclusions or ()))
+        forbidden   = diet_mask(diet_key) | mask_of(exclusions)
+        pools       = _meal_pools(diet_key, culture_key, forbidden)
 
-        # Build a daily template
-        daily_template = _build_daily_meals(
-            culture_db, daily_calories, MEAL_CALORIE_SPLITS, budget_usd
-        )
+        # Daily template: each course's first choice
+        template = _serve([_row(pools, cat, 0 if len(pools[cat]) else -1) for cat in MEAL_COURSES],
+                          daily_calories)
 
-        # 7-day plan with slight variation
-        weekly_plan = []
+        # 7-day plan with slight variation, each day held to the budget
+        weekly, within_budget = [], True
         for day in DAYS:
-            rng = random.Random(hash(day))
-            day_meals = []
-            for i, (meal_name, split, budget_split) in enumerate(
-                zip(MEAL_NAMES, MEAL_CALORIE_SPLITS, [0.15, 0.05, 0.40, 0.05, 0.35])
-            ):
-                cat_map = {
-                    0: "breakfast", 1: "snack", 2: "lunch", 3: "snack", 4: "dinner"
-                }
-                cat   = cat_map[i]
-                items = culture_db.get(cat, [])
-                item  = rng.choice(items) if items else {"item": "Mixed salad", "protein": 10, "carbs": 20, "fat": 5, "cost": 1.00}
-                target_cal = daily_calories * split
-                day_meals.append({
-                    "name":     meal_name,
-                    "item":     item["item"],
-                    "calories": round(target_cal),
-                    "protein":  item["protein"],
-                    "carbs":    item["carbs"],
-                    "fat":      item["fat"],
-                    "cost":     round(item["cost"], 2),
-                })
-            weekly_plan.append({"day": day, "meals": day_meals})
-
-        nlp_adjustment = notes[1] if len(notes) > 1 else None
-
-        return {
-            "weekly_plan":       weekly_plan,
-            "daily_template":    daily_template,
-            "total_daily_cal":   daily_calories,
-            "macros":            macros,
-            "budget_usd":        budget_usd,
-            "dietary_preference":dietary_preference,
-            "cultural_food_habits": cultural_food_habits,
-            "nlp_adjustment":    nlp_adjustment,
-        }
-
-
-def _build_daily_meals(culture_db, total_cal, splits, budget):
-    meals = []
-    cats  = ["breakfast", "snack", "lunch", "snack", "dinner"]
-    for name, split, cat in zip(MEAL_NAMES, splits, cats):
-        items  = culture_db.get(cat, [])
-        item   = items[0] if items else {"item": "Mixed salad", "protein": 10, "carbs": 20, "fat": 5, "cost": 1.00}
-        meals.append({
-            "name":     name,
-            "item":     item["item"],
-            "calories": round(total_cal * split),
-            "protein":  item["protein"],
-            "carbs":    item["carbs"],
-            "fat":      item["fat"],
-        })
-    return meals
+            rng = random.Random(_stable_hash(day))
+            picks = [rng.randrange(len(pools[cat])) if len(pools[cat]) else -1 for cat in MEAL_COURSES]
+            if budget_usd and budget_usd > 0:
+                picks, fits = _fit_budget(pools, picks, budget_usd, daily_calories)
+                within_budget = within_budget and fits
+            weekly.append(_serve([_row(pools, cat, pick) for cat, pick in zip(MEAL_COURSES, picks)],
+                                 daily_calories))
+
+        return DietPlan(
+            days=_DAYS,
+            meal_names=_MEAL_NAMES,
+            target_calories=tuple(round(daily_calories * split) for split in MEAL_CALORIE_SPLITS),
+            weekly=tuple(weekly),
+            template=template,
+            total_daily_cal=daily_calories,
+            macros=tuple(macros.items()),
+            budget_usd=budget_usd,
+            within_budget=within_budget,
+            dietary_preference=dietary_preference,
+            cultural_food_habits=cultural_food_habits,
+            exclusions=tuple(exclusions),
+            nlp_adjustment=notes[1] if len(notes) > 1 else None,
+            dish_ideas=tuple(DishIdea(**idea) for idea in _dish_ideas(diet_key, culture_key, forbidden)),
+        )
+
+    @staticmethod
+    def generate(
+        daily_calories: float,
+        macros: dict,
+        dietary_preference: str,
+        cultural_food_habits: str,
+        budget_usd: float,
+        notes: list[str],
+        exclusions: list[str] | None = None,
+    ) -> dict:
+        """Return a structured 7-day diet plan (see ``plan`` for the arguments)."""
+        return DietPlanner.plan(daily_calories, macros, dietary_preference, cultural_food_habits,
+                                budget_usd, notes, exclusions).to_dict()
+
+
+def _meal_pools(diet_key: str, culture_key: str, forbidden: int) -> dict[str, np.ndarray]:
+    """Course → FOOD_INDEX rows allowed; one bitwise AND over the whole bank."""
+    allowed = FOOD_INDEX.allowed(forbidden)
+    bank = DIET_BANKS[diet_key]
+    return {course: FOOD_INDEX.choices(allowed, bank, culture_key, course)
+            for course in dict.fromkeys(MEAL_COURSES)}
+
+
+def _row(pools: dict[str, np.ndarray], cat: str, pick: int) -> int:
+    """FOOD_INDEX / RECIPE_BOOK row of a course pick; ``FALLBACK_ROW`` for an empty course."""
+    return int(pools[cat][pick]) if pick >= 0 else FALLBACK_ROW
+
+
+def _fit_budget(pools: dict[str, np.ndarray], picks: list[int], budget: float,
+                target_kcal: float = 0.0) -> tuple[list[int], bool]:
+    """
+    Keep the day's picks if they fit ``budget`` once served toward
+    ``target_kcal`` (see ``_servings``).  Otherwise price (and total the
+    energy of) every combination of each course's cheapest alternatives in
+    one broadcast sum, scaled by that combination's servings, and take the
+    affordable one that keeps the most picks, then lands closest to
+    ``target_kcal`` (when positive), then the cheapest; if none is
+    affordable, the cheapest overall (second value ``False``).
+    """
+    rows = [_row(pools, cat, pick) for cat, pick in zip(MEAL_COURSES, picks)]
+    servings = _servings(RECIPE_BOOK.meal_energy[rows].sum(), target_kcal)
+    if MEAL_COST[rows].sum() * servings <= budget + 1e-9:
+        return picks, True
+
+    options, costs, kcals = [], [], []
+    for cat, pick in zip(MEAL_COURSES, picks):
+        if pick < 0:
+            opts, cat_costs = np.array([-1]), MEAL_COST[[FALLBACK_ROW]]
+            cat_kcals = RECIPE_BOOK.meal_energy[[FALLBACK_ROW]]
+        else:
+            cheapest = np.argsort(MEAL_COST[pools[cat]], kind="stable")[:MAX_BUDGET_ALTERNATIVES]
+            opts = np.union1d(cheapest, [pick])
+            cat_costs, cat_kcals = MEAL_COST[pools[cat][opts]], RECIPE_BOOK.meal_energy[pools[cat][opts]]
+        options.append(opts)
+        costs.append(cat_costs)
+        kcals.append(cat_kcals)
+
+    energy = sum(np.ix_(*kcals))
+    servings = _servings(energy, target_kcal)
+    total = sum(np.ix_(*costs)) * servings
+    kept = sum(np.ix_(*[(opts == pick).astype(np.int8) for opts, pick in zip(options, picks)]))
+    gap = np.abs(energy * servings - target_kcal) if target_kcal > 0 else np.zeros(total.shape)
+    fits = total <= budget + 1e-9
+    if fits.any():
+        # lexsort: last key is primary
+        best = np.lexsort((total.ravel(), gap.ravel(), -kept.ravel(), ~fits.ravel()))[0]
+    else:
+        best = np.argmin(total)
+    idx = np.unravel_index(best, total.shape)
+    return [int(opts[i]) for opts, i in zip(options, idx)], bool(fits.any())
 
 
 def _resolve_diet_key(pref: str) -> str:
-    mapping = {
-        "Vegetarian": "Vegetarian",
-        "Vegan":      "Vegan",
-        "Pescatarian":"Non-Vegetarian",
-        "Non-Vegetarian": "Non-Vegetarian",
-        "Keto":       "Non-Vegetarian",
-        "Paleo":      "Non-Vegetarian",
-    }
-    return mapping.get(pref, "Non-Vegetarian")
+    return pref if pref in DIET_BANKS else "Non-Vegetarian"
 
 
 def _resolve_culture_key(culture: str) -> str:
-    if any(k in culture for k in ["Indian", "South Asian", "Middle Eastern", "Southeast Asian"]):
-        return "South Asian"
-    return "Western"
+    return resolve_cuisine(culture)
+
+
+def _dish_ideas(diet_key: str, culture_key: str, forbidden: int) -> list[dict]:
+    """One catalogue dish per ``IDEA_COURSES`` entry, fixed per (diet, culture, forbidden)."""
+    bank = get_meal_bank()
+    rng = random.Random(_stable_hash(f"{diet_key}|{culture_key}|{forbidden}"))
+    ideas, seen = [], set()
+    for course in IDEA_COURSES:
+        dish = bank.draw(culture_key, DIET_BANKS[diet_key], course, rng, forbidden)
+        if dish is None or dish["item"] in seen:
+            continue
+        seen.add(dish["item"])
+        minutes = dish["minutes"]
+        ideas.append({"item": dish["item"], "course": course, "region": dish["region"],
+                      "minutes": None if np.isnan(minutes) else int(minutes)})
+    return ideas
@@ -0,0 +1,112 @@
+"""portions.py — (fdc_id, unit) → grams, compiled from FoodData Central portions.
+
+``food_portion.csv`` lists household measures per food ("1 cup, chopped" =
+128 g) against ``measure_unit.csv``; SR Legacy rows use the placeholder unit
+9999 and carry the unit in ``modifier`` instead.  ``compile_portions`` turns
+them into one sorted ``int64`` key per (fdc_id, unit) with the median grams
+per single unit, so converting any number of amounts is a ``searchsorted``
+and a gather.  Mass units (and volume, at the density of water) need no table.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import numpy as np
+
+from fdc_data import FDC_DIR, read_table
+
+
+logger = logging.getLogger(__name__)
+
+UNDETERMINED_UNIT_ID = 9999
+UNIT_STRIDE = 1 << 10            # key = fdc_id * UNIT_STRIDE + unit code
+
+# Units that convert without a food-specific portion (volume at water density)
+FIXED_GRAMS = {"g": 1.0, "kg": 1000.0, "oz": 28.3495, "lb": 453.592,
+               "ml": 1.0, "l": 1000.0, "fl oz": 29.5735}
+
+UNIT_ALIASES = {
+    "gram": "g", "grams": "g", "gm": "g", "kilogram": "kg",
+    "ounce": "oz", "ounces": "oz", "pound": "lb", "pounds": "lb", "lbs": "lb",
+    "milliliter": "ml", "millilitre": "ml", "liter": "l", "litre": "l", "fl": "fl oz",
+    "cups": "cup", "tablespoon": "tbsp", "tablespoons": "tbsp", "tbs": "tbsp",
+    "teaspoon": "tsp", "teaspoons": "tsp", "slices": "slice", "pieces": "piece",
+    "each": "piece", "whole": "piece", "item": "piece", "large": "piece", "medium": "piece",
+    "small": "piece", "serving": "serving", "servings": "serving", "scoop": "scoop",
+    "bowl": "bowl", "stalk": "piece", "fruit": "piece",
+}
+_WORD_RE = re.compile(r"[a-z]+(?: oz)?")
+
+
+def normalise_unit(name) -> str:
+    """``"Tablespoons"`` → ``"tbsp"``; first word of longer measure text."""
+    text = str(name).strip().casefold()
+    if text in FIXED_GRAMS or text in UNIT_ALIASES.values():
+        return text
+    m = _WORD_RE.search(text)
+    word = m.group(0) if m else text
+    return UNIT_ALIASES.get(word, word)
+
+
+# ─── Compile ──────────────────────────────────────────────────────────────────
+def compile_portions(fdc_dir: str = FDC_DIR) -> dict | None:
+    """``{"keys", "grams", "units"}`` arrays for ``PortionTable``; None when the CSVs are missing."""
+    portions = read_table("food_portion", ["fdc_id", "amount", "measure_unit_id", "modifier",
+                                           "gram_weight"], fdc_dir, dtype={"modifier": "string"})
+    units = read_table("measure_unit", ["id", "name"], fdc_dir)
+    if portions is None or units is None:
+        return None
+
+    names = dict(zip(units["id"], units["name"].astype(str)))
+    undetermined = portions["measure_unit_id"] == UNDETERMINED_UNIT_ID
+    raw = portions["measure_unit_id"].map(names).where(~undetermined, portions["modifier"])
+    unit = raw.fillna("").map(normalise_unit).rename("unit")
+    amount = portions["amount"].where(portions["amount"] > 0).fillna(1.0)
+    per_unit = portions["gram_weight"] / amount
+    ok = (unit != "") & ~unit.isin(list(FIXED_GRAMS)) & np.isfinite(per_unit) & (per_unit > 0)
+
+    table = (per_unit[ok].groupby([portions["fdc_id"][ok], unit[ok]]).median()
+             .rename("grams").reset_index())
+    unit_names = sorted(table["unit"].unique())[:UNIT_STRIDE]
+    codes = table["unit"].map({u: i for i, u in enumerate(unit_names)})
+    table, codes = table[codes.notna()], codes.dropna()
+    keys = table["fdc_id"].to_numpy(np.int64) * UNIT_STRIDE + codes.to_numpy(np.int64)
+    order = np.argsort(keys)
+    logger.info(f"✅ Portions: {len(keys):,} (food, unit) pairs over {len(unit_names)} units")
+    return {"keys": keys[order], "grams": table["grams"].to_numpy(np.float32)[order],
+            "units": unit_names}
+
+
+# ─── Lookup ───────────────────────────────────────────────────────────────────
+class PortionTable:
+    def __init__(self, keys: np.ndarray, grams: np.ndarray, units: list[str]):
+        self.keys, self.grams_per_unit = keys, grams
+        self.units = list(units)
+        self._code = {u: i for i, u in enumerate(self.units)}
+
+    @classmethod
+    def empty(cls) -> "PortionTable":
+        return cls(np.empty(0, np.int64), np.empty(0, np.float32), [])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def unit_grams(self, fdc_ids, units) -> np.ndarray:
+        """Grams in one ``units`` of each food (broadcast); NaN where unknown."""
+        ids, names = np.broadcast_arrays(np.asarray(fdc_ids, dtype=np.int64), np.asarray(units, dtype=str))
+        uniq, inverse = np.unique(names, return_inverse=True)
+        norm = [normalise_unit(u) for u in uniq]
+        fixed = np.array([FIXED_GRAMS.get(u, np.nan) for u in norm])[inverse].reshape(ids.shape)
+        codes = np.array([self._code.get(u, -1) for u in norm], dtype=np.int64)[inverse].reshape(ids.shape)
+
+        out = fixed
+        if len(self):
+            keys = ids * UNIT_STRIDE + codes
+            pos = np.searchsorted(self.keys, keys).clip(0, len(self) - 1)
+            hit = (codes >= 0) & (ids >= 0) & (self.keys[pos] == keys)
+            out = np.where(np.isnan(fixed) & hit, np.asarray(self.grams_per_unit)[pos], fixed)
+        return out
+
+    def to_grams(self, fdc_ids, amounts, units) -> np.ndarray:
+        return np.asarray(amounts, dtype=np.float64) * self.unit_grams(fdc_ids, units)
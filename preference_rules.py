@@ -0,0 +1,164 @@
+"""preference_rules.py — Keyword fast path for ``ModelLoader.match_preferences``.
+
+Most free-text preferences are short stock phrases ("knee pain", "vegan",
+"home workouts", "no gluten").  Every synonym of every candidate-bank entry
+is compiled once into an Aho-Corasick automaton over normalised text, so a
+single pass finds all phrase hits in microseconds.  A match is trusted only
+when the phrases cover most of the meaningful words and nothing that flips
+meaning (an uncovered negation) is left over; anything else is ambiguous and
+goes to the sentence encoder.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+
+
+# Candidate-bank entry → trigger phrases (matched on whole words, lower case)
+PREFERENCE_SYNONYMS = {
+    "Avoid high-impact exercises due to knee pain; substitute with low-impact alternatives.":
+        ["knee pain", "bad knee", "bad knees", "knee injury", "sore knees", "knees hurt",
+         "low impact", "no jumping", "acl", "meniscus"],
+    "Incorporate swimming or cycling for cardiovascular training.":
+        ["swimming", "swim", "cycling", "bike", "biking", "cycle", "spin class"],
+    "Focus on upper-body exercises only to protect lower back injury.":
+        ["lower back", "back pain", "back injury", "bad back", "herniated disc", "sciatica"],
+    "Add yoga and mobility work for flexibility improvement.":
+        ["yoga", "mobility", "flexibility", "flexible", "pilates"],
+    "Include daily stretching routine for injury prevention.":
+        ["stretching", "stretch", "injury prevention", "tight hamstrings", "stiff"],
+    "Prefer plant-based protein sources like lentils, tofu, and tempeh.":
+        ["vegan", "vegetarian", "plant based", "plant protein", "no meat", "tofu", "lentils"],
+    "Avoid gluten-containing foods; use rice and quinoa as carb bases.":
+        ["gluten", "gluten free", "no gluten", "celiac", "coeliac", "no wheat", "wheat allergy"],
+    "Incorporate high-fibre vegetables for digestive health.":
+        ["fiber", "fibre", "digestion", "digestive", "constipation", "gut health", "bloating"],
+    "Reduce sodium intake; focus on whole, unprocessed foods.":
+        ["sodium", "low salt", "less salt", "no salt", "blood pressure", "hypertension",
+         "processed food", "whole foods"],
+    "Include omega-3 rich foods like flaxseed and walnuts.":
+        ["omega 3", "omega3", "flaxseed", "walnuts", "fish oil", "heart health"],
+    "Prefer spicy cuisine; incorporate jalapeños and hot sauce.":
+        ["spicy", "spice", "hot sauce", "chili", "chilli", "jalapeno", "jalapeños"],
+    "Focus on quick-prep meals under 20 minutes.":
+        ["quick meals", "quick prep", "no time to cook", "busy", "easy meals", "fast meals",
+         "quick recipes", "short on time"],
+    "Batch-cook on Sundays for the week ahead.":
+        ["meal prep", "batch cook", "batch cooking", "cook once", "prep on sunday"],
+    "Include intermittent fasting window (16:8).":
+        ["intermittent fasting", "fasting", "16 8", "16:8", "omad", "skip breakfast"],
+    "Focus on progressive overload with barbell compound movements.":
+        ["barbell", "progressive overload", "compound lifts", "powerlifting", "heavy lifting",
+         "strength training", "get stronger"],
+    "Use resistance bands as primary equipment for home workouts.":
+        ["resistance bands", "bands", "home workouts", "home workout", "at home", "no gym",
+         "no equipment", "minimal equipment"],
+    "Incorporate HIIT sessions three times per week.":
+        ["hiit", "interval training", "intervals", "tabata", "fat burning", "conditioning"],
+    "Prioritise recovery; include active rest days with walking.":
+        ["recovery", "rest days", "active recovery", "walking", "overtraining", "burnout",
+         "fatigue", "tired"],
+}
+
+# Words that carry no preference on their own
+STOPWORDS = frozenset("""
+    a an and the i im i'm my me want would like to prefer please some more less with of for
+    on in at do does have has be is am are it its also really very just but or so can could
+    should will get getting been being this that these those any all diet food foods meals
+    meal plan workout workouts exercise exercises training need needs
+""".split())
+
+# Uncovered words that make a keyword match unreliable ("not vegan anymore")
+NEGATIONS = frozenset("not never dont don't no without except hate dislike avoid stop".split())
+
+MIN_COVERAGE = 0.6
+
+
+def normalise(text: str) -> str:
+    """Lower-case, keep letters / digits / apostrophes, single-space padded."""
+    words = re.findall(r"[0-9a-zà-ÿ']+", text.casefold().replace(":", " "))
+    return " " + " ".join(words) + " "
+
+
+class PhraseAutomaton:
+    """Aho-Corasick over characters; patterns are space-padded (see ``normalise``) for whole-word hits."""
+
+    def __init__(self, patterns: dict[str, int]):
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[tuple[int, int]]] = [[]]   # (value, pattern length)
+
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append((value, len(pattern)))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0) if node else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text: str) -> list[tuple[int, int, int]]:
+        """(value, start, end) for every pattern occurrence."""
+        hits, node = [], 0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for value, length in self.out[node]:
+                hits.append((value, i + 1 - length, i + 1))
+        return hits
+
+
+class PreferenceRules:
+    """Compiled once per candidate bank; ``match`` returns candidates or ``None`` (ambiguous)."""
+
+    def __init__(self, candidates: list[str], synonyms: dict[str, list[str]] = PREFERENCE_SYNONYMS):
+        self.candidates = list(candidates)
+        patterns = {}
+        for idx, cand in enumerate(self.candidates):
+            for phrase in synonyms.get(cand, []):
+                key = normalise(phrase)
+                if key.strip():
+                    patterns.setdefault(key, idx)
+        self._automaton = PhraseAutomaton(patterns)
+
+    def match(self, text: str, top_k: int = 3) -> list[str] | None:
+        norm = normalise(text)
+        content = [w for w in norm.split() if w not in STOPWORDS]
+        if not content:
+            return []
+
+        hits = self._automaton.find(norm)
+        if not hits:
+            return None
+
+        covered = set()
+        first_hit: dict[int, int] = {}
+        for value, start, end in hits:
+            covered.update(norm[start:end].split())
+            first_hit[value] = min(first_hit.get(value, start), start)
+
+        leftover = [w for w in content if w not in covered]
+        if any(w in NEGATIONS for w in leftover):
+            return None
+        if 1 - len(leftover) / len(content) < MIN_COVERAGE:
+            return None
+
+        ranked = sorted(first_hit, key=first_hit.get)[:top_k]
+        return [self.candidates[i] for i in ranked]
@@ -0,0 +1,639 @@
+"""recipes.py — Meals as ingredient quantities, compiled to matrices.
+
+FOOD_DB meals are display strings ("Roti (3) + Paneer curry + Salad") whose
+portions exist only as text.  ``MEAL_RECIPES`` spells each one out as
+(ingredient, amount, unit) lines, and ``RecipeBook`` compiles them once into
+
+    grams            (n_meals, n_ingredients)   grams of each ingredient per serving
+    per_gram         (n_ingredients, n_nutrients)
+    meal_nutrients   (n_meals, n_nutrients)     = grams @ per_gram
+    meal_energy      (n_meals,)                 kcal per serving
+    price_per_gram   (n_ingredients,)           USD, NaN where unpriced
+
+so any batch of plans, as a (n_plans, n_meals) count matrix, is scaled to
+nutrients (or ingredient grams) with a single matrix multiply, and to
+calories with a single dot product.  Energy is each ingredient's macros
+times its Atwater factors (the general 4/4/9 unless linked to an FDC food
+with its own).
+
+Household units convert through the ingredient's built-in weights below;
+with a built ``food_store`` each ingredient is linked to a FoodData Central
+food by description, and that food's ``food_portion`` weights,
+per-100 g nutrients and observed price take precedence.
+"""
+
+from __future__ import annotations
+
+import logging
+import numpy as np
+
+from food_store import ATWATER_GENERAL
+from portions import FIXED_GRAMS, normalise_unit
+
+
+logger = logging.getLogger(__name__)
+
+MACROS = ["protein", "carbs", "fat"]
+NUTRIENTS = MACROS + ["energy"]
+
+# Ingredient → (FDC description prefix, protein, carbs, fat per 100 g as eaten, {unit: grams})
+INGREDIENTS = {
+    "oats":              ("cereals, oats, regular and quick, not fortified, dry", 13.2, 67.7, 6.5, {"cup": 81}),
+    "milk":              ("milk, whole, 3.25% milkfat",                 3.3,  4.8,  3.3, {"cup": 244}),
+    "almond_milk":       ("beverages, almond milk, unsweetened",        0.6,  0.3,  1.0, {"cup": 240}),
+    "oat_milk":          ("beverages, oat milk",                        1.0,  6.7,  1.5, {"cup": 240}),
+    "coconut_milk":      ("beverages, coconut milk, sweetened",         0.2,  2.9,  2.1, {"cup": 240}),
+    "yogurt":            ("yogurt, plain, whole milk",                  3.5,  4.7,  3.3, {"cup": 245, "tbsp": 15}),
+    "greek_yogurt":      ("yogurt, greek, plain, nonfat",              10.2,  3.6,  0.4, {"cup": 245}),
+    "coconut_yogurt":    ("yogurt, coconut",                            1.0, 11.0,  4.0, {"cup": 245}),
+    "paneer":            ("cheese, paneer",                            18.3,  3.6, 20.8, {"cup": 200}),
+    "cottage_cheese":    ("cheese, cottage, lowfat, 1% milkfat",       11.1,  3.4,  4.3, {"cup": 226}),
+    "feta":              ("cheese, feta",                              14.2,  4.1, 21.3, {"cup": 150}),
+    "cheese":            ("cheese, cheddar",                           24.9,  1.3, 33.1, {"slice": 28, "cup": 113}),
+    "parmesan":          ("cheese, parmesan, grated",                  35.8,  3.2, 25.8, {"tbsp": 5}),
+    "ghee":              ("butter oil, anhydrous",                      0.3,  0.0, 99.5, {"tbsp": 13, "tsp": 4.3}),
+    "egg":               ("egg, whole, cooked, hard-boiled",           12.6,  1.1, 10.6, {"piece": 50}),
+    "protein_powder":    ("beverages, protein powder whey based",      78.1,  6.3,  5.0, {"scoop": 30}),
+
+    "rice":              ("rice, white, long-grain, regular, enriched, cooked", 2.7, 28.2, 0.3, {"cup": 158}),
+    "brown_rice":        ("rice, brown, long-grain, cooked",            2.6, 23.0,  0.9, {"cup": 195}),
+    "quinoa":            ("quinoa, cooked",                             4.4, 21.3,  1.9, {"cup": 185}),
+    "couscous":          ("couscous, cooked",                           3.8, 23.2,  0.2, {"cup": 157}),
+    "poha":              ("rice, flattened",                            6.6, 77.0,  1.2, {"cup": 60}),
+    "pasta":             ("pasta, cooked, enriched, without added salt", 5.8, 30.9, 0.9, {"cup": 140}),
+    "chickpea_pasta":    ("pasta, chickpea, cooked",                   11.5, 33.0,  3.0, {"cup": 140}),
+    "roti":              ("bread, chapati or roti, whole wheat",        9.8, 46.4,  7.5, {"piece": 40}),
+    "millet_roti":       ("millet, cooked",                             3.5, 23.7,  1.0, {"piece": 45}),
+    "idli":              ("idli",                                       3.9, 24.0,  0.4, {"piece": 40}),
+    "whole_grain_bread": ("bread, whole-wheat, commercially prepared", 12.5, 42.7,  3.5, {"slice": 32}),
+    "whole_grain_roll":  ("rolls, dinner, whole-wheat",                 8.7, 51.1,  4.7, {"piece": 43}),
+    "sourdough":         ("bread, french or vienna (includes sourdough)", 11.8, 51.9, 2.4, {"slice": 45}),
+    "tortilla":          ("tortillas, ready-to-bake or -fry, flour",    8.6, 49.6,  7.5, {"piece": 50}),
+    "corn_tortilla":     ("tortillas, ready-to-bake or -fry, corn",     5.7, 44.6,  2.9, {"piece": 26}),
+    "crackers":          ("crackers, whole-wheat",                     10.6, 68.6, 14.1, {"piece": 4}),
+    "granola":           ("cereals ready-to-eat, granola, homemade",   13.7, 53.9, 24.3, {"cup": 122}),
+    "pancakes":          ("pancakes, plain, prepared from recipe",      6.4, 28.3,  9.7, {"piece": 38}),
+    "pita":              ("bread, pita, whole-wheat",                   9.8, 55.0,  1.7, {"piece": 64}),
+    "bulgur":            ("bulgur, cooked",                             3.1, 18.6,  0.2, {"cup": 182}),
+    "soba":              ("noodles, japanese, soba, cooked",            5.1, 21.4,  0.1, {"cup": 114}),
+    "rice_noodles":      ("rice noodles, cooked",                       1.8, 24.9,  0.2, {"cup": 176}),
+
+    "lentils":           ("lentils, mature seeds, cooked, boiled, without salt", 9.0, 20.1, 0.4,
+                          {"cup": 198, "bowl": 200}),
+    "mung_beans":        ("mung beans, mature seeds, cooked, boiled, without salt", 7.0, 19.2, 0.4, {"cup": 202}),
+    "chickpeas":         ("chickpeas (garbanzo beans, bengal gram), mature seeds, cooked, boiled, without salt",
+                          8.9, 27.4, 2.6, {"cup": 164}),
+    "roasted_chana":     ("chickpeas, roasted",                        22.4, 58.0,  5.2, {"cup": 100}),
+    "kidney_beans":      ("beans, kidney, red, mature seeds, cooked, boiled, without salt", 8.7, 22.8, 0.5,
+                          {"cup": 177}),
+    "black_beans":       ("beans, black, mature seeds, cooked, boiled, without salt", 8.9, 23.7, 0.5, {"cup": 172}),
+    "sprouts":           ("mung beans, mature seeds, sprouted, raw",    3.0,  5.9,  0.2, {"cup": 104}),
+    "sambar":            ("sambar",                                     3.0, 10.0,  2.0, {"bowl": 150, "cup": 240}),
+    "papad":             ("papad",                                     25.6, 59.9,  3.3, {"piece": 12}),
+    "tofu":              ("tofu, raw, firm, prepared with calcium sulfate", 17.3, 2.8, 8.7, {"cup": 252}),
+    "tempeh":            ("tempeh",                                    20.3,  7.6, 10.8, {"cup": 166}),
+    "edamame":           ("edamame, frozen, prepared",                 11.9,  8.9,  5.2, {"cup": 155}),
+    "hummus":            ("hummus, commercial",                         7.9, 14.3,  9.6, {"tbsp": 15}),
+    "fava_beans":        ("broadbeans (fava beans), mature seeds, cooked, boiled, without salt", 7.6, 19.7, 0.4,
+                          {"cup": 170}),
+    "falafel":           ("falafel, home-prepared",                    13.3, 31.8, 17.8, {"piece": 17}),
+    "soy_milk":          ("soymilk, original and vanilla, unfortified", 3.3, 6.3,  2.0, {"cup": 243}),
+    "miso":              ("miso",                                      11.7, 26.5,  6.0, {"tbsp": 17}),
+
+    "chicken_breast":    ("chicken, broilers or fryers, breast, meat only, cooked, roasted", 31.0, 0.0, 3.6,
+                          {"piece": 172}),
+    "chicken_thigh":     ("chicken, broilers or fryers, thigh, meat only, cooked, roasted", 26.0, 0.0, 10.9,
+                          {"piece": 52}),
+    "chicken_sausage":   ("sausage, chicken",                          16.0,  3.0,  9.0, {"piece": 85}),
+    "turkey_bacon":      ("turkey bacon, cooked",                      29.6,  4.2, 14.5, {"slice": 8}),
+    "turkey_slices":     ("turkey, sliced, deli",                      17.1,  3.1,  1.7, {"slice": 28}),
+    "bacon":             ("pork, cured, bacon, cooked",                37.0,  1.4, 41.8, {"slice": 8}),
+    "mutton":            ("lamb, ground, cooked, broiled",             24.8,  0.0, 19.6, {"cup": 140}),
+    "beef":              ("beef, top sirloin, steak, separable lean only, cooked", 29.0, 0.0, 8.0, {"cup": 140}),
+    "fish":              ("fish, tilapia, cooked, dry heat",           26.2,  0.0,  2.7, {"piece": 87}),
+    "salmon":            ("fish, salmon, atlantic, farmed, cooked, dry heat", 22.1, 0.0, 12.4, {"piece": 154}),
+    "tuna":              ("fish, tuna, light, canned in water, drained solids", 25.5, 0.0, 0.8,
+                          {"cup": 154, "can": 142}),
+    "shrimp":            ("crustaceans, shrimp, cooked",               24.0,  0.2,  0.3, {"cup": 145}),
+
+    "lettuce":           ("lettuce, cos or romaine, raw",               1.2,  3.3,  0.3, {"cup": 47}),
+    "mixed_veg":         ("vegetables, mixed, frozen, cooked, boiled, drained, without salt", 2.9, 13.1, 0.1,
+                          {"cup": 182}),
+    "spinach":           ("spinach, raw",                               2.9,  3.6,  0.4, {"cup": 30}),
+    "cucumber":          ("cucumber, with peel, raw",                   0.7,  3.6,  0.1, {"cup": 104, "piece": 301}),
+    "onion":             ("onions, raw",                                1.1,  9.3,  0.1, {"piece": 110, "cup": 160}),
+    "tomato":            ("tomatoes, red, ripe, raw, year round average", 0.9, 3.9, 0.2, {"piece": 123, "cup": 180}),
+    "carrot":            ("carrots, raw",                               0.9,  9.6,  0.2, {"piece": 61, "cup": 128}),
+    "celery":            ("celery, raw",                                0.7,  3.0,  0.2, {"piece": 40, "cup": 101}),
+    "bell_pepper":       ("peppers, sweet, red, raw",                   1.0,  6.0,  0.3, {"piece": 119}),
+    "broccoli":          ("broccoli, cooked, boiled, drained, without salt", 2.4, 7.2, 0.4, {"cup": 156}),
+    "asparagus":         ("asparagus, cooked, boiled, drained",         2.4,  4.1,  0.2, {"cup": 180, "piece": 15}),
+    "bok_choy":          ("cabbage, chinese (pak-choi), cooked, boiled, drained, without salt", 1.6, 1.8, 0.2,
+                          {"cup": 170}),
+    "sweet_potato":      ("sweet potato, cooked, baked in skin, flesh, without salt", 2.0, 20.7, 0.2,
+                          {"piece": 114}),
+    "portobello":        ("mushrooms, portabella, grilled",             3.3,  4.4,  0.6, {"piece": 121}),
+    "eggplant":          ("eggplant, raw",                              1.0,  5.9,  0.2, {"cup": 82}),
+    "kimchi":            ("cabbage, kimchi",                            1.1,  2.4,  0.5, {"cup": 150}),
+    "marinara":          ("sauce, pasta, spaghetti/marinara, ready-to-serve", 1.4, 8.1, 1.5, {"cup": 250}),
+    "salsa":             ("sauce, salsa, ready-to-serve",               1.5,  6.6,  0.2, {"tbsp": 16}),
+    "guacamole":         ("guacamole",                                  2.0,  8.5, 14.7, {"tbsp": 15}),
+    "coconut_chutney":   ("chutney, coconut",                           3.0,  9.0, 15.0, {"tbsp": 15}),
+
+    "banana":            ("bananas, raw",                               1.1, 22.8,  0.3, {"piece": 118}),
+    "apple":             ("apples, raw, with skin",                     0.3, 13.8,  0.2, {"piece": 182}),
+    "berries":           ("blueberries, raw",                           0.7, 14.5,  0.3, {"cup": 148}),
+    "pineapple":         ("pineapple, raw, all varieties",              0.5, 13.1,  0.1, {"cup": 165}),
+    "avocado":           ("avocados, raw, all commercial varieties",    2.0,  8.5, 14.7, {"piece": 150, "cup": 150}),
+    "acai":              ("acai berry, frozen pulp",                    1.6,  6.0,  5.0, {"cup": 100}),
+    "dates":             ("dates, medjool",                             1.8, 75.0,  0.2, {"piece": 24}),
+
+    "peanuts":           ("peanuts, all types, dry-roasted, without salt", 23.7, 21.5, 49.7, {"tbsp": 9}),
+    "peanut_butter":     ("peanut butter, smooth style, without salt",  22.5, 22.3, 51.4, {"tbsp": 16}),
+    "almonds":           ("nuts, almonds",                             21.2, 21.6, 49.9, {"cup": 143, "piece": 1.2}),
+    "almond_butter":     ("nuts, almond butter, plain, without salt added", 21.0, 18.8, 55.5, {"tbsp": 16}),
+    "walnuts":           ("nuts, walnuts, english",                    15.2, 13.7, 65.2, {"tbsp": 7.5}),
+    "pistachios":        ("nuts, pistachio nuts, dry roasted, without salt added", 21.0, 27.6, 45.8, {"tbsp": 8}),
+    "chia":              ("seeds, chia seeds, dried",                  16.5, 42.1, 30.7, {"tbsp": 12}),
+    "flaxseed":          ("seeds, flaxseed",                           18.3, 28.9, 42.2, {"tbsp": 10}),
+    "hemp_seeds":        ("seeds, hemp seed, hulled",                  31.6,  8.7, 48.8, {"tbsp": 10}),
+    "pumpkin_seeds":     ("seeds, pumpkin and squash seed kernels, dried", 29.8, 10.7, 49.1, {"tbsp": 9}),
+    "makhana":           ("lotus seeds, dried",                        15.4, 64.5,  2.0, {"cup": 32}),
+    "tahini":            ("seeds, sesame butter, tahini",              17.0, 21.2, 53.8, {"tbsp": 15}),
+    "nutritional_yeast": ("leavening agents, yeast, baker's, active dry", 40.4, 41.2, 7.6, {"tbsp": 5}),
+    "dark_chocolate":    ("chocolate, dark, 70-85% cacao solids",       7.8, 45.9, 42.6, {"piece": 10}),
+
+    "oil":               ("oil, vegetable, soybean",                    0.0,  0.0,100.0, {"tbsp": 13.6, "tsp": 4.5}),
+    "olive_oil":         ("oil, olive, salad or cooking",               0.0,  0.0,100.0, {"tbsp": 13.5, "tsp": 4.5}),
+    "vinaigrette":       ("salad dressing, italian dressing, commercial, regular", 0.4, 10.4, 28.4, {"tbsp": 15}),
+    "maple_syrup":       ("syrups, maple",                              0.0, 67.0,  0.1, {"tbsp": 20}),
+    "soy_sauce":         ("soy sauce made from soy (tamari)",          10.5,  5.6,  0.1, {"tbsp": 18, "tsp": 6}),
+    "spices":            ("spices, curry powder",                      14.3, 55.8, 14.0, {"tsp": 2}),
+    "tea":               ("beverages, tea, black, brewed, prepared with tap water", 0.0, 0.3, 0.0, {"cup": 237}),
+}
+
+# FOOD_DB meal → one serving as (ingredient, amount, unit)
+MEAL_RECIPES = {
+    # Vegetarian · South Asian
+    "Masala Oats with milk":                      [("oats", 0.5, "cup"), ("milk", 1, "cup"),
+                                                   ("mixed_veg", 0.5, "cup"), ("oil", 1, "tsp")],
+    "Idli (3) + Sambar + Chutney":                [("idli", 3, "piece"), ("sambar", 1, "bowl"),
+                                                   ("coconut_chutney", 2, "tbsp")],
+    "Poha with peanuts + boiled egg":             [("poha", 1, "cup"), ("peanuts", 1, "tbsp"),
+                                                   ("egg", 1, "piece"), ("oil", 1, "tsp")],
+    "Brown rice + Dal + Mixed veg sabzi + Raita": [("brown_rice", 1, "cup"), ("lentils", 1, "bowl"),
+                                                   ("mixed_veg", 1, "cup"), ("yogurt", 0.5, "cup")],
+    "Roti (3) + Paneer curry + Salad":            [("roti", 3, "piece"), ("paneer", 80, "g"),
+                                                   ("onion", 0.5, "piece"), ("tomato", 0.5, "piece"),
+                                                   ("oil", 1, "tsp"), ("lettuce", 1, "cup")],
+    "Rajma rice + Curd":                          [("kidney_beans", 1, "cup"), ("rice", 1, "cup"),
+                                                   ("yogurt", 0.5, "cup")],
+    "Greek yogurt + banana":                      [("greek_yogurt", 0.75, "cup"), ("banana", 1, "piece")],
+    "Roasted chana + sprouts":                    [("roasted_chana", 30, "g"), ("sprouts", 1, "cup")],
+    "Paneer cubes + cucumber":                    [("paneer", 60, "g"), ("cucumber", 1, "cup")],
+    "Chapati (2) + Palak tofu + Dal soup":        [("roti", 2, "piece"), ("tofu", 100, "g"),
+                                                   ("spinach", 2, "cup"), ("lentils", 1, "bowl"),
+                                                   ("oil", 1, "tsp")],
+    "Khichdi (rice + moong) + Ghee + Papad":      [("rice", 1, "cup"), ("mung_beans", 0.5, "cup"),
+                                                   ("ghee", 1, "tsp"), ("papad", 1, "piece")],
+    "Paneer tikka + roti (2) + salad":            [("paneer", 100, "g"), ("yogurt", 2, "tbsp"),
+                                                   ("roti", 2, "piece"), ("lettuce", 1, "cup")],
+    # Vegetarian · Western
+    "Overnight oats + chia + berries":            [("oats", 0.5, "cup"), ("milk", 0.75, "cup"),
+                                                   ("chia", 1, "tbsp"), ("berries", 0.5, "cup")],
+    "Whole-grain toast + avocado + poached eggs": [("whole_grain_bread", 2, "slice"), ("avocado", 0.5, "piece"),
+                                                   ("egg", 2, "piece")],
+    "Smoothie bowl (banana, protein powder, granola)": [("banana", 1, "piece"), ("protein_powder", 1, "scoop"),
+                                                   ("granola", 0.25, "cup"), ("milk", 0.5, "cup")],
+    "Quinoa salad + chickpeas + feta + olive oil": [("quinoa", 1, "cup"), ("chickpeas", 0.5, "cup"),
+                                                   ("feta", 1, "oz"), ("olive_oil", 1, "tbsp"),
+                                                   ("lettuce", 1, "cup")],
+    "Lentil soup + whole-grain bread":            [("lentils", 1, "cup"), ("mixed_veg", 0.5, "cup"),
+                                                   ("whole_grain_bread", 1, "slice")],
+    "Buddha bowl (brown rice, roasted veg, tahini)": [("brown_rice", 1, "cup"), ("mixed_veg", 1, "cup"),
+                                                   ("chickpeas", 0.25, "cup"), ("tahini", 1, "tbsp")],
+    "Apple + almond butter":                      [("apple", 1, "piece"), ("almond_butter", 1, "tbsp")],
+    "Cottage cheese + pineapple":                 [("cottage_cheese", 0.75, "cup"), ("pineapple", 0.5, "cup")],
+    "Hummus + carrot sticks":                     [("hummus", 4, "tbsp"), ("carrot", 1, "cup")],
+    "Stuffed bell peppers (quinoa, black beans, cheese)": [("bell_pepper", 2, "piece"), ("quinoa", 0.5, "cup"),
+                                                   ("black_beans", 0.5, "cup"), ("cheese", 1, "oz")],
+    "Pasta primavera + parmesan":                 [("pasta", 1.5, "cup"), ("mixed_veg", 1, "cup"),
+                                                   ("olive_oil", 1, "tsp"), ("parmesan", 2, "tbsp")],
+    "Veggie stir-fry with tofu + brown rice":     [("tofu", 120, "g"), ("mixed_veg", 1, "cup"),
+                                                   ("brown_rice", 1, "cup"), ("oil", 1, "tsp")],
+    # Non-Vegetarian · South Asian
+    "Egg omelette (3 eggs) + toast + milk":       [("egg", 3, "piece"), ("whole_grain_bread", 1, "slice"),
+                                                   ("milk", 1, "cup"), ("oil", 1, "tsp")],
+    "Chicken poha + boiled egg":                  [("poha", 1, "cup"), ("chicken_breast", 50, "g"),
+                                                   ("egg", 1, "piece"), ("oil", 1, "tsp")],
+    "Oats + whey protein + banana":               [("oats", 0.5, "cup"), ("protein_powder", 1, "scoop"),
+                                                   ("banana", 1, "piece")],
+    "Chicken biryani (200g chicken) + raita":     [("chicken_breast", 200, "g"), ("rice", 1, "cup"),
+                                                   ("oil", 1, "tsp"), ("yogurt", 0.5, "cup")],
+    "Fish curry + brown rice + salad":            [("fish", 150, "g"), ("brown_rice", 1, "cup"),
+                                                   ("onion", 0.5, "piece"), ("tomato", 0.5, "piece"),
+                                                   ("oil", 1, "tsp"), ("lettuce", 1, "cup")],
+    "Egg curry (3 eggs) + roti (3) + dal":        [("egg", 3, "piece"), ("roti", 3, "piece"),
+                                                   ("lentils", 1, "bowl"), ("onion", 0.5, "piece"),
+                                                   ("tomato", 0.5, "piece"), ("oil", 1, "tsp")],
+    "Boiled eggs (2) + chaat masala":             [("egg", 2, "piece"), ("spices", 1, "tsp")],
+    "Tuna salad on whole-grain crackers":         [("tuna", 100, "g"), ("crackers", 6, "piece"),
+                                                   ("lettuce", 0.5, "cup")],
+    "Greek yogurt + protein powder":              [("greek_yogurt", 0.75, "cup"), ("protein_powder", 0.5, "scoop")],
+    "Grilled chicken (200g) + quinoa + steamed broccoli": [("chicken_breast", 200, "g"), ("quinoa", 1, "cup"),
+                                                   ("broccoli", 1, "cup")],
+    "Prawn stir-fry + roti (2) + dal soup":       [("shrimp", 150, "g"), ("mixed_veg", 1, "cup"),
+                                                   ("oil", 1, "tsp"), ("roti", 2, "piece"),
+                                                   ("lentils", 1, "bowl")],
+    "Mutton keema (150g) + roti (2) + salad":     [("mutton", 150, "g"), ("roti", 2, "piece"),
+                                                   ("onion", 0.5, "piece"), ("tomato", 0.5, "piece"),
+                                                   ("lettuce", 1, "cup")],
+    # Non-Vegetarian · Western
+    "Scrambled eggs (4) + turkey bacon + sourdough": [("egg", 4, "piece"), ("turkey_bacon", 2, "slice"),
+                                                   ("sourdough", 1, "slice")],
+    "Greek yogurt parfait + granola + chicken sausage": [("greek_yogurt", 1, "cup"), ("granola", 0.25, "cup"),
+                                                   ("berries", 0.5, "cup"), ("chicken_sausage", 1, "piece")],
+    "Protein pancakes + maple syrup + bacon":     [("pancakes", 2, "piece"), ("protein_powder", 0.5, "scoop"),
+                                                   ("maple_syrup", 2, "tbsp"), ("bacon", 2, "slice")],
+    "Grilled chicken salad + vinaigrette + whole-grain roll": [("chicken_breast", 150, "g"),
+                                                   ("lettuce", 2, "cup"), ("vinaigrette", 2, "tbsp"),
+                                                   ("whole_grain_roll", 1, "piece")],
+    "Tuna wrap + Greek salad":                    [("tuna", 120, "g"), ("tortilla", 1, "piece"),
+                                                   ("lettuce", 1, "cup"), ("cucumber", 0.5, "cup"),
+                                                   ("tomato", 0.5, "piece"), ("feta", 1, "oz"),
+                                                   ("olive_oil", 1, "tsp")],
+    "Salmon bowl + quinoa + avocado":             [("salmon", 150, "g"), ("quinoa", 1, "cup"),
+                                                   ("avocado", 0.5, "piece")],
+    "Cottage cheese + almonds":                   [("cottage_cheese", 1, "cup"), ("almonds", 1, "oz")],
+    "Turkey slices + celery + hummus":            [("turkey_slices", 4, "slice"), ("celery", 2, "piece"),
+                                                   ("hummus", 2, "tbsp")],
+    "Whey protein shake + banana":                [("protein_powder", 1, "scoop"), ("banana", 1, "piece")],
+    "Grilled salmon (200g) + sweet potato + asparagus": [("salmon", 200, "g"), ("sweet_potato", 1, "piece"),
+                                                   ("asparagus", 1, "cup")],
+    "Beef stir-fry + brown rice + bok choy":      [("beef", 150, "g"), ("brown_rice", 1, "cup"),
+                                                   ("bok_choy", 1, "cup"), ("oil", 1, "tsp")],
+    "Baked chicken thighs + roasted veg + couscous": [("chicken_thigh", 2, "piece"), ("mixed_veg", 1, "cup"),
+                                                   ("couscous", 1, "cup"), ("olive_oil", 1, "tsp")],
+    # Vegan · South Asian
+    "Tofu scramble + roti (2) + coconut milk chai": [("tofu", 150, "g"), ("roti", 2, "piece"),
+                                                   ("coconut_milk", 0.5, "cup"), ("tea", 1, "cup")],
+    "Moong dosa + coconut chutney + sambar":      [("mung_beans", 1, "cup"), ("oil", 1, "tsp"),
+                                                   ("coconut_chutney", 2, "tbsp"), ("sambar", 1, "bowl")],
+    "Oats porridge with almond milk + chia seeds": [("oats", 0.5, "cup"), ("almond_milk", 1, "cup"),
+                                                   ("chia", 1, "tbsp")],
+    "Rajma (kidney bean) curry + brown rice + salad": [("kidney_beans", 1, "cup"), ("brown_rice", 1, "cup"),
+                                                   ("onion", 0.5, "piece"), ("tomato", 0.5, "piece"),
+                                                   ("lettuce", 1, "cup")],
+    "Chana masala + roti (3) + onion salad":      [("chickpeas", 1, "cup"), ("roti", 3, "piece"),
+                                                   ("onion", 1, "piece"), ("tomato", 0.5, "piece"),
+                                                   ("oil", 1, "tsp")],
+    "Mixed dal + millet roti + sabzi":            [("lentils", 1, "bowl"), ("millet_roti", 2, "piece"),
+                                                   ("mixed_veg", 1, "cup")],
+    "Roasted makhana + green tea":                [("makhana", 1, "cup"), ("oil", 1, "tsp"), ("tea", 1, "cup")],
+    "Banana + peanut butter":                     [("banana", 1, "piece"), ("peanut_butter", 1, "tbsp")],
+    "Sprout chaat":                               [("sprouts", 1.5, "cup"), ("onion", 0.25, "piece"),
+                                                   ("tomato", 0.5, "piece"), ("spices", 1, "tsp")],
+    "Tofu palak + roti (2) + dal soup":           [("tofu", 100, "g"), ("spinach", 2, "cup"),
+                                                   ("roti", 2, "piece"), ("lentils", 1, "bowl"),
+                                                   ("oil", 1, "tsp")],
+    "Lentil kitchari + coconut raita":            [("rice", 0.75, "cup"), ("lentils", 1, "cup"),
+                                                   ("coconut_yogurt", 0.5, "cup")],
+    "Chickpea tikka + roti (2) + salad":          [("chickpeas", 1, "cup"), ("roti", 2, "piece"),
+                                                   ("lettuce", 1, "cup"), ("oil", 1, "tsp")],
+    # Vegan · Western
+    "Açaí bowl + granola + mixed berries + hemp seeds": [("acai", 100, "g"), ("banana", 0.5, "piece"),
+                                                   ("granola", 0.25, "cup"), ("berries", 0.5, "cup"),
+                                                   ("hemp_seeds", 1, "tbsp")],
+    "Overnight oats (oat milk) + flaxseed + walnuts": [("oats", 0.5, "cup"), ("oat_milk", 1, "cup"),
+                                                   ("flaxseed", 1, "tbsp"), ("walnuts", 1, "tbsp")],
+    "Tofu scramble + avocado + sourdough (2 slices)": [("tofu", 150, "g"), ("avocado", 0.5, "piece"),
+                                                   ("sourdough", 2, "slice")],
+    "Lentil & roasted vegetable bowl + tahini":   [("lentils", 1, "cup"), ("mixed_veg", 1, "cup"),
+                                                   ("tahini", 1, "tbsp")],
+    "Black bean tacos (3) + guacamole + salsa":   [("corn_tortilla", 3, "piece"), ("black_beans", 0.75, "cup"),
+                                                   ("guacamole", 3, "tbsp"), ("salsa", 3, "tbsp")],
+    "Chickpea pasta + marinara + nutritional yeast": [("chickpea_pasta", 1.5, "cup"), ("marinara", 0.5, "cup"),
+                                                   ("nutritional_yeast", 2, "tbsp")],
+    "Edamame + sea salt":                         [("edamame", 1, "cup")],
+    "Almond butter + apple slices":               [("almond_butter", 1, "tbsp"), ("apple", 1, "piece")],
+    "Pumpkin seeds + dark chocolate":             [("pumpkin_seeds", 1, "oz"), ("dark_chocolate", 1.5, "piece")],
+    "Tempeh stir-fry + brown rice + broccoli":    [("tempeh", 100, "g"), ("brown_rice", 1, "cup"),
+                                                   ("broccoli", 1, "cup"), ("oil", 1, "tsp")],
+    "Stuffed portobello + quinoa + roasted tomatoes": [("portobello", 2, "piece"), ("quinoa", 1, "cup"),
+                                                   ("tomato", 1, "piece"), ("olive_oil", 1, "tsp")],
+    "Red lentil soup + crusty sourdough + side salad": [("lentils", 1.5, "cup"), ("sourdough", 1, "slice"),
+                                                   ("lettuce", 1, "cup")],
+    # Vegetarian · Middle Eastern
+    "Shakshuka (2 eggs) + pita":                  [("egg", 2, "piece"), ("tomato", 1, "cup"),
+                                                   ("bell_pepper", 0.5, "piece"), ("onion", 0.25, "piece"),
+                                                   ("olive_oil", 1, "tsp"), ("pita", 1, "piece")],
+    "Labneh + pita + cucumber + za'atar":         [("greek_yogurt", 0.5, "cup"), ("pita", 1, "piece"),
+                                                   ("cucumber", 0.5, "cup"), ("olive_oil", 1, "tsp"),
+                                                   ("spices", 1, "tsp")],
+    "Ful medames + boiled egg + pita":            [("fava_beans", 0.75, "cup"), ("egg", 1, "piece"),
+                                                   ("pita", 0.5, "piece"), ("tomato", 0.5, "piece"),
+                                                   ("olive_oil", 1, "tsp")],
+    "Falafel wrap + tahini + salad":              [("pita", 1, "piece"), ("falafel", 4, "piece"),
+                                                   ("tahini", 1, "tbsp"), ("lettuce", 1, "cup"),
+                                                   ("tomato", 0.5, "piece")],
+    "Mujaddara (lentils + bulgur) + yogurt":      [("lentils", 0.75, "cup"), ("bulgur", 1, "cup"),
+                                                   ("onion", 0.5, "piece"), ("olive_oil", 1, "tsp"),
+                                                   ("yogurt", 0.5, "cup")],
+    "Tabbouleh + chickpeas + feta":               [("bulgur", 0.75, "cup"), ("tomato", 1, "piece"),
+                                                   ("cucumber", 0.5, "cup"), ("chickpeas", 0.5, "cup"),
+                                                   ("feta", 1, "oz"), ("olive_oil", 1, "tbsp")],
+    "Hummus + pita":                              [("hummus", 3, "tbsp"), ("pita", 0.5, "piece")],
+    "Dates (3) + pistachios":                     [("dates", 3, "piece"), ("pistachios", 2, "tbsp")],
+    "Labneh + cucumber sticks":                   [("greek_yogurt", 0.5, "cup"), ("cucumber", 1, "cup"),
+                                                   ("olive_oil", 1, "tsp")],
+    "Stuffed peppers (bulgur + chickpeas) + yogurt": [("bell_pepper", 2, "piece"), ("bulgur", 0.75, "cup"),
+                                                   ("chickpeas", 0.5, "cup"), ("tomato", 0.5, "cup"),
+                                                   ("yogurt", 0.5, "cup"), ("olive_oil", 1, "tsp")],
+    "Eggplant + chickpea stew + couscous":        [("eggplant", 1.5, "cup"), ("chickpeas", 0.75, "cup"),
+                                                   ("tomato", 1, "cup"), ("couscous", 1, "cup"),
+                                                   ("olive_oil", 1, "tbsp")],
+    "Spinach & feta fatayer + lentil soup":       [("pita", 1, "piece"), ("spinach", 2, "cup"),
+                                                   ("feta", 1, "oz"), ("lentils", 1, "cup"),
+                                                   ("olive_oil", 1, "tsp")],
+    # Vegetarian · East Asian
+    "Rice congee + soft egg + greens":            [("rice", 0.75, "cup"), ("egg", 1, "piece"),
+                                                   ("bok_choy", 0.5, "cup"), ("soy_sauce", 1, "tsp")],
+    "Tamagoyaki (3 eggs) + rice + miso soup":     [("egg", 3, "piece"), ("rice", 0.75, "cup"),
+                                                   ("miso", 1, "tbsp"), ("tofu", 50, "g")],
+    "Egg fried rice + edamame":                   [("rice", 1, "cup"), ("egg", 2, "piece"),
+                                                   ("edamame", 0.5, "cup"), ("oil", 1, "tsp"),
+                                                   ("soy_sauce", 1, "tsp")],
+    "Soba noodles + egg + edamame + miso broth":  [("soba", 1.5, "cup"), ("egg", 1, "piece"),
+                                                   ("edamame", 0.5, "cup"), ("miso", 1, "tbsp"),
+                                                   ("bok_choy", 1, "cup")],
+    "Vegetarian mapo tofu + rice":                [("tofu", 150, "g"), ("rice", 1, "cup"),
+                                                   ("mixed_veg", 0.5, "cup"), ("oil", 1, "tsp"),
+                                                   ("soy_sauce", 1, "tsp")],
+    "Bibimbap (egg, spinach, carrot, sprouts)":   [("rice", 1, "cup"), ("egg", 1, "piece"),
+                                                   ("spinach", 1, "cup"), ("carrot", 0.5, "piece"),
+                                                   ("sprouts", 0.5, "cup"), ("oil", 1, "tsp")],
+    "Edamame + sea salt":                         [("edamame", 1, "cup")],
+    "Tea eggs (2) + cucumber":                    [("egg", 2, "piece"), ("cucumber", 0.5, "cup")],
+    "Silken tofu + soy sauce":                    [("tofu", 120, "g"), ("soy_sauce", 1, "tsp")],
+    "Kung pao tofu + broccoli + rice":            [("tofu", 150, "g"), ("peanuts", 1, "tbsp"),
+                                                   ("broccoli", 1, "cup"), ("rice", 1, "cup"),
+                                                   ("oil", 1, "tsp"), ("soy_sauce", 1, "tsp")],
+    "Yaki soba with egg + vegetables":            [("soba", 1.5, "cup"), ("egg", 2, "piece"),
+                                                   ("mixed_veg", 1, "cup"), ("oil", 1, "tsp"),
+                                                   ("soy_sauce", 1, "tsp")],
+    "Kimchi fried rice + fried egg":              [("rice", 1, "cup"), ("kimchi", 0.5, "cup"),
+                                                   ("egg", 1, "piece"), ("oil", 1, "tsp")],
+    # Non-Vegetarian · Middle Eastern
+    "Shakshuka (3 eggs) + pita":                  [("egg", 3, "piece"), ("tomato", 1, "cup"),
+                                                   ("bell_pepper", 0.5, "piece"), ("olive_oil", 1, "tsp"),
+                                                   ("pita", 1, "piece")],
+    "Eggs (2) + labneh + pita + cucumber":        [("egg", 2, "piece"), ("greek_yogurt", 0.5, "cup"),
+                                                   ("pita", 1, "piece"), ("cucumber", 0.5, "cup")],
+    "Ful medames + eggs (2) + pita":              [("fava_beans", 0.75, "cup"), ("egg", 2, "piece"),
+                                                   ("pita", 1, "piece"), ("olive_oil", 1, "tsp")],
+    "Chicken shawarma plate + rice + salad":      [("chicken_thigh", 3, "piece"), ("rice", 1, "cup"),
+                                                   ("lettuce", 1, "cup"), ("tomato", 0.5, "piece"),
+                                                   ("tahini", 1, "tbsp")],
+    "Lamb kofta + bulgur + yogurt sauce":         [("mutton", 0.75, "cup"), ("bulgur", 1, "cup"),
+                                                   ("yogurt", 0.5, "cup"), ("onion", 0.25, "piece")],
+    "Chicken kebab + hummus + pita":              [("chicken_breast", 0.75, "piece"), ("hummus", 3, "tbsp"),
+                                                   ("pita", 1, "piece"), ("tomato", 0.5, "piece")],
+    "Greek yogurt + dates + pistachios":          [("greek_yogurt", 0.75, "cup"), ("dates", 2, "piece"),
+                                                   ("pistachios", 1, "tbsp")],
+    "Boiled eggs (2) + za'atar + cucumber":       [("egg", 2, "piece"), ("cucumber", 1, "cup"),
+                                                   ("olive_oil", 1, "tsp"), ("spices", 1, "tsp")],
+    "Tuna + hummus + pita":                       [("tuna", 0.5, "can"), ("hummus", 2, "tbsp"),
+                                                   ("pita", 0.5, "piece")],
+    "Grilled fish + bulgur pilaf + tomato salad": [("fish", 1.5, "piece"), ("bulgur", 1, "cup"),
+                                                   ("tomato", 1, "piece"), ("olive_oil", 1, "tbsp")],
+    "Chicken & vegetable tagine + couscous":      [("chicken_thigh", 3, "piece"), ("mixed_veg", 1, "cup"),
+                                                   ("couscous", 1, "cup"), ("olive_oil", 1, "tsp")],
+    "Lamb & eggplant stew + rice":                [("mutton", 0.75, "cup"), ("eggplant", 1, "cup"),
+                                                   ("tomato", 1, "cup"), ("rice", 1, "cup"),
+                                                   ("olive_oil", 1, "tsp")],
+    # Non-Vegetarian · East Asian
+    "Chicken congee + soft egg":                  [("rice", 0.75, "cup"), ("chicken_breast", 0.4, "piece"),
+                                                   ("egg", 1, "piece"), ("soy_sauce", 1, "tsp")],
+    "Japanese breakfast (salmon, rice, miso soup)": [("salmon", 0.6, "piece"), ("rice", 0.75, "cup"),
+                                                   ("miso", 1, "tbsp"), ("tofu", 50, "g")],
+    "Steamed egg custard (3 eggs) + rice + edamame": [("egg", 3, "piece"), ("rice", 0.75, "cup"),
+                                                   ("edamame", 0.5, "cup")],
+    "Teriyaki chicken + rice + broccoli":         [("chicken_thigh", 3, "piece"), ("rice", 1, "cup"),
+                                                   ("broccoli", 1, "cup"), ("soy_sauce", 1, "tbsp"),
+                                                   ("maple_syrup", 0.5, "tbsp")],
+    "Salmon poke bowl + rice + edamame":          [("salmon", 0.75, "piece"), ("rice", 1, "cup"),
+                                                   ("edamame", 0.5, "cup"), ("cucumber", 0.5, "cup"),
+                                                   ("avocado", 0.25, "piece"), ("soy_sauce", 1, "tsp")],
+    "Beef bulgogi + rice + kimchi":               [("beef", 0.75, "cup"), ("rice", 1, "cup"),
+                                                   ("kimchi", 0.5, "cup"), ("soy_sauce", 1, "tsp"),
+                                                   ("oil", 1, "tsp")],
+    "Tea eggs (2) + edamame":                     [("egg", 2, "piece"), ("edamame", 0.5, "cup")],
+    "Chicken yakitori skewers (2)":               [("chicken_thigh", 2, "piece"), ("soy_sauce", 1, "tsp")],
+    "Tuna onigiri (2)":                           [("rice", 1, "cup"), ("tuna", 0.33, "can"),
+                                                   ("soy_sauce", 1, "tsp")],
+    "Kung pao chicken + rice + bok choy":         [("chicken_breast", 0.75, "piece"), ("peanuts", 1, "tbsp"),
+                                                   ("rice", 1, "cup"), ("bok_choy", 1, "cup"),
+                                                   ("oil", 1, "tsp"), ("soy_sauce", 1, "tsp")],
+    "Miso-glazed salmon + soba + bok choy":       [("salmon", 1, "piece"), ("miso", 1, "tbsp"),
+                                                   ("soba", 1, "cup"), ("bok_choy", 1, "cup")],
+    "Shrimp & vegetable stir-fry + rice noodles": [("shrimp", 1, "cup"), ("mixed_veg", 1, "cup"),
+                                                   ("rice_noodles", 1.5, "cup"), ("oil", 1, "tsp"),
+                                                   ("soy_sauce", 1, "tsp")],
+    # Vegan · Middle Eastern
+    "Ful medames + pita + tomato":                [("fava_beans", 1, "cup"), ("pita", 1, "piece"),
+                                                   ("tomato", 1, "piece"), ("olive_oil", 1, "tbsp")],
+    "Tahini date oatmeal":                        [("oats", 0.5, "cup"), ("almond_milk", 1, "cup"),
+                                                   ("tahini", 1, "tbsp"), ("dates", 2, "piece")],
+    "Hummus toast + tomato + cucumber":           [("whole_grain_bread", 2, "slice"), ("hummus", 3, "tbsp"),
+                                                   ("tomato", 0.5, "piece"), ("cucumber", 0.5, "cup")],
+    "Falafel bowl + tabbouleh + tahini":          [("falafel", 5, "piece"), ("bulgur", 0.75, "cup"),
+                                                   ("tomato", 0.5, "piece"), ("cucumber", 0.5, "cup"),
+                                                   ("tahini", 1, "tbsp")],
+    "Lentil kofta + pita + salad":                [("lentils", 0.75, "cup"), ("bulgur", 0.5, "cup"),
+                                                   ("pita", 1, "piece"), ("lettuce", 1, "cup"),
+                                                   ("olive_oil", 1, "tsp")],
+    "Chickpea shawarma wrap + tahini":            [("chickpeas", 1, "cup"), ("pita", 1, "piece"),
+                                                   ("tahini", 1, "tbsp"), ("lettuce", 1, "cup"),
+                                                   ("onion", 0.25, "piece"), ("olive_oil", 1, "tsp")],
+    "Roasted chana + dates":                      [("roasted_chana", 30, "g"), ("dates", 2, "piece")],
+    "Baba ganoush + carrot sticks":               [("eggplant", 1, "cup"), ("tahini", 1, "tbsp"),
+                                                   ("carrot", 1, "piece"), ("olive_oil", 1, "tsp")],
+    "Pistachios + apple":                         [("pistachios", 2, "tbsp"), ("apple", 1, "piece")],
+    "Mujaddara (lentils + rice) + cucumber salad": [("lentils", 1, "cup"), ("rice", 0.75, "cup"),
+                                                   ("onion", 0.5, "piece"), ("olive_oil", 1, "tbsp"),
+                                                   ("cucumber", 1, "cup")],
+    "Chickpea tagine + sweet potato + couscous":  [("chickpeas", 1, "cup"), ("sweet_potato", 0.5, "piece"),
+                                                   ("tomato", 1, "cup"), ("couscous", 1, "cup"),
+                                                   ("olive_oil", 1, "tsp")],
+    "Stuffed eggplant with lentils + bulgur":     [("eggplant", 1.5, "cup"), ("lentils", 0.75, "cup"),
+                                                   ("tahini", 1, "tbsp"), ("bulgur", 0.75, "cup")],
+    # Vegan · East Asian
+    "Tofu scramble + rice + bok choy":            [("tofu", 150, "g"), ("rice", 0.75, "cup"),
+                                                   ("bok_choy", 1, "cup"), ("oil", 1, "tsp"),
+                                                   ("soy_sauce", 1, "tsp")],
+    "Rice congee + edamame + peanuts":            [("rice", 0.75, "cup"), ("edamame", 0.5, "cup"),
+                                                   ("peanuts", 1, "tbsp"), ("soy_sauce", 1, "tsp")],
+    "Soy milk + steamed sweet potato + peanuts":  [("soy_milk", 1, "cup"), ("sweet_potato", 1, "piece"),
+                                                   ("peanuts", 1, "tbsp")],
+    "Cold soba + tofu + edamame + sesame dressing": [("soba", 1.5, "cup"), ("tofu", 100, "g"),
+                                                   ("edamame", 0.5, "cup"), ("tahini", 1, "tbsp"),
+                                                   ("soy_sauce", 1, "tsp")],
+    "Vegetable pho with tofu":                    [("rice_noodles", 1.5, "cup"), ("tofu", 100, "g"),
+                                                   ("bok_choy", 1, "cup"), ("sprouts", 0.5, "cup")],
+    "Tempeh teriyaki + brown rice + broccoli":    [("tempeh", 0.5, "cup"), ("brown_rice", 1, "cup"),
+                                                   ("broccoli", 1, "cup"), ("soy_sauce", 1, "tbsp"),
+                                                   ("maple_syrup", 0.5, "tbsp")],
+    "Edamame + apple":                            [("edamame", 0.75, "cup"), ("apple", 1, "piece")],
+    "Miso soup + tofu cubes":                     [("miso", 1, "tbsp"), ("tofu", 100, "g")],
+    "Soy milk + roasted peanuts":                 [("soy_milk", 1, "cup"), ("peanuts", 2, "tbsp")],
+    "Vegan mapo tofu + brown rice":               [("tofu", 150, "g"), ("brown_rice", 1, "cup"),
+                                                   ("mixed_veg", 0.5, "cup"), ("oil", 1, "tsp"),
+                                                   ("soy_sauce", 1, "tsp")],
+    "Sesame tofu noodles + bok choy":             [("rice_noodles", 1.5, "cup"), ("tofu", 120, "g"),
+                                                   ("bok_choy", 1, "cup"), ("tahini", 1, "tbsp"),
+                                                   ("soy_sauce", 1, "tsp")],
+    "Japchae with tofu + vegetables":             [("rice_noodles", 1.5, "cup"), ("tofu", 100, "g"),
+                                                   ("mixed_veg", 1, "cup"), ("spinach", 1, "cup"),
+                                                   ("oil", 1, "tsp"), ("soy_sauce", 1, "tsp")],
+    # Planner fallback
+    "Mixed salad":                                [("lettuce", 2, "cup"), ("tomato", 1, "piece"),
+                                                   ("cucumber", 0.5, "cup"), ("chickpeas", 0.25, "cup"),
+                                                   ("olive_oil", 1, "tsp")],
+}
+
+
+def _link(descriptions: list[str], query: str) -> int:
+    """
+    Row of the FDC food for ``query`` (case-insensitive): the shortest
+    description starting with it, else the longest multi-field description
+    it starts with ("Milk, whole" for "milk, whole, 3.25% milkfat"); -1 if none.
+    """
+    best, best_key = -1, None
+    for row, text in enumerate(descriptions):
+        text = text.casefold()
+        if text.startswith(query):
+            key = (0, len(text))
+        elif "," in text and query.startswith(text):
+            key = (1, -len(text))
+        else:
+            continue
+        if best_key is None or key < best_key:
+            best, best_key = row, key
+    return best
+
+
+# ─── Compiled book ────────────────────────────────────────────────────────────
+class RecipeBook:
+    """
+    ``meals`` (display names, in the caller's id order) compiled against
+    ``INGREDIENTS``; ``store`` is an optional ``food_store.FoodStore``.
+    Meals without a recipe get an all-zero row.
+    """
+
+    def __init__(self, meals: list[str], store=None):
+        self.meals = list(meals)
+        self.meal_index = {name: i for i, name in enumerate(self.meals)}
+        self.ingredients = list(INGREDIENTS)
+        self.ingredient_index = {key: j for j, key in enumerate(self.ingredients)}
+
+        per_100g = np.array([spec[1:4] for spec in INGREDIENTS.values()], dtype=np.float64)
+        self.atwater = np.tile(np.asarray(ATWATER_GENERAL, dtype=np.float64), (len(self.ingredients), 1))
+        self.fdc_id = np.full(len(self.ingredients), -1, dtype=np.int64)
+        self.price_per_gram = np.full(len(self.ingredients), np.nan)
+        if store is not None and len(store):
+            self._link_store(store, per_100g)
+            self.price_per_gram = store.prices(self.fdc_id) / 100
+        energy = (per_100g * self.atwater).sum(axis=1)
+        self.per_gram = np.column_stack([per_100g, energy]) / 100
+
+        self.grams = np.zeros((len(self.meals), len(self.ingredients)))
+        missing = []
+        for m, meal in enumerate(self.meals):
+            if meal not in MEAL_RECIPES:
+                missing.append(meal)
+                continue
+            for key, amount, unit in MEAL_RECIPES[meal]:
+                j = self.ingredient_index[key]
+                self.grams[m, j] += amount * self.unit_grams(j, unit, store)
+        if missing:
+            logger.warning(f"⚠️ No recipe for {len(missing)} meal(s), e.g. {missing[0]!r} — counted as empty")
+        self.meal_nutrients = self.grams @ self.per_gram
+        self.meal_energy = np.ascontiguousarray(self.meal_nutrients[:, NUTRIENTS.index("energy")])
+
+    def _link_store(self, store, per_100g: np.ndarray):
+        """Point each ingredient at its FDC food; its macros and Atwater factors replace the built-in ones."""
+        descriptions = store.descriptions
+        rows = np.array([_link(descriptions, spec[0]) for spec in INGREDIENTS.values()])
+        linked = rows >= 0
+        self.fdc_id[linked] = np.asarray(store.fdc_id)[rows[linked]]
+        for col, name in enumerate(MACROS):
+            values = np.asarray(getattr(store, name))[rows[linked]].astype(np.float64)
+            per_100g[linked, col] = np.where(np.isnan(values), per_100g[linked, col], values)
+        self.atwater[linked] = np.asarray(store.atwater)[rows[linked]]
+        logger.info(f"✅ Recipes: {int(linked.sum())}/{len(rows)} ingredients linked to FoodData Central")
+
+    def meal_costs(self, serving_cost) -> np.ndarray:
+        """
+        (n_meals,) USD per serving: priced ingredients at their store price,
+        plus ``serving_cost`` (the hand-set per-meal constant) scaled by the
+        gram share of ingredients without a price.  Meals without a recipe
+        cost exactly ``serving_cost``.
+        """
+        priced = ~np.isnan(self.price_per_gram)
+        known = self.grams[:, priced] @ self.price_per_gram[priced]
+        total = self.grams.sum(axis=1)
+        unpriced = np.divide(self.grams[:, ~priced].sum(axis=1), total, out=np.ones(len(total)), where=total > 0)
+        return known + np.asarray(serving_cost, dtype=np.float64) * unpriced
+
+    def unit_grams(self, j: int, unit: str, store=None) -> float:
+        """Grams in one ``unit`` of ingredient ``j``: FDC portion, then built-in weight, then fixed units."""
+        unit = normalise_unit(unit)
+        if store is not None and self.fdc_id[j] >= 0 and unit not in FIXED_GRAMS:
+            grams = float(store.portions.unit_grams(self.fdc_id[j], unit))
+            if np.isfinite(grams):
+                return grams
+        grams = INGREDIENTS[self.ingredients[j]][4].get(unit, FIXED_GRAMS.get(unit))
+        if grams is None:
+            raise ValueError(f"No weight for 1 {unit} of {self.ingredients[j]}")
+        return grams
+
+    # ─── Batch scaling ────────────────────────────────────────────────────────
+    def plan_ids(self, plan: list[dict]) -> np.ndarray:
+        """(days, meals) meal ids of a ``DietPlanner`` ``weekly_plan``; -1 for unknown items."""
+        return np.array([[self.meal_index.get(meal["item"], -1) for meal in day["meals"]] for day in plan],
+                        dtype=np.int64)
+
+    @staticmethod
+    def plan_servings(plan: list[dict]) -> np.ndarray:
+        """(days, meals) servings of a ``DietPlanner`` ``weekly_plan``, aligned with ``plan_ids``."""
+        return np.array([[meal.get("servings", 1.0) for meal in day["meals"]] for day in plan],
+                        dtype=np.float64)
+
+    def counts(self, meal_ids, servings=None) -> np.ndarray:
+        """
+        (n_plans, n_meals) servings of each meal from ``meal_ids`` (n_plans, …)
+        — every trailing axis (days, meals of the day) is summed.  ``servings``
+        broadcasts against ``meal_ids`` (e.g. household size per plan as
+        ``sizes[:, None, None]``).  Ids < 0 are ignored.
+        """
+        ids = np.asarray(meal_ids, dtype=np.int64)
+        ids = ids.reshape(len(ids), -1)
+        weights = (np.ones(ids.shape) if servings is None
+                   else np.broadcast_to(np.asarray(servings, dtype=np.float64), np.shape(meal_ids))
+                   .reshape(ids.shape))
+        n = len(self.meals)
+        flat = (ids + n * np.arange(len(ids))[:, None]).ravel()
+        keep = ids.ravel() >= 0
+        return np.bincount(flat[keep], weights=weights.ravel()[keep], minlength=n * len(ids)).reshape(len(ids), n)
+
+    def nutrients(self, counts) -> np.ndarray:
+        """(n_plans, len(NUTRIENTS)) grams of each macro and kcal — one matrix multiply."""
+        return np.asarray(counts, dtype=np.float64) @ self.meal_nutrients
+
+    def energy(self, counts) -> np.ndarray:
+        """(n_plans,) kcal of each plan — one dot product with ``meal_energy``."""
+        return np.asarray(counts, dtype=np.float64) @ self.meal_energy
+
+    def ingredient_grams(self, counts) -> np.ndarray:
+        """(n_plans, n_ingredients) grams of each ingredient."""
+        return np.asarray(counts, dtype=np.float64) @ self.grams
@@ -0,0 +1,157 @@
+"""single_flight.py — Coalesce identical in-flight plan requests.
+
+The first caller for a key runs the computation; everyone who arrives with
+the same key while it is running waits on the same future and gets the same
+result (or exception).  Threaded callers use ``do``, asyncio callers
+``ado`` — both share one in-flight table, so a coroutine can piggy-back on a
+computation started by a worker thread and vice versa.  Nothing is cached
+once the computation finishes; results are shared objects, treat them as
+read-only.
+
+A leader that is cancelled (or interrupted) does not hand its
+``CancelledError`` to the followers: the flight is abandoned and the waiting
+followers re-join, so one of them leads a fresh run.  A blocking ``fn`` run
+by ``ado`` publishes its result from the executor thread, so it still
+reaches the followers after its leader was cancelled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import inspect
+import json
+import threading
+
+
+class _Abandoned(Exception):
+    """Set on a flight whose leader was cancelled; its followers re-join."""
+
+
+def request_key(user_data: dict) -> str:
+    """
+    Stable key over the exact inputs: numbers compare by value (``70 == 70.0``),
+    text only loses surrounding whitespace and lists their order — anything
+    that could change the plan changes the key.
+    """
+    norm = {}
+    for k, v in user_data.items():
+        if isinstance(v, bool) or v is None:
+            norm[k] = v
+        elif isinstance(v, (int, float)):
+            norm[k] = float(v)
+        elif isinstance(v, str):
+            norm[k] = v.strip()
+        elif isinstance(v, (list, tuple, set)):
+            norm[k] = sorted({str(x).strip() for x in v})
+        else:
+            norm[k] = repr(v)
+    blob = json.dumps(norm, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, concurrent.futures.Future] = {}
+        self._waiters: dict[str, int] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0,
+                       "abandoned": 0, "max_waiters": 0}
+
+    def _join(self, key: str) -> tuple[concurrent.futures.Future, bool]:
+        """(future, is_leader) for ``key``."""
+        with self._lock:
+            self._stats["calls"] += 1
+            fut = self._calls.get(key)
+            if fut is not None:
+                self._stats["coalesced"] += 1
+                self._waiters[key] += 1
+                self._stats["max_waiters"] = max(self._stats["max_waiters"], self._waiters[key])
+                return fut, False
+            fut = concurrent.futures.Future()
+            self._calls[key] = fut
+            self._waiters[key] = 0
+            self._stats["executions"] += 1
+            return fut, True
+
+    def _finish(self, key: str, fut: concurrent.futures.Future, result=None, exc=None):
+        with self._lock:
+            if self._calls.get(key) is fut:
+                self._calls.pop(key)
+                self._waiters.pop(key, None)
+            if isinstance(exc, _Abandoned):
+                self._stats["abandoned"] += 1
+            elif exc is not None:
+                self._stats["errors"] += 1
+        if fut.done():
+            return
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+
+    def _fail(self, key: str, fut: concurrent.futures.Future, exc: BaseException):
+        """Share an ordinary error; abandon the flight on cancellation / interrupts."""
+        self._finish(key, fut, exc=exc if isinstance(exc, Exception) else _Abandoned())
+
+    # ── Threaded ──────────────────────────────────────────────────────────────
+
+    def do(self, key: str, fn, *args, **kwargs):
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return fut.result()
+            except _Abandoned:
+                continue
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._fail(key, fut, e)
+            raise
+        self._finish(key, fut, result)
+        return result
+
+    # ── asyncio ───────────────────────────────────────────────────────────────
+
+    async def ado(self, key: str, fn, *args, **kwargs):
+        """``fn`` may be a coroutine function or a blocking callable (run in the default executor)."""
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                break
+            try:
+                # Shielded so a cancelled follower cannot cancel the shared future
+                return await asyncio.shield(asyncio.wrap_future(fut))
+            except _Abandoned:
+                continue
+        if not inspect.iscoroutinefunction(fn):
+            # The executor thread settles the flight, cancelled leader or not
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, lambda: self._run(key, fut, fn, args, kwargs))
+            return await asyncio.shield(asyncio.wrap_future(fut))
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:
+            self._fail(key, fut, e)
+            raise
+        self._finish(key, fut, result)
+        return result
+
+    def _run(self, key: str, fut: concurrent.futures.Future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._fail(key, fut, e)
+            return
+        self._finish(key, fut, result)
+
+    # ── Metrics ───────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats, in_flight=len(self._calls))
+        out["coalesce_rate"] = out["coalesced"] / out["calls"] if out["calls"] else 0.0
+        return out
@@ -0,0 +1,33 @@
+"""test_diet_plan.py — Each day's servings are scaled toward the calorie target."""
+
+import pytest
+
+from grocery import grocery_list
+from planner import MAX_SERVINGS, MIN_SERVINGS, SERVING_STEP, DietPlanner
+
+
+def _week(daily_calories):
+    return DietPlanner.generate(daily_calories, {}, "Non-Vegetarian", "Western", 0.0, notes=[])["weekly_plan"]
+
+
+def test_day_totals_follow_the_target():
+    gain, loss = _week(3944.0), _week(2129.0)
+    for big, small in zip(gain, loss):
+        assert big["calories"] > small["calories"]
+    for day in gain + loss:
+        servings = {meal["servings"] for meal in day["meals"]}
+        assert len(servings) == 1 and MIN_SERVINGS <= servings.pop() <= MAX_SERVINGS
+
+
+@pytest.mark.parametrize("target", [1400.0, 2129.0, 3944.0])
+def test_calorie_gap_is_reported(target):
+    for day in _week(target):
+        assert day["calorie_gap"] == day["calories"] - round(target)
+        # Rounding to a serving step is off by at most half a step of one serving's energy
+        one_serving = day["calories"] / day["meals"][0]["servings"]
+        assert abs(day["calorie_gap"]) <= one_serving * SERVING_STEP / 2 + 5
+
+
+def test_grocery_list_buys_the_servings():
+    grams = lambda week: sum(g["grams"] for g in grocery_list(week))
+    assert grams(_week(3944.0)) > grams(_week(2129.0))
@@ -0,0 +1,43 @@
+"""test_exercise_index.py — An index is only searched with the encoder version that built it."""
+
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from exercise_index import COLUMNS, INDEX_VERSION, ExerciseIndex
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _index(encoder="artifact", checksum="v1"):
+    arrays = {"embeddings": np.eye(2, dtype=np.float32), "planner_embeddings": np.eye(2, dtype=np.float32),
+              "met": np.ones(2, dtype=np.float32), **{name: np.zeros(2, dtype=np.int8) for name in COLUMNS}}
+    manifest = {"version": INDEX_VERSION, "encoder": encoder, "encoder_checksum": checksum, "dim": 2,
+                "vocab": {name: ["x"] for name in COLUMNS}, "titles": ["a", "b"], "planner_names": ["a"]}
+    return ExerciseIndex(arrays, manifest)
+
+
+def _models(source="artifact", checksum="v1"):
+    return SimpleNamespace(sources={"sentence_transformer": source},
+                           checksums={"sentence_transformer": checksum})
+
+
+@pytest.mark.parametrize("index, models, usable", [
+    (_index(), _models(), True),
+    (_index(), _models(checksum="v2"), False),            # hot-swapped encoder
+    (_index(), _models(source="pickle", checksum="v1"), True),
+    (_index(), _models(source="stub", checksum=None), False),
+    (_index(encoder="stub", checksum=None), _models(), False),
+    (_index(encoder="simulated", checksum=None), _models(source="simulated", checksum=None), True),
+])
+def test_usable_with(index, models, usable):
+    assert index.usable_with(models) is usable
+
+
+def test_stubs_have_no_checksum():
+    from model_loader import ModelLoader
+    models = ModelLoader(REPO, simulation_profile="")
+    for key, source in models.sources.items():
+        assert (models.checksums[key] is None) == (source in ("stub", "simulated"))
@@ -0,0 +1,87 @@
+"""test_food_index.py — Diet masks, free-text exclusions and the planner's meal pools."""
+
+import pytest
+
+from food_index import BITS, DIET_EXCLUSIONS, attributes_of, diet_mask, mask_of, parse_exclusions, tag_name
+from planner import DIET_BANKS, FOOD_INDEX, MEAL_COURSES, _meal_pools
+
+
+# ─── diet_mask ────────────────────────────────────────────────────────────────
+@pytest.mark.parametrize("diet", list(DIET_EXCLUSIONS))
+def test_diet_mask_matches_exclusions(diet):
+    assert set(attributes_of(diet_mask(diet))) == set(DIET_EXCLUSIONS[diet])
+
+
+def test_diet_mask_unknown_diet_excludes_nothing():
+    assert diet_mask("Fruitarian") == 0
+    assert diet_mask("Non-Vegetarian") == 0
+
+
+def test_keto_rules_out_grains_gluten_and_legumes():
+    mask = diet_mask("Keto")
+    for attr in ("grains", "gluten", "legumes", "high_carb", "added_sugar"):
+        assert mask & BITS[attr], attr
+
+
+@pytest.mark.parametrize("item", ["Oatmeal with berries", "Masala oats", "Steel-cut porridge"])
+def test_oats_count_as_grains(item):
+    assert tag_name(item) & BITS["grains"]
+
+
+def test_goat_is_not_a_grain():
+    assert attributes_of(tag_name("Goat curry")) == ["red_meat"]
+
+
+# ─── parse_exclusions ─────────────────────────────────────────────────────────
+@pytest.mark.parametrize("text, expected", [
+    ("no gluten, nut allergy",        ["gluten", "peanuts", "tree_nuts"]),
+    ("allergic to peanuts",           ["peanuts"]),
+    ("I'm allergic to shellfish",     ["shellfish"]),
+    ("Allergic to nuts!",             ["peanuts", "tree_nuts"]),
+    ("allergic to tree nuts",         ["tree_nuts"]),
+    ("lactose intolerant",            ["dairy"]),
+    ("grain free please",             ["gluten", "grains"]),
+    ("I love peanuts",                []),
+    ("",                              []),
+])
+def test_parse_exclusions(text, expected):
+    assert parse_exclusions(text) == expected
+
+
+# ─── _meal_pools ──────────────────────────────────────────────────────────────
+def _items(rows):
+    return [FOOD_INDEX.records[i]["item"] for i in rows]
+
+
+@pytest.mark.parametrize("diet", list(DIET_BANKS))
+def test_meal_pools_respect_diet(diet):
+    forbidden = diet_mask(diet)
+    pools = _meal_pools(diet, "Western", forbidden)
+    assert set(pools) == set(MEAL_COURSES)
+    for course, rows in pools.items():
+        assert not (FOOD_INDEX.masks[rows] & forbidden).any(), (course, _items(rows))
+
+
+def test_meal_pools_respect_exclusions():
+    forbidden = diet_mask("Vegetarian") | mask_of(parse_exclusions("allergic to dairy"))
+    pools = _meal_pools("Vegetarian", "South Asian", forbidden)
+    rows = [r for course in pools.values() for r in course]
+    assert rows
+    assert not any(FOOD_INDEX.masks[r] & BITS["dairy"] for r in rows)
+
+
+def test_meal_pools_keto_has_no_grain_meals():
+    pools = _meal_pools("Keto", "South Asian", diet_mask("Keto"))
+    items = [item.casefold() for rows in pools.values() for item in _items(rows)]
+    assert not any(word in item for item in items for word in ("oat", "rice", "roti", "toast", "quinoa", "lentil"))
+
+
+def test_meal_pools_widen_to_other_cultures():
+    # Nothing in the Keto / South Asian dinner pool survives; the course widens
+    pools = _meal_pools("Keto", "South Asian", diet_mask("Keto"))
+    assert len(pools["dinner"])
+
+
+def test_meal_pools_empty_when_everything_is_forbidden():
+    pools = _meal_pools("Non-Vegetarian", "Western", (1 << 32) - 1)
+    assert all(len(rows) == 0 for rows in pools.values())
@@ -0,0 +1,55 @@
+"""test_model_simulation.py — Simulated stand-ins are loaded as "simulated" and actually called."""
+
+import json
+import os
+
+import pytest
+
+from model_loader import ModelLoader
+from model_simulation import MODEL_METHODS, PROFILE_VERSION, SimulatedModel
+from plan_pipeline import build_user_data, generate_plan
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def simulated(tmp_path_factory):
+    path = tmp_path_factory.mktemp("profile") / "latency_profile.json"
+    path.write_text(json.dumps({
+        "version": PROFILE_VERSION,
+        "models": {key: {"method": method, "quantiles_ms": [[0.0, 1.0], [1.0, 1.0]], "memory_mb": 0.0}
+                   for key, method in MODEL_METHODS.items()},
+    }))
+    # No readable models in the tree: every key falls back to its simulated stub
+    return ModelLoader(REPO, artifact_dir=str(tmp_path_factory.mktemp("no_artifacts")),
+                       simulation_profile=str(path))
+
+
+def test_simulated_models_have_their_own_source(simulated):
+    for key in MODEL_METHODS:
+        if simulated.sources[key] in ("artifact", "pickle"):
+            pytest.skip("real models present")
+        assert isinstance(simulated._models[key], SimulatedModel)
+        assert simulated.sources[key] == "simulated"
+
+
+def test_simulated_dtr_is_called_without_fallback(simulated, monkeypatch):
+    dtr = simulated._models["dtr"]
+    calls = []
+    call = dtr._call
+    monkeypatch.setattr(dtr, "_call", lambda x, *a, **kw: calls.append(x) or call(x, *a, **kw))
+
+    user_data = build_user_data(30, "Male", 178, 80, "Moderately Active", "Muscle Gain",
+                                "Vegetarian", "South Asian", 10, ["Dumbbells"], "")
+    plan = generate_plan(simulated, user_data)
+    assert len(calls) == 1
+    assert "calories_fallback" not in plan["degradations"]
+
+
+def test_plain_stubs_still_fall_back(monkeypatch):
+    models = ModelLoader(REPO, simulation_profile="")
+    if models.sources["dtr"] != "stub":
+        pytest.skip("real calorie model present")
+    user_data = build_user_data(30, "Male", 178, 80, "Moderately Active", "Muscle Gain",
+                                "Vegetarian", "South Asian", 10, ["Dumbbells"], "")
+    assert "calories_fallback" in generate_plan(models, user_data)["degradations"]
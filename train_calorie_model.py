@@ -0,0 +1,295 @@
+"""train_calorie_model.py — Retrain the calorie preprocessor + regressor.
+
+Reads ``datasets/Calories Burned {Train,Test} Dataset.csv`` with typed,
+chunked reads, derives the same features ``compute_plan`` feeds to
+``ModelLoader.preprocess_calories`` (bmi/bmr/tdee are computed when the CSV
+does not carry them), then evaluates the hyper-parameter grid of every
+calorie backend (see ``calorie_models``) in parallel across cores on a
+validation split held out of the train CSV.  Every candidate is reported
+with validation accuracy and inference latency; each backend's winner is
+refitted on the whole train CSV, scored once on the test CSV, and written
+next to ``models/calorie_preprocessor.pkl`` and, if an artifact directory
+exists, re-exported into it.  The test CSV never influences a choice.
+
+    python train_calorie_model.py --jobs -1 --select fastest --tolerance 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import logging
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+
+from calorie_models import BACKENDS, PARAM_GRIDS, make_model
+from config import APP_CONFIG
+from health_metrics import bmi_array, bmr_array, tdee_array
+
+
+logger = logging.getLogger(__name__)
+
+TRAIN_CSV = "datasets/Calories Burned Train Dataset.csv"
+TEST_CSV  = "datasets/Calories Burned Test Dataset.csv"
+
+NUMERIC_FEATURES     = ["age", "height_cm", "weight_kg", "bmi", "bmr", "tdee"]
+CATEGORICAL_FEATURES = ["gender", "activity_level", "fitness_goal"]
+TARGET               = "calories"
+
+# Share of the train CSV held out to select hyper-parameters and backend
+VALIDATION_SHARE = 0.2
+
+# Normalised CSV header → feature name
+COLUMN_ALIASES = {
+    "height":          "height_cm",
+    "weight":          "weight_kg",
+    "sex":             "gender",
+    "activity":        "activity_level",
+    "goal":            "fitness_goal",
+    "calories_burned": TARGET,
+    "daily_calories":  TARGET,
+    "target_calories": TARGET,
+}
+
+# ─── Loading ──────────────────────────────────────────────────────────────────
+def _normalise(name: str) -> str:
+    key = re.sub(r"[^0-9a-z]+", "_", name.strip().lower()).strip("_")
+    return COLUMN_ALIASES.get(key, key)
+
+
+def load_dataset(path: str, chunk_size: int = 100_000) -> pd.DataFrame:
+    """Typed, chunked CSV read restricted to the columns the model uses."""
+    header = pd.read_csv(path, nrows=0).columns
+    rename = {c: _normalise(c) for c in header}
+    wanted = set(NUMERIC_FEATURES) | set(CATEGORICAL_FEATURES) | {TARGET}
+    usecols = [c for c, n in rename.items() if n in wanted]
+    if TARGET not in {rename[c] for c in usecols}:
+        raise ValueError(f"{path}: no calorie target column among {list(header)}")
+
+    dtype = {c: ("category" if rename[c] in CATEGORICAL_FEATURES else "float32") for c in usecols}
+    chunks = pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunk_size)
+    df = pd.concat(chunks, ignore_index=True).rename(columns=rename)
+    return derive_features(df)
+
+
+def derive_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Fill in bmi / bmr / tdee from the raw columns when the CSV lacks them."""
+    df = df.copy()
+    for col in CATEGORICAL_FEATURES:
+        if col in df:
+            df[col] = df[col].astype(str).str.strip()
+    if "gender" in df:
+        df["gender"] = df["gender"].str.capitalize()
+
+    body = {"weight_kg", "height_cm"}
+    if "bmi" not in df and body <= set(df):
+        df["bmi"] = bmi_array(df["weight_kg"], df["height_cm"])
+    if "bmr" not in df and (body | {"age", "gender"}) <= set(df):
+        df["bmr"] = bmr_array(df["gender"], df["weight_kg"], df["height_cm"], df["age"])
+    if "tdee" not in df and "bmr" in df:
+        activity = df["activity_level"] if "activity_level" in df else np.full(len(df), "")
+        df["tdee"] = tdee_array(df["bmr"], activity)
+    return df.dropna(subset=[TARGET])
+
+
+def split_validation(df: pd.DataFrame, share: float = VALIDATION_SHARE,
+                     seed: int = 0) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(fit, validation) rows of the train set; seeded so reruns compare."""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(df, test_size=share, random_state=seed)
+
+
+def feature_columns(df: pd.DataFrame) -> tuple[list[str], list[str]]:
+    return ([c for c in NUMERIC_FEATURES if c in df],
+            [c for c in CATEGORICAL_FEATURES if c in df])
+
+
+# ─── Candidates ───────────────────────────────────────────────────────────────
+def build_preprocessor(numeric: list[str], categorical: list[str]):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    parts = [("num", StandardScaler(), numeric)]
+    if categorical:
+        parts.append(("cat", OneHotEncoder(handle_unknown="ignore"), categorical))
+    return ColumnTransformer(parts, sparse_threshold=0.0)
+
+
+def candidate_grid(backends: list[str] = BACKENDS) -> list[tuple[str, dict]]:
+    out = []
+    for backend in backends:
+        grid = PARAM_GRIDS[backend]
+        keys = list(grid)
+        out += [(backend, dict(zip(keys, values))) for values in itertools.product(*grid.values())]
+    return out
+
+
+def _latency(predict, X_one, X_batch, repeat: int = 200) -> dict:
+    """Median single-row latency (µs) and batch throughput (rows/s)."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X_one)
+        samples.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    predict(X_batch)
+    batch_s = time.perf_counter() - start
+    return {
+        "latency_us":  float(np.median(samples) * 1e6),
+        "rows_per_s":  len(X_batch) / batch_s if batch_s else float("inf"),
+    }
+
+
+def evaluate_candidate(backend: str, params: dict, numeric: list[str],
+                       X_train, y_train, X_test, y_test) -> dict:
+    """Fit one candidate; return accuracy + latency metrics and the fitted model."""
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    model = make_model(backend, params, numeric)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    pred = model.predict(X_test)
+    result = {
+        "backend": backend,
+        "params": params,
+        "mae":    float(mean_absolute_error(y_test, pred)),
+        "rmse":   float(np.sqrt(mean_squared_error(y_test, pred))),
+        "r2":     float(r2_score(y_test, pred)),
+        "fit_s":  fit_s,
+        "model":  model,
+    }
+    result.update(_latency(model.predict, X_test[:1], X_test))
+    return result
+
+
+def select(results: list[dict], mode: str = "accuracy", tolerance: float = 0.05) -> dict:
+    """``accuracy``: lowest MAE.  ``fastest``: lowest latency within ``tolerance`` of it."""
+    best = min(results, key=lambda r: r["mae"])
+    if mode == "accuracy":
+        return best
+    ok = [r for r in results if r["mae"] <= best["mae"] * (1 + tolerance)]
+    return min(ok, key=lambda r: r["latency_us"])
+
+
+def report(results: list[dict], chosen: dict, title: str = "validation"):
+    print(f"  {title}")
+    print(f"  {'backend':<8}{'candidate':<52}{'MAE':>9}{'RMSE':>9}{'R²':>7}"
+          f"{'µs/row':>9}{'rows/s':>13}")
+    for r in sorted(results, key=lambda r: r["mae"]):
+        label = ", ".join(f"{k}={v}" for k, v in r["params"].items())
+        mark = "→ " if r is chosen else "  "
+        print(f"{mark}{r['backend']:<8}{label:<52}{r['mae']:>9.1f}{r['rmse']:>9.1f}"
+              f"{r['r2']:>7.3f}{r['latency_us']:>9.1f}{r['rows_per_s']:>13,.0f}")
+
+
+# ─── Driver ───────────────────────────────────────────────────────────────────
+def train(
+    train_csv: str = TRAIN_CSV,
+    test_csv: str = TEST_CSV,
+    out_dir: str = APP_CONFIG.MODEL_DIR,
+    jobs: int = -1,
+    mode: str = "accuracy",
+    tolerance: float = 0.05,
+    write: bool = True,
+    backends: list[str] = BACKENDS,
+    val_share: float = VALIDATION_SHARE,
+) -> dict:
+    """
+    Search every backend's grid on a validation split of ``train_csv``; the
+    winner of each backend is refitted on all of it, scored on ``test_csv``
+    and written to its own file (all share the freshly fitted preprocessor),
+    and the overall choice is reported so ``APP_CONFIG.CALORIE_BACKEND`` can
+    be set to it.
+    """
+    import joblib
+    from joblib import Parallel, delayed
+    from model_loader import ModelLoader
+
+    train_df, test_df = load_dataset(train_csv), load_dataset(test_csv)
+    numeric, categorical = feature_columns(train_df)
+    logger.info(f"{len(train_df):,} train / {len(test_df):,} test rows; "
+                f"features: {numeric + categorical}")
+
+    # Selection: fit on part of the train CSV, score on the held-out rest
+    fit_df, val_df = split_validation(train_df, val_share)
+    val_prep = build_preprocessor(numeric, categorical)
+    X_fit = val_prep.fit_transform(fit_df)
+    X_val = val_prep.transform(val_df)
+    y_fit = fit_df[TARGET].to_numpy(np.float64)
+    y_val = val_df[TARGET].to_numpy(np.float64)
+
+    results = Parallel(n_jobs=jobs)(
+        delayed(evaluate_candidate)(backend, params, numeric, X_fit, y_fit, X_val, y_val)
+        for backend, params in candidate_grid(backends)
+    )
+    chosen = select(results, mode, tolerance)
+    report(results, chosen)
+    selected = {b: select([r for r in results if r["backend"] == b], mode, tolerance)
+                for b in backends}
+
+    # Only the selected candidates are refitted on the whole train CSV and see the test CSV
+    prep = build_preprocessor(numeric, categorical)
+    X_train = prep.fit_transform(train_df)
+    X_test  = prep.transform(test_df)
+    y_train = train_df[TARGET].to_numpy(np.float64)
+    y_test  = test_df[TARGET].to_numpy(np.float64)
+    final = Parallel(n_jobs=jobs)(
+        delayed(evaluate_candidate)(b, r["params"], numeric, X_train, y_train, X_test, y_test)
+        for b, r in selected.items()
+    )
+    per_backend = {r["backend"]: r for r in final}
+    chosen = per_backend[chosen["backend"]]
+    report(final, chosen, title="test (selected candidates only)")
+    logger.info(f"Recommended CALORIE_BACKEND = {chosen['backend']!r} "
+                f"(test MAE {chosen['mae']:.1f})")
+
+    if write:
+        files = dict(ModelLoader.CALORIE_BACKEND_FILES,
+                     calorie_preprocessor=ModelLoader.MODEL_FILES["calorie_preprocessor"])
+        objs = {"calorie_preprocessor": prep, **{b: r["model"] for b, r in per_backend.items()}}
+        stale = set(ModelLoader.CALORIE_BACKEND_FILES) - set(backends)
+        if stale:
+            logger.warning(f"⚠️ {', '.join(sorted(stale))} not retrained — their saved models "
+                           f"no longer match the new preprocessor")
+        for key, obj in objs.items():
+            path = os.path.join(out_dir, files[key])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            joblib.dump(obj, path)
+            logger.info(f"✅ Wrote {path}")
+        art_dir = os.path.join(out_dir, APP_CONFIG.ARTIFACT_DIR)
+        if os.path.isdir(art_dir):
+            from model_artifacts import update_artifacts
+            update_artifacts(art_dir, objs)
+
+    return {"preprocessor": prep, "chosen": chosen, "per_backend": per_backend,
+            "results": results}
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--train", default=TRAIN_CSV)
+    parser.add_argument("--test", default=TEST_CSV)
+    parser.add_argument("--out-dir", default=APP_CONFIG.MODEL_DIR)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel workers (-1 = all cores)")
+    parser.add_argument("--select", choices=["accuracy", "fastest"], default="accuracy")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="with --select fastest: allowed MAE regression vs. the best")
+    parser.add_argument("--backend", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--val-share", type=float, default=VALIDATION_SHARE,
+                        help="share of the train CSV held out to select candidates")
+    parser.add_argument("--dry-run", action="store_true", help="report only, write nothing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    train(args.train, args.test, args.out_dir, args.jobs, args.select, args.tolerance,
+          write=not args.dry_run, backends=args.backend, val_share=args.val_share)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""weight_projection.py — Week-by-week energy-balance weight projection.
+
+For every user the simulator starts from ``HealthMetrics.tdee`` (habitual
+intake = expenditure), the ``predict_calories`` target and the plan's weekly
+workout burn, then steps
+
+    expenditure = activity_mult × BMR(weight, age) + adherence × burn_per_kg × weight / 7
+    intake      = adherence × target + (1 − adherence) × tdee₀
+    Δweight     = 7 × (intake − expenditure) / KCAL_PER_KG
+
+BMR is the same Harris-Benedict equation ``HealthMetrics`` uses, refitted as
+``base + slope × weight + age_slope × years`` so each week is a handful of
+array ops over all users (and Monte Carlo draws) — the only Python loop is
+over weeks.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from health_metrics import bmr_array
+
+
+KCAL_PER_KG = 7700.0          # energy content of mixed weight change
+MIN_WEIGHT_KG = 30.0
+
+ADHERENCE = {
+    "mean":          0.8,     # average share of the plan actually followed
+    "concentration": 8.0,     # Beta(mean·c, (1−mean)·c) per user × draw
+    "weekly_sd":     0.1,     # week-to-week wobble around the user's level
+}
+
+
+def _bmr_terms(gender, height_cm, age):
+    """(base, per-kg, per-year) coefficients of the linear BMR equation."""
+    zero = np.zeros(np.shape(height_cm))
+    base = bmr_array(gender, zero, height_cm, age)
+    per_kg = bmr_array(gender, zero + 1, height_cm, age) - base
+    per_year = bmr_array(gender, zero, height_cm, np.asarray(age, dtype=np.float64) + 1) - base
+    return base, per_kg, per_year
+
+
+class EnergyBalanceModel:
+    """Per-user constants of the simulation, shaped (n_users,)."""
+
+    def __init__(self, gender, height_cm, weight_kg, age, tdee, target_kcal, weekly_burn_kcal):
+        self.weight0 = np.asarray(weight_kg, dtype=np.float64)
+        self.tdee0   = np.asarray(tdee, dtype=np.float64)
+        self.target  = np.asarray(target_kcal, dtype=np.float64)
+        self.base, self.per_kg, self.per_year = _bmr_terms(gender, height_cm, age)
+        bmr0 = self.base + self.per_kg * self.weight0
+        self.activity_mult = self.tdee0 / bmr0
+        # Workout burn scales with body weight as the user gets lighter / heavier
+        self.burn_per_kg = np.asarray(weekly_burn_kcal, dtype=np.float64) / self.weight0
+
+    def step(self, weight: np.ndarray, week: int, adherence) -> np.ndarray:
+        """One week forward; ``weight`` is (n_users, …) and broadcasts with ``adherence``."""
+        def col(x):
+            return x.reshape(x.shape + (1,) * (weight.ndim - 1))
+
+        bmr = col(self.base) + col(self.per_kg) * weight + col(self.per_year) * (week / 52)
+        expenditure = col(self.activity_mult) * bmr + adherence * col(self.burn_per_kg) * weight / 7
+        intake = adherence * col(self.target) + (1 - adherence) * col(self.tdee0)
+        return np.maximum(weight + 7 * (intake - expenditure) / KCAL_PER_KG, MIN_WEIGHT_KG)
+
+    def subset(self, sl: slice) -> "EnergyBalanceModel":
+        out = object.__new__(EnergyBalanceModel)
+        for k, v in vars(self).items():
+            setattr(out, k, v[sl])
+        return out
+
+
+# ─── Simulation ───────────────────────────────────────────────────────────────
+def simulate(model: EnergyBalanceModel, weeks: int = 12, adherence: float = 1.0) -> np.ndarray:
+    """Deterministic (weeks + 1, n_users) trajectory, week 0 = starting weight."""
+    out = np.empty((weeks + 1, len(model.weight0)))
+    out[0] = model.weight0
+    for t in range(weeks):
+        out[t + 1] = model.step(out[t], t, adherence)
+    return out
+
+
+def monte_carlo(
+    model: EnergyBalanceModel,
+    weeks: int = 12,
+    draws: int = 1000,
+    percentiles: tuple[float, ...] = (10, 50, 90),
+    seed: int = 0,
+    max_cells: int = 20_000_000,
+) -> np.ndarray:
+    """
+    (weeks + 1, len(percentiles), n_users) weight percentiles over ``draws``
+    adherence scenarios per user.  Users are processed in blocks so that a
+    block holds at most ``max_cells`` user × draw states.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(model.weight0)
+    m, c = ADHERENCE["mean"], ADHERENCE["concentration"]
+    out = np.empty((weeks + 1, len(percentiles), n))
+    block = max(1, max_cells // draws)
+
+    for start in range(0, n, block):
+        sl = slice(start, min(start + block, n))
+        sub = model.subset(sl)
+        level = rng.beta(m * c, (1 - m) * c, size=(len(sub.weight0), draws))
+        weight = np.repeat(sub.weight0[:, None], draws, axis=1)
+        out[0, :, sl] = sub.weight0
+        for t in range(weeks):
+            wobble = rng.normal(0.0, ADHERENCE["weekly_sd"], size=level.shape)
+            weight = sub.step(weight, t, np.clip(level + wobble, 0.0, 1.0))
+            out[t + 1, :, sl] = np.percentile(weight, percentiles, axis=1)
+    return out
+
+
+def project_user(user_data: dict, tdee: float, target_kcal: float,
+                 weekly_burn_kcal: float, weeks: int = 12) -> list[float]:
+    """Single-user deterministic projection, rounded for display."""
+    model = EnergyBalanceModel(
+        [user_data["gender"]], [user_data["height_cm"]], [user_data["weight_kg"]],
+        [user_data["age"]], [tdee], [target_kcal], [weekly_burn_kcal],
+    )
+    return [round(float(w), 1) for w in simulate(model, weeks)[:, 0]]